@@ -1,10 +1,15 @@
 import streamlit as st
-import json
-import time
+import os
+import tempfile
 import pandas as pd
-from datetime import datetime
-from fpdf import FPDF
 from tribunal import SanctionTribunal
+from reports import batch_case, create_pdf_report, write_case_book, write_case_zip
+from customer_book import CustomerBook
+from batch_runner import PENDING_STATUS, dedup_ratio, screen_names
+from budget import Tier2Budget
+from triage import AMBIGUOUS, COUNTRY_CHOICES
+from metrics import METRICS
+from screening_service import ScreeningClient
 
 # --- PAGE CONFIG ---
 st.set_page_config(page_title="SanctionGuard AI", page_icon="⚖️", layout="wide")
@@ -21,104 +26,19 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# --- COMPREHENSIVE COUNTRY LIST ---
-COUNTRIES = [
-    "Unknown", "Afghanistan", "Albania", "Algeria", "Andorra", "Angola", "Argentina", "Armenia", "Australia", "Austria", 
-    "Azerbaijan", "Bahamas", "Bahrain", "Bangladesh", "Barbados", "Belarus", "Belgium", "Belize", "Benin", "Bhutan", 
-    "Bolivia", "Bosnia and Herzegovina", "Botswana", "Brazil", "Brunei", "Bulgaria", "Burkina Faso", "Burundi", "Cambodia", 
-    "Cameroon", "Canada", "Central African Republic", "Chad", "Chile", "China", "Colombia", "Comoros", "Congo (Brazzaville)", 
-    "Congo (Kinshasa)", "Costa Rica", "Croatia", "Cuba", "Cyprus", "Czech Republic", "Denmark", "Djibouti", "Dominican Republic", 
-    "Ecuador", "Egypt", "El Salvador", "Equatorial Guinea", "Eritrea", "Estonia", "Ethiopia", "Fiji", "Finland", "France", 
-    "Gabon", "Gambia", "Georgia", "Germany", "Ghana", "Greece", "Guatemala", "Guinea", "Guyana", "Haiti", "Honduras", 
-    "Hong Kong", "Hungary", "Iceland", "India", "Indonesia", "Iran", "Iraq", "Ireland", "Israel", "Italy", "Ivory Coast", 
-    "Jamaica", "Japan", "Jordan", "Kazakhstan", "Kenya", "Kuwait", "Kyrgyzstan", "Laos", "Latvia", "Lebanon", "Liberia", 
-    "Libya", "Liechtenstein", "Lithuania", "Luxembourg", "Madagascar", "Malawi", "Malaysia", "Maldives", "Mali", "Malta", 
-    "Mexico", "Moldova", "Monaco", "Mongolia", "Montenegro", "Morocco", "Mozambique", "Myanmar (Burma)", "Namibia", "Nepal", 
-    "Netherlands", "New Zealand", "Nicaragua", "Niger", "Nigeria", "North Korea", "North Macedonia", "Norway", "Oman", 
-    "Pakistan", "Palestine", "Panama", "Papua New Guinea", "Paraguay", "Peru", "Philippines", "Poland", "Portugal", "Qatar", 
-    "Romania", "Russia", "Rwanda", "Saudi Arabia", "Senegal", "Serbia", "Sierra Leone", "Singapore", "Slovakia", "Slovenia", 
-    "Somalia", "South Africa", "South Korea", "South Sudan", "Spain", "Sri Lanka", "Sudan", "Sweden", "Switzerland", "Syria", 
-    "Taiwan", "Tajikistan", "Tanzania", "Thailand", "Timor-Leste", "Togo", "Trinidad and Tobago", "Tunisia", "Turkey", 
-    "Turkmenistan", "Uganda", "Ukraine", "United Arab Emirates", "United Kingdom", "United States", "Uruguay", "Uzbekistan", 
-    "Venezuela", "Vietnam", "Yemen", "Zambia", "Zimbabwe"
-]
-
-# --- HELPERS ---
-def clean_text(text):
-    """Sanitizes text for FPDF to prevent crashes with emojis/smart quotes."""
-    if not isinstance(text, str): return str(text)
-    replacements = {
-        '\u2018': "'", '\u2019': "'", '\u201c': '"', '\u201d': '"', 
-        '\u2013': '-', '\u00a0': ' ', '\t': ' '
-    }
-    for old, new in replacements.items(): text = text.replace(old, new)
-    return text.encode('latin-1', 'replace').decode('latin-1')
-
-class PDFReport(FPDF):
-    def header(self):
-        self.set_font('Arial', 'B', 12)
-        self.cell(0, 10, 'SanctionGuard AI // Tribunal Record', 0, 1, 'C')
-        self.ln(5)
-    def footer(self):
-        self.set_y(-15)
-        self.set_font('Arial', 'I', 8)
-        self.cell(0, 10, f'Page {self.page_no()}', 0, 0, 'C')
-
-def create_pdf_report(case_data):
-    pdf = PDFReport()
-    pdf.add_page()
-    pdf.set_auto_page_break(auto=True, margin=15)
-    
-    # Title
-    pdf.set_font("Arial", "B", 16)
-    pdf.cell(0, 10, f"CASE: {clean_text(case_data['target_name']).upper()}", ln=True)
-    pdf.set_font("Arial", "", 10)
-    pdf.cell(0, 10, f"ID: {hash(case_data['target_name']) % 10000} | Date: {datetime.now().strftime('%Y-%m-%d')}", ln=True)
-    
-    # Dynamic Line
-    current_y = pdf.get_y()
-    pdf.line(10, current_y, 200, current_y)
-    pdf.ln(5)
-    
-    # Verdict Highlight
-    pdf.set_font("Arial", "B", 14)
-    if "HIGH" in case_data['verdict']: pdf.set_text_color(255, 0, 0)
-    else: pdf.set_text_color(0, 150, 0)
-    pdf.cell(0, 10, clean_text(f"VERDICT: {case_data['verdict']} ({case_data['confidence']}%)"), ln=True)
-    pdf.set_text_color(0, 0, 0)
-    
-    # Details
-    pdf.set_font("Arial", "", 10)
-    details = f"Match: {case_data['match_name']} ({case_data['match_score']}%)\nReasoning: {case_data['reasoning']}"
-    pdf.multi_cell(0, 6, clean_text(details))
-    pdf.ln(5)
-    
-    # Arguments
-    pdf.set_font("Arial", "B", 10)
-    pdf.set_text_color(200, 50, 50)
-    pdf.cell(0, 6, "PROSECUTION:", ln=True)
-    pdf.set_font("Arial", "", 9)
-    pdf.set_text_color(0,0,0)
-    pdf.multi_cell(0, 5, clean_text(case_data['pros_arg']))
-    pdf.ln(3)
-    
-    pdf.set_font("Arial", "B", 10)
-    pdf.set_text_color(50, 50, 200)
-    pdf.cell(0, 6, "DEFENSE:", ln=True)
-    pdf.set_font("Arial", "", 9)
-    pdf.set_text_color(0,0,0)
-    pdf.multi_cell(0, 5, clean_text(case_data['def_arg']))
-    
-    return pdf.output(dest='S').encode('latin-1', 'replace')
-
 # --- SESSION STATE INITIALIZATION ---
 if 'case_result' not in st.session_state:
     st.session_state.case_result = None
 
 # --- LOAD TRIBUNAL ---
+# 🛰️ SANCTIONGUARD_SERVICE=host:port (or unix:/path) makes the app a thin client of screening_service.py
+SERVICE = os.getenv("SANCTIONGUARD_SERVICE")
+
 @st.cache_resource
 def load_tribunal():
     try:
+        if SERVICE:
+            return ScreeningClient(SERVICE)
         return SanctionTribunal()
     except Exception as e:
         return None
@@ -132,8 +52,22 @@ with st.sidebar:
     st.write("### ⚙️ Settings")
     threshold = st.slider("Fuzzy Sensitivity", 50, 100, 60, help="Lower values catch typos. Higher values require exact matches.")
     
-    if tribunal:
-        st.success("✅ System Online: Connected to OFAC & UN DB")
+    if tribunal and tribunal.keys_configured():
+        st.success("✅ System Online: Connected to OFAC, UN, EU & UK DB")
+        # The index loads in the background; don't hold the page for it
+        if SERVICE and not tribunal.loaded.is_set():
+            tribunal.status()
+        if tribunal.load_error is not None:
+            st.error(f"❌ Sanctions index failed to load: {tribunal.load_error}")
+        elif tribunal.loaded.is_set():
+            cache_stats = tribunal.cache_stats()
+            st.caption(f"💾 Verdict cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses")
+        else:
+            st.caption("⏳ Loading sanctions index...")
+        latency = tribunal.latency_summary()
+        if latency:
+            with st.expander("⏱️ Agent latency (p50, seconds)"):
+                st.dataframe(pd.DataFrame(latency), hide_index=True)
     else:
         st.error("❌ API Keys Missing! See 'secrets.toml'")
         
@@ -165,7 +99,7 @@ with tab1:
     st.markdown("Provide entity details below to convene the tribunal.")
     col1, col2 = st.columns(2)
     name_input = col1.text_input("Entity Name", placeholder="e.g. Pegah Aluminum")
-    country_input = col2.selectbox("Country (Optional Context)", COUNTRIES)
+    country_input = col2.selectbox("Country (Optional Context)", COUNTRY_CHOICES)
     
     # 1. ACTION BUTTON
     if st.button("🚀 Convene Tribunal", key="btn_single"):
@@ -177,56 +111,39 @@ with tab1:
             if match and score >= threshold:
                 status.update(label="⚠️ Match Found! Convening Tribunal...", state="error")
                 
-                # --- AI AGENTS (THEATRICAL PROMPTS) ---
-                
-                # Prosecutor Prompt: Aggressive, Courtroom Style
-                pros_prompt = (
-                    f"Role: Aggressive Sanctions Prosecutor. "
-                    f"Address the court directly ('Your Honor...'). "
-                    f"Evidence: Input '{name_input}' matches sanctioned entity '{match['name']}' ({int(score)}%). Country: {country_input}. "
-                    f"Task: Argue forcefully that this is a risk. Keep it under 60 words. Be punchy."
-                )
-                pros_arg = tribunal.groq_client.chat.completions.create(
-                    messages=[{"role":"user","content":pros_prompt}], 
-                    model=tribunal.MODEL_PROSECUTOR
-                ).choices[0].message.content
-                
-                # Defense Prompt: Protective, Technical
-                def_prompt = (
-                    f"Role: Defense Attorney. "
-                    f"Address the court directly ('Your Honor, I object...'). "
-                    f"Evidence: Input '{name_input}' vs Match '{match['name']}'. "
-                    f"Prosecution's Claim: '{pros_arg}'. "
-                    f"Task: Highlight that name matches are not identity matches. Point out missing birth dates/biometrics. "
-                    f"Keep it under 60 words. Be respectful but firm."
-                )
-                def_arg = tribunal.groq_client.chat.completions.create(
-                    messages=[{"role":"user","content":def_prompt}], 
-                    model=tribunal.MODEL_DEFENSE
-                ).choices[0].message.content
-                
-                # Judge Prompt: Decisive, Percentage
-                judge_prompt = (
-                    f"Act as a Judge and respond like a legal Judge. "
-                    f"Prosecution Argument: {pros_arg} "
-                    f"Defense Argument: {def_arg} "
-                    f"Weigh the risk based on the name match ({int(score)}%) and country. "
-                    f"Output strictly valid JSON: {{ \"verdict\": \"HIGH RISK\" or \"LOW RISK\", \"confidence\": <int 0-100>, \"reasoning\": \"<short judicial summary>\" }}"
-                )
-                judge_resp = tribunal.judge_model.generate_content(judge_prompt).text
-                
+                # --- AI AGENTS (THEATRICAL PROMPTS, streamed live, cached per list version) ---
+                live_c1, live_c2 = st.columns(2)
+                live = {"prosecutor": live_c1.empty(), "defense": live_c2.empty(), "judge": st.empty()}
+                boxes = {"prosecutor": ("prosecutor-box", "👨‍⚖️ Prosecution:"), "defense": ("defense-box", "🛡️ Defense:"),
+                         "judge": ("verdict-box", "⚖️ Judge deliberating:")}
+                streamed = {agent: "" for agent in live}
+
+                def show_token(agent, token):
+                    streamed[agent] += token
+                    box, title = boxes[agent]
+                    live[agent].markdown(f"<div class='{box}'><b>{title}</b><br>{streamed[agent]}</div>", unsafe_allow_html=True)
+
                 try:
-                    verdict = json.loads(judge_resp.replace("```json","").replace("```",""))
+                    case = tribunal.convene(name_input, match, score, country_input, on_token=show_token)
+                    # Live boxes make way for the persistent display below
+                    for slot in live.values(): slot.empty()
                     
                     # SAVE TO SESSION STATE
                     st.session_state.case_result = {
                         "match": match, "score": score,
-                        "pros_arg": pros_arg, "def_arg": def_arg,
-                        "verdict": verdict,
-                        "name_input": name_input, "country_input": country_input
+                        "pros_arg": case['pros_arg'], "def_arg": case['def_arg'],
+                        "verdict": case['verdict'], "rule": case.get('rule', AMBIGUOUS),
+                        "name_input": name_input, "country_input": country_input,
+                        "tokens": case.get('tokens', 0), "cost_usd": case.get('cost_usd', 0.0)
                     }
                     
-                except: st.error("Judicial Error: Could not reach a verdict.")
+                except ValueError:
+                    st.session_state.case_result = None
+                    st.error("Judicial Error: Could not reach a verdict.")
+                except Exception as e:
+                    # API, rate-limit or service failures: shown like a batch row's error, not as a traceback
+                    st.session_state.case_result = None
+                    st.error(f"Judicial Error: {type(e).__name__}: {e}")
             else:
                 st.session_state.case_result = None
                 status.update(label="✅ No Match Found", state="complete")
@@ -236,6 +153,13 @@ with tab1:
     if st.session_state.case_result:
         res = st.session_state.case_result
         st.error(f"**MATCH DETECTED:** '{res['match']['name']}' ({int(res['score'])}%)")
+        listings = res['match'].get('sources', [])
+        if listings:
+            st.caption("📚 Listed on: " + ", ".join(f"{s['list']} ({s['id']})" for s in listings))
+        if res['rule'] != AMBIGUOUS:
+            st.info(f"🚥 Settled by triage rule **{res['rule']}** (no LLM call).")
+        elif res.get('tokens'):
+            st.caption(f"🪙 {res['tokens']} tokens, ~${res['cost_usd']:.4f} estimated")
 
         c1, c2 = st.columns(2)
         c1.markdown(f"<div class='prosecutor-box'><b>👨‍⚖️ Prosecution:</b><br>{res['pros_arg']}</div>", unsafe_allow_html=True)
@@ -255,9 +179,11 @@ with tab1:
         
         safe_filename = f"SanctionGuard_Case_{res['name_input'].replace(' ', '_')}.pdf"
         
+        with METRICS.timer("pdf_render_seconds", mode="single"):
+            pdf_bytes = create_pdf_report(pdf_data)
         st.download_button(
             label="📄 Download PDF Report", 
-            data=create_pdf_report(pdf_data), 
+            data=pdf_bytes, 
             file_name=safe_filename, 
             mime="application/pdf"
         )
@@ -268,6 +194,15 @@ with tab2:
     st.info("Upload a CSV file containing a column named **'name'** (and optional 'country'). The AI will screen all entities automatically.")
     
     uploaded_file = st.file_uploader("Upload CSV", type=["csv"])
+    save_to_book = st.checkbox("💾 Keep these customers in the customer book (re-screened automatically on list updates)", value=True)
+    case_files = st.radio("📄 Case files for flagged rows", ["None", "ZIP (one PDF per case)", "Combined PDF"], horizontal=True)
+    with st.expander("🪙 Tier 2 budget (0 = no cap)"):
+        b1, b2, b3 = st.columns(3)
+        max_tokens = b1.number_input("Max tokens", min_value=0, value=0, step=10_000)
+        max_cost = b2.number_input("Max cost (USD, est.)", min_value=0.0, value=0.0, step=0.5)
+        max_seconds = b3.number_input("Max seconds", min_value=0, value=0, step=30)
+        st.caption("Ambiguous matches are judged highest priority first (score, listing risk, country agreement); "
+                   "whatever the budget does not reach is marked pending review.")
     
     if uploaded_file and st.button("Start Batch Screening"):
         if not tribunal: st.error("Database not loaded."); st.stop()
@@ -278,55 +213,91 @@ with tab2:
         if 'name' not in df.columns:
             st.error("CSV must have a 'name' column!")
         else:
-            results = []
             progress_bar = st.progress(0)
             status_text = st.empty()
             
-            for index, row in df.iterrows():
-                progress = (index + 1) / len(df)
-                progress_bar.progress(progress)
-                status_text.text(f"Scanning {index+1}/{len(df)}: {row['name']}...")
-                
-                # 1. Tier 1 Scan
-                match, score = tribunal.scan_database(row['name'])
-                
-                result_row = {
-                    "Entity Name": row['name'],
-                    "Status": "CLEAR",
-                    "Match Score": 0,
-                    "Verdict": "N/A",
-                    "Reasoning": "No close match found."
-                }
-                
-                # 2. Tier 2 Tribunal (Only if match found)
-                if match and score >= threshold:
-                    result_row['Match Score'] = int(score)
-                    
-                    # Call Judge Directly
-                    judge_prompt = f"""
-                    Role: Sanction Judge. 
-                    Input: {row['name']}. Match: {match['name']} ({int(score)}%). 
-                    Task: Is this High Risk? Output strictly JSON: {{ "verdict": "HIGH" or "LOW", "reasoning": "short reason" }}
-                    """
-                    try:
-                        resp = tribunal.judge_model.generate_content(judge_prompt).text
-                        v_json = json.loads(resp.replace("```json","").replace("```",""))
-                        
-                        result_row['Status'] = "⚠️ FLAGGED"
-                        result_row['Verdict'] = v_json.get('verdict', 'UNKNOWN')
-                        result_row['Reasoning'] = v_json.get('reasoning', '')
-                    except:
-                        result_row['Status'] = "ERROR"
-                
-                results.append(result_row)
+            # 1. Tier 1 Scan (whole column in one vectorized pass), 2. Tier 2 Tribunal (concurrent judge calls)
+            names = df['name'].fillna("").astype(str).tolist()
+            status_text.text(f"Scanning {len(names)} entities...")
+            
+            def show_progress(done, total):
+                progress_bar.progress(done / total)
+                status_text.text(f"Judging {done}/{total} flagged matches...")
+            
+            countries = df['country'].fillna("").astype(str).tolist() if 'country' in df.columns else None
+            budget = Tier2Budget(max_tokens or None, max_cost or None, max_seconds or None) \
+                if (max_tokens or max_cost or max_seconds) else None
+            cache_before = tribunal.cache_stats()
+            metrics_before = METRICS.snapshot()
+            if SERVICE:
+                screened = tribunal.screen_names(names, threshold, countries=countries, budget=budget)
+            else:
+                screened = screen_names(tribunal, names, threshold, progress=show_progress, countries=countries, budget=budget)
+            results, flagged, cases, verdicts = screened['results'], screened['flagged'], screened['cases'], screened['verdicts']
+            cache_after = tribunal.cache_stats()
+            cache_hits = cache_after['hits'] - cache_before['hits']
+            cache_misses = cache_after['misses'] - cache_before['misses']
+            by_rules = sum(isinstance(v, dict) and v.get('rule') != AMBIGUOUS for v in verdicts)
+            pending = sum(r['Status'] == PENDING_STATUS for r in results)
+            spent_tokens, spent_cost = sum(r['Tokens'] for r in results), sum(r['Cost USD'] for r in results)
+            
+            # 3. Customer Book (so list updates only need a delta re-screen)
+            if save_to_book:
+                status_text.text("Saving customers to the book...")
+                book = CustomerBook()
+                customer_ids = book.add_customers(names, countries)
+                list_version = tribunal.status()['list_version'] if SERVICE else tribunal.data.get('version', 0)
+                book.record_hits(
+                    [(customer_ids[index], case[1]['id'], case[2], v_json if isinstance(v_json, dict) else None)
+                     for index, case, v_json in zip(flagged, cases, verdicts)],
+                    list_version
+                )
+                if book.get_meta('list_version') is None:
+                    book.set_meta('list_version', list_version)
             
             # Completion
             progress_bar.progress(1.0)
-            status_text.success("Batch Screening Complete!")
+            status_text.success(
+                f"Batch Screening Complete! {len(names)} rows, {screened['unique']} unique counterparties "
+                f"(dedup ratio {dedup_ratio(len(names), screened['unique']):.2f}x). "
+                f"Triage settled {by_rules}/{len(verdicts)} flagged rows without the LLM. "
+                f"Verdict cache: {cache_hits} hits / {cache_misses} misses. "
+                f"Tier 2 spend: {spent_tokens} tokens, ~${spent_cost:.4f}."
+            )
+            if pending:
+                st.warning(f"⏸️ {pending} rows pending review: the Tier 2 {screened['budget']['exhausted']} budget ran out "
+                           f"before the judge reached them (lowest priority first).")
             
+            # ⏱️ Per-stage timings and counters for this run
+            run_metrics = METRICS.summary(since=metrics_before)
+            if run_metrics:
+                with st.expander("⏱️ Run metrics"):
+                    st.dataframe(pd.DataFrame(run_metrics), hide_index=True)
+                    st.download_button("📈 Prometheus metrics", METRICS.to_prometheus(), "sanctionguard.prom", "text/plain")
+
+            # 📄 Case files: rendered on a process pool, streamed into a ZIP on disk
+            if case_files != "None" and flagged:
+                status_text.text(f"Rendering {len(flagged)} case files...")
+                case_data = [batch_case(case[0], case[1], case[2], v_json, countries[index] if countries else "")
+                             for index, case, v_json in zip(flagged, cases, verdicts)]
+                out = tempfile.NamedTemporaryFile(suffix=".zip" if case_files.startswith("ZIP") else ".pdf", delete=False)
+                out.close()
+                with METRICS.timer("pdf_render_seconds", mode="bulk"):
+                    if case_files.startswith("ZIP"):
+                        stats = write_case_zip(case_data, out.name, progress=lambda done, total: progress_bar.progress(done / total))
+                    else:
+                        stats = write_case_book(case_data, out.name, progress=lambda done, total: progress_bar.progress(done / total))
+                status_text.success(f"📄 {stats['reports']} case files, {stats['pages']} pages in {stats['seconds']}s "
+                                    f"({stats['pages_per_sec']} pages/sec).")
+                with open(out.name, "rb") as f:
+                    st.download_button("📄 Download Case Files", f, "SanctionGuard_Cases" + os.path.splitext(out.name)[1],
+                                       "application/zip" if case_files.startswith("ZIP") else "application/pdf")
+                os.remove(out.name)
+
             # Show Results
             res_df = pd.DataFrame(results)
-            st.dataframe(res_df.style.applymap(lambda v: 'color: red; font-weight: bold;' if v == '⚠️ FLAGGED' else '', subset=['Status']))
+            st.dataframe(res_df.style.applymap(lambda v: 'color: red; font-weight: bold;' if v == '⚠️ FLAGGED' else
+                                               'color: orange; font-weight: bold;' if v == PENDING_STATUS else '', subset=['Status']))
             
             # Download CSV
             csv = res_df.to_csv(index=False).encode('utf-8')
@@ -0,0 +1,261 @@
+import argparse
+import csv
+import json
+import os
+import time
+
+import pandas as pd
+
+from budget import PENDING_REVIEW, Tier2Budget
+from metrics import METRICS
+from name_index import dedup_key, normalize_name
+
+CHECKPOINT_SUFFIX = ".checkpoint.json"
+RESULT_COLUMNS = ["Entity Name", "Status", "Match Score", "Verdict", "Reasoning", "Rule", "Tokens", "Cost USD"]
+PENDING_STATUS = "⏸️ PENDING REVIEW"
+
+
+def group_names(names, countries=None):
+    """
+    De-duplication stage: rows whose dedup_key() (and country, when given) match are one
+    counterparty. Returns (unique names, their countries, group index per row); the first
+    spelling seen represents the group.
+    """
+    countries = countries or [None] * len(names)
+    first = {}
+    unique, unique_countries, groups = [], [], []
+    for name, country in zip(names, countries):
+        key = (dedup_key(name), country)
+        if key not in first:
+            first[key] = len(unique)
+            unique.append(name)
+            unique_countries.append(country)
+        groups.append(first[key])
+    return unique, unique_countries, groups
+
+
+def screen_names(tribunal, names, threshold, progress=None, countries=None, budget=None):
+    """
+    Tier 1 (one vectorized scan), triage rules, then Tier 2 (concurrent judge calls) for the
+    ambiguous matches, highest priority first and within `budget` (a Tier2Budget) when given.
+    Tier 1 scores each distinct normalized spelling once, so a row gets the match its own
+    spelling would get alone; rows of one counterparty (group_names) with the same match and
+    score share one Tier 2 verdict. The tokens and cost of a verdict are shown on its first row
+    only, so the columns add up.
+    Returns the result rows in input order, the flagged row indexes with their
+    (name, match, score) cases and verdicts, the number of unique names and the budget summary.
+    """
+    with METRICS.timer("batch_stage_seconds", stage="dedup"):
+        unique, unique_countries, groups = group_names(names, countries)
+        spellings = {}
+        spelling_of = [spellings.setdefault(normalize_name(name), len(spellings)) for name in names]
+    tier1 = tribunal.scan_batch(list(spellings), threshold=threshold)
+
+    # Queue for triage / Tier 2 (Only if match found), once per counterparty, match and score
+    judged, case_of = {}, []
+    for name, u, s in zip(names, groups, spelling_of):
+        match_row, score = int(tier1['rows'][s, 0]), tier1['scores'][s, 0]
+        key = (u, match_row, float(score)) if match_row >= 0 else None
+        if key is not None and key not in judged:
+            judged[key] = (name, tribunal.entity_by_row[match_row], score)
+        case_of.append(key)
+    with METRICS.timer("batch_stage_seconds", stage="tier2"):
+        settled = tribunal.settle_batch(list(judged.values()), [unique_countries[u] for u, _, _ in judged],
+                                        progress=progress, budget=budget)
+    case_verdicts = dict(zip(judged, settled))
+
+    results, flagged, cases, verdicts = [], [], [], []
+    charged = set()
+    for index, (name, key) in enumerate(zip(names, case_of)):
+        result_row = {
+            "Entity Name": name,
+            "Status": "CLEAR",
+            "Match Score": 0,
+            "Verdict": "N/A",
+            "Reasoning": "No close match found.",
+            "Rule": "",
+            "Tokens": 0,
+            "Cost USD": 0.0,
+        }
+        if key is not None:
+            _, match, score = judged[key]
+            v_json = case_verdicts[key]
+            result_row['Match Score'] = int(score)
+            flagged.append(index)
+            cases.append((name, match, score))
+            verdicts.append(v_json)
+            if not isinstance(v_json, dict):
+                result_row['Status'] = "ERROR"
+            else:
+                result_row['Status'] = PENDING_STATUS if v_json.get('verdict') == PENDING_REVIEW else "⚠️ FLAGGED"
+                result_row['Verdict'] = v_json.get('verdict', 'UNKNOWN')
+                result_row['Reasoning'] = v_json.get('reasoning', '')
+                result_row['Rule'] = v_json.get('rule', '')
+                if key not in charged:
+                    charged.add(key)
+                    result_row['Tokens'] = v_json.get('tokens', 0)
+                    result_row['Cost USD'] = v_json.get('cost_usd', 0.0)
+        results.append(result_row)
+    return {"results": results, "flagged": flagged, "cases": cases, "verdicts": verdicts, "unique": len(unique),
+            "budget": budget.summary() if budget else None}
+
+
+def dedup_ratio(rows, unique):
+    """Rows per unique counterparty (1.0 = no duplicates)."""
+    return rows / unique if unique else 1.0
+
+
+def iter_input_chunks(path, chunksize, start_row=0):
+    """Yields DataFrames of at most `chunksize` rows from a CSV or Parquet file, starting at `start_row`."""
+    if path.endswith(".parquet"):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("❌ Parquet input needs pyarrow (pip install pyarrow)")
+        seen = 0
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize):
+            if seen + batch.num_rows > start_row:
+                yield batch.slice(max(0, start_row - seen)).to_pandas()
+            seen += batch.num_rows
+    else:
+        # A callable skiprows keeps the header line and drops already-screened rows without building a set of row numbers
+        yield from pd.read_csv(path, chunksize=chunksize, skiprows=lambda i: 0 < i <= start_row)
+
+
+def load_checkpoint(path, input_path, output_path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except FileNotFoundError:
+        return None
+    if state.get("input") != os.path.abspath(input_path) or state.get("output") != os.path.abspath(output_path):
+        return None
+    return state
+
+
+def save_checkpoint(path, state):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=4)
+    os.replace(tmp, path)
+
+
+def run_batch(tribunal, input_path, output_path, threshold=60, chunksize=10_000, checkpoint_path=None,
+              resume=True, log=print, limits=None):
+    """
+    Screens a customer file chunk by chunk, appending results to `output_path` (CSV) and
+    checkpointing after every chunk. A killed run restarts from the last checkpoint: the
+    output is truncated back to the checkpointed size and already-screened rows are skipped.
+    Memory is bounded by one chunk.
+    `limits` (Tier2Budget keyword caps) is one budget for the whole run: cases are prioritised
+    within each chunk, and once it is spent the rest of the file's ambiguous matches are pending review.
+    Spending is checkpointed, so a resumed run keeps its budget (the time cap restarts).
+    """
+    checkpoint_path = checkpoint_path or output_path + CHECKPOINT_SUFFIX
+    state = load_checkpoint(checkpoint_path, input_path, output_path) if resume else None
+    if state and state.get("done"):
+        log(f"✅ {input_path} already screened ({state['rows_done']} rows).")
+        return state
+    if state is None:
+        state = {
+            "input": os.path.abspath(input_path),
+            "output": os.path.abspath(output_path),
+            "rows_done": 0,
+            "output_bytes": 0,
+            "unique": 0,
+            "flagged": 0,
+            "errors": 0,
+            "pending_review": 0,
+            "tier2_tokens": 0,
+            "tier2_cost_usd": 0.0,
+            "started": time.time(),
+            "done": False,
+        }
+    else:
+        log(f"↩️  Resuming at row {state['rows_done']}...")
+
+    budget = Tier2Budget(**limits, spent_tokens=state.get("tier2_tokens", 0),
+                         spent_cost=state.get("tier2_cost_usd", 0.0)) if limits else None
+
+    # Drop anything written after the last checkpoint
+    with open(output_path, "a", encoding="utf-8", newline="") as f:
+        f.truncate(state["output_bytes"])
+
+    for chunk in iter_input_chunks(input_path, chunksize, state["rows_done"]):
+        chunk.columns = [str(c).lower() for c in chunk.columns]
+        if 'name' not in chunk.columns:
+            raise SystemExit("❌ Input must have a 'name' column!")
+        names = chunk['name'].fillna("").astype(str).tolist()
+        countries = chunk['country'].fillna("").astype(str).tolist() if 'country' in chunk.columns else None
+        screened = screen_names(tribunal, names, threshold, countries=countries, budget=budget)
+
+        with open(output_path, "a", encoding="utf-8", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=RESULT_COLUMNS)
+            if state["output_bytes"] == 0:
+                writer.writeheader()
+            writer.writerows(screened["results"])
+            f.flush()
+            os.fsync(f.fileno())
+            state["output_bytes"] = f.tell()
+
+        state["rows_done"] += len(names)
+        state["unique"] += screened["unique"]
+        state["flagged"] += sum(r["Status"] == "⚠️ FLAGGED" for r in screened["results"])
+        state["errors"] += sum(r["Status"] == "ERROR" for r in screened["results"])
+        state["pending_review"] = state.get("pending_review", 0) + sum(r["Status"] == PENDING_STATUS for r in screened["results"])
+        state["tier2_tokens"] = state.get("tier2_tokens", 0) + sum(r["Tokens"] for r in screened["results"])
+        state["tier2_cost_usd"] = round(state.get("tier2_cost_usd", 0.0) + sum(r["Cost USD"] for r in screened["results"]), 6)
+        state["updated"] = time.time()
+        save_checkpoint(checkpoint_path, state)
+        log(f"📦 {state['rows_done']} rows screened ({state['flagged']} flagged, {state['pending_review']} pending review, "
+            f"{state['tier2_tokens']} tokens, ~${state['tier2_cost_usd']:.4f})")
+
+    state["done"] = True
+    state["dedup_ratio"] = round(dedup_ratio(state["rows_done"], state["unique"]), 3)
+    save_checkpoint(checkpoint_path, state)
+    log(f"🎉 Batch complete: {state['rows_done']} rows ({state['unique']} unique, dedup ratio "
+        f"{state['dedup_ratio']}x) -> {output_path}")
+    return state
+
+
+def main():
+    from tribunal import SanctionTribunal
+
+    parser = argparse.ArgumentParser(description="Headless batch screening (CSV or Parquet input, CSV output)")
+    parser.add_argument("input", help="Customer file with a 'name' column (.csv or .parquet)")
+    parser.add_argument("-o", "--output", default="screening_results.csv")
+    parser.add_argument("--threshold", type=float, default=60, help="Fuzzy sensitivity (50-100)")
+    parser.add_argument("--chunksize", type=int, default=10_000)
+    parser.add_argument("--checkpoint", help=f"Checkpoint file (default: <output>{CHECKPOINT_SUFFIX})")
+    parser.add_argument("--no-resume", action="store_true", help="Ignore any checkpoint and start over")
+    parser.add_argument("--judge-budget", type=int, default=4000, help="Token budget per multi-case judge call")
+    parser.add_argument("--max-tokens", type=int, help="Tier 2 token budget for the whole run")
+    parser.add_argument("--max-cost", type=float, help="Tier 2 budget in estimated USD for the whole run")
+    parser.add_argument("--max-seconds", type=float, help="Tier 2 wall-clock budget; later cases are pending review")
+    parser.add_argument("--metrics-file", help="Write Prometheus text metrics here after every chunk")
+    parser.add_argument("--metrics-jsonl", help="Append a JSON-lines metrics snapshot here when the run ends")
+    parser.add_argument("--trace", help="Append one JSON line per timed stage / LLM call here")
+    args = parser.parse_args()
+
+    if args.trace:
+        METRICS.trace_to(args.trace)
+    log = print
+    if args.metrics_file:
+        def log(message):
+            print(message)
+            METRICS.write_prometheus(args.metrics_file)
+
+    limits = {"max_tokens": args.max_tokens, "max_cost": args.max_cost, "max_seconds": args.max_seconds}
+    state = run_batch(SanctionTribunal(judge_token_budget=args.judge_budget), args.input, args.output, args.threshold,
+                      args.chunksize, args.checkpoint, resume=not args.no_resume, log=log,
+                      limits=limits if any(v is not None for v in limits.values()) else None)
+    if args.metrics_jsonl:
+        METRICS.export_jsonl(args.metrics_jsonl, input=state["input"])
+    METRICS.trace_to(None)
+    for row in METRICS.summary():
+        print(f"⏱️  {row['metric']} {row['labels']}: {row['count']}"
+              + (f" calls, {row['total_s']}s total, {row['mean_ms']}ms mean" if row['total_s'] is not None else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,686 @@
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import deque
+
+import numpy as np
+from rapidfuzz import fuzz, process
+
+from fake_llm import FakeGenerativeModel
+from synthetic_data import COUNTRIES, query_corpus, synthetic_name, write_synthetic_sdn, write_synthetic_store
+from tier2 import Tier2Executor
+
+
+def latency_stats(seconds):
+    """p50/p95/p99/mean/max of a list of durations, in milliseconds."""
+    if not seconds:
+        return {}
+    ms = np.asarray(seconds) * 1000
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {"p50_ms": round(p50, 3), "p95_ms": round(p95, 3), "p99_ms": round(p99, 3),
+            "mean_ms": round(ms.mean(), 3), "max_ms": round(ms.max(), 3)}
+
+
+def peak_rss_mb():
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def run_spawned(target, *args):
+    """Runs target(*args, queue) in a fresh process, so peak RSS and imports are its own."""
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    proc = ctx.Process(target=target, args=(*args, queue))
+    proc.start()
+    result = queue.get()
+    proc.join()
+    return result
+
+
+def recall_report(corpus, found, threshold):
+    """
+    found[i] is (entity id or None, score) for corpus row i. A positive counts as recalled when
+    the expected entity comes back at or above threshold; a negative at or above it is a false positive.
+    """
+    positives = [(row, hit) for row, hit in zip(corpus, found) if row["entity_id"] is not None]
+    negatives = [hit for row, hit in zip(corpus, found) if row["entity_id"] is None]
+    by_noise = {}
+    for row, (entity_id, score) in positives:
+        stats = by_noise.setdefault(row["noise"], [0, 0])
+        stats[0] += 1
+        stats[1] += entity_id == row["entity_id"] and score >= threshold
+    recalled = sum(hits for _, hits in by_noise.values())
+    return {
+        "threshold": threshold,
+        "recall": round(recalled / len(positives), 4) if positives else None,
+        "recall_by_noise": {noise: round(hits / n, 4) for noise, (n, hits) in sorted(by_noise.items())},
+        "false_positive_rate": round(sum(score >= threshold for _, score in negatives) / len(negatives), 4)
+        if negatives else None,
+    }
+
+
+def _scan_worker(store, corpus, threshold, queue):
+    from tribunal import SanctionTribunal
+
+    start = time.perf_counter()
+    tribunal = SanctionTribunal(db_file=store, cache_file=":memory:", triage_log=None, background_load=False)
+    load = time.perf_counter() - start
+
+    latencies, found = [], []
+    for row in corpus:
+        start = time.perf_counter()
+        match, score = tribunal.scan_database(row["query"])
+        latencies.append(time.perf_counter() - start)
+        found.append((match["id"] if match else None, score))
+    total = sum(latencies)
+    queue.put({
+        "entities": len(tribunal.entity_names),
+        "queries": len(corpus),
+        "load_seconds": round(load, 3),
+        "queries_per_sec": round(len(corpus) / total, 1),
+        **latency_stats(latencies),
+        **recall_report(corpus, found, threshold),
+        "peak_rss_mb": peak_rss_mb(),
+    })
+
+
+def _batch_worker(store, corpus, threshold, chunksize, llm, tmp, queue):
+    from fake_llm_server import start_server
+
+    # The real Groq / Gemini SDKs, pointed at the local fake server
+    server = start_server(**llm)
+    os.environ.update({"GROQ_BASE_URL": server.url, "GEMINI_API_ENDPOINT": server.url,
+                       "GROQ_API_KEY": "fake", "GOOGLE_API_KEY": "fake"})
+    from batch_runner import screen_names
+    from tribunal import SanctionTribunal
+
+    tribunal = SanctionTribunal(db_file=store, cache_file=os.path.join(tmp, "batch_cache.sqlite"), triage_log=None,
+                                background_load=False)
+    latencies, found = [], []
+    for i in range(0, len(corpus), chunksize):
+        chunk = corpus[i:i + chunksize]
+        start = time.perf_counter()
+        screened = screen_names(tribunal, [row["query"] for row in chunk], threshold)
+        latencies.append(time.perf_counter() - start)
+        hits = {index: case for index, case in zip(screened["flagged"], screened["cases"])}
+        found += [(hits[j][1]["id"], hits[j][2]) if j in hits else (None, 0) for j in range(len(chunk))]
+    total = sum(latencies)
+    server.shutdown()
+    queue.put({
+        "entities": len(tribunal.entity_names),
+        "rows": len(corpus),
+        "chunksize": chunksize,
+        "rows_per_sec": round(len(corpus) / total, 1),
+        "seconds": round(total, 3),
+        "chunk_latency": latency_stats(latencies),
+        "llm_calls": server.calls,
+        "llm_errors": server.errors,
+        **recall_report(corpus, found, threshold),
+        "peak_rss_mb": peak_rss_mb(),
+    })
+
+
+def bench_scan(store, corpus, threshold=85):
+    """Single-name Tier 1 (scan_database): per-query latency percentiles, queries/sec and recall."""
+    return run_spawned(_scan_worker, store, corpus, threshold)
+
+
+def bench_batch(store, corpus, threshold=85, chunksize=1000, latency=0.2, error_rate=0.02):
+    """Batch screening end to end (Tier 1, triage, Tier 2 over HTTP to the fake LLM server)."""
+    llm = {"latency": latency, "error_rate": error_rate, "seed": 0}
+    with tempfile.TemporaryDirectory() as tmp:
+        return run_spawned(_batch_worker, store, corpus, threshold, chunksize, llm, tmp)
+
+
+def synthetic_cases(reports, seed=0):
+    rng = random.Random(seed)
+    return [{
+        "target_name": synthetic_name(rng), "match_name": synthetic_name(rng), "match_score": rng.randint(60, 100),
+        "verdict": rng.choice(["HIGH RISK", "LOW RISK"]), "confidence": rng.randint(50, 99),
+        "reasoning": " ".join(synthetic_name(rng) for _ in range(20)),
+        "pros_arg": " ".join(synthetic_name(rng) for _ in range(60)),
+        "def_arg": " ".join(synthetic_name(rng) for _ in range(60)),
+    } for _ in range(reports)]
+
+
+def _pdf_worker(reports, queue):
+    from reports import create_pdf_report
+
+    latencies, size = [], 0
+    for case in synthetic_cases(reports):
+        start = time.perf_counter()
+        size += len(create_pdf_report(case))
+        latencies.append(time.perf_counter() - start)
+    queue.put({
+        "mode": "single",
+        "reports": reports,
+        "reports_per_sec": round(reports / sum(latencies), 1),
+        **latency_stats(latencies),
+        "mean_kb": round(size / reports / 1024, 1),
+        "peak_rss_mb": peak_rss_mb(),
+    })
+
+
+def _bulk_pdf_worker(reports, mode, workers, path, queue):
+    import reports as reports_module
+
+    cases = synthetic_cases(reports)
+    if mode == "zip":
+        stats = reports_module.write_case_zip(cases, path, workers=workers)
+    else:
+        stats = reports_module.write_case_book(cases, path)
+    queue.put({"mode": mode, "workers": workers if mode == "zip" else 1, **stats,
+               "file_mb": round(os.path.getsize(path) / 2**20, 2), "peak_rss_mb": peak_rss_mb()})
+
+
+def bench_pdf(reports=200, bulk_reports=2000, workers=(1, None)):
+    """
+    Case-file PDFs: per-report latency for single renders, then pages/sec for bulk jobs
+    (ZIP at each worker count, None = all cores, and one combined PDF).
+    """
+    report = [run_spawned(_pdf_worker, reports)]
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in workers:
+            report.append(run_spawned(_bulk_pdf_worker, bulk_reports, "zip", n, os.path.join(tmp, f"cases_{n}.zip")))
+        report.append(run_spawned(_bulk_pdf_worker, bulk_reports, "combined", None, os.path.join(tmp, "cases.pdf")))
+    return report
+
+
+def _ingest_worker(path, mode, queue):
+    import xml.etree.ElementTree as ET
+    import evidence_manager
+
+    start = time.perf_counter()
+    if mode == "stream":
+        count = sum(1 for _ in evidence_manager.iter_sdn_entries(path))
+    else:
+        # Previous approach: whole tree in memory, then walk every sdnEntry
+        root = ET.parse(path).getroot()
+        ns = root.tag[:root.tag.index("}") + 1]
+        count = sum(1 for entry in root.iter(ns + "sdnEntry") if evidence_manager.build_entity(entry, ns))
+    elapsed = time.perf_counter() - start
+    queue.put({
+        "mode": mode,
+        "entities": count,
+        "seconds": round(elapsed, 3),
+        "entities_per_sec": round(count / elapsed),
+        "peak_rss_mb": peak_rss_mb(),
+    })
+
+
+def bench_ingest(entities=200_000, modes=("stream", "tree")):
+    """Peak RSS and entities/sec for SDN ingest, each mode in a fresh process."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "sdn.xml")
+        write_synthetic_sdn(path, entities)
+        report = [{"file_mb": round(os.path.getsize(path) / 2**20, 1)}]
+        for mode in modes:
+            report.append(run_spawned(_ingest_worker, path, mode))
+    return report
+
+
+def bench_rescreen(book_sizes=(10_000, 50_000), delta_sizes=(10, 100), threshold=85, seed=0):
+    """Reverse Tier 1 cost of a delta re-screen for different book and delta sizes."""
+    from customer_book import CustomerBook
+
+    report = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for book_size in book_sizes:
+            rng = random.Random(seed)
+            book = CustomerBook(os.path.join(tmp, f"book_{book_size}.sqlite"))
+            customers = [synthetic_name(rng) for _ in range(book_size)]
+            start = time.perf_counter()
+            book.add_customers(customers)
+            build = time.perf_counter() - start
+
+            for delta in delta_sizes:
+                # Half brand-new designations, half near-copies of existing customers
+                entities = [{"id": f"D{i}", "name": synthetic_name(rng) if i % 2 else rng.choice(customers)}
+                            for i in range(delta)]
+                book.scored = 0
+                start = time.perf_counter()
+                hits = book.match_entities(entities, threshold)
+                elapsed = time.perf_counter() - start
+
+                # Ground truth: the full cross product the delta job avoids
+                truth = process.cdist([e["name"] for e in entities], customers, scorer=fuzz.token_set_ratio,
+                                      score_cutoff=threshold, workers=-1)
+                expected = int((truth >= threshold).sum())
+                report.append({
+                    "book_size": book_size,
+                    "book_build_seconds": round(build, 2),
+                    "delta_entities": delta,
+                    "hits": len(hits),
+                    "recall_vs_full_scan": round(len(hits) / expected, 3) if expected else 1.0,
+                    "pairs_scored": book.scored,
+                    "full_cross_product": book_size * delta,
+                    "seconds": round(elapsed, 3),
+                    "ms_per_entity": round(elapsed / delta * 1000, 2),
+                })
+    return report
+
+
+def bench_tier2(rows=200, latency=0.2, error_rate=0.05, workers=(1, 4, 16), rpm=6000, burst=50):
+    """Flagged-row throughput of the Tier 2 executor against the offline fake judge."""
+    report = []
+    for n in workers:
+        model = FakeGenerativeModel(latency=latency, error_rate=error_rate, seed=n)
+        executor = Tier2Executor(max_workers=n, rate_limits={"gemini": (rpm, burst)}, backoff=latency)
+        prompts = [f"Input: customer {i}. Match: entity {i} ({60 + i % 41}%)." for i in range(rows)]
+
+        start = time.perf_counter()
+        results = executor.map("gemini", lambda p: model.generate_content(p).text, prompts)
+        elapsed = time.perf_counter() - start
+
+        report.append({
+            "workers": n,
+            "rows": rows,
+            "seconds": round(elapsed, 3),
+            "rows_per_sec": round(rows / elapsed, 1),
+            "calls": model.calls,
+            "retries": executor.retries,
+            "failed": sum(isinstance(r, Exception) for r in results),
+        })
+    return report
+
+
+def _startup_worker(store, background, queue):
+    start = time.perf_counter()
+    from tribunal import SanctionTribunal
+    imported = time.perf_counter()
+    tribunal = SanctionTribunal(db_file=store, cache_file=store + ".cache.sqlite", triage_log=None,
+                                background_load=background)
+    constructed = time.perf_counter()
+    tribunal.scan_database("probe trading llc")
+    tier1_ready = time.perf_counter()
+    queue.put({
+        "background_load": background,
+        "import_seconds": round(imported - start, 3),
+        "constructor_seconds": round(constructed - imported, 3),
+        "first_tier1_seconds": round(tier1_ready - start, 3),
+        "sdk_imported": sorted(m for m in ("groq", "google.generativeai", "streamlit") if m in sys.modules),
+        "peak_rss_mb": peak_rss_mb(),
+    })
+
+
+def bench_startup(entities=100_000, seed=0):
+    """Cold start of SanctionTribunal in a fresh process: import, constructor return and first Tier 1 answer."""
+    from sanctions_store import write_store
+
+    rng = random.Random(seed)
+    report = []
+    with tempfile.TemporaryDirectory() as tmp:
+        store = os.path.join(tmp, "sanctions.sgdb")
+        write_store(store, {"last_updated": "bench", "entities": [
+            {"id": str(i), "name": synthetic_name(rng), "type": "Entity", "aliases": [], "addresses": []}
+            for i in range(entities)
+        ]})
+        for background in (True, False):
+            report.append({"entities": entities, **run_spawned(_startup_worker, store, background)})
+    return report
+
+
+def offline_tribunal(model, workers=8, token_budget=4000, rpm=6000, burst=50):
+    """A SanctionTribunal wired to a fake judge and a throwaway verdict cache, without API keys or a DB."""
+    from tribunal import SanctionTribunal
+    from verdict_cache import VerdictCache
+
+    tribunal = object.__new__(SanctionTribunal)
+    tribunal.judge_model = model
+    tribunal.judge_model_id = "fake-judge"
+    tribunal.agent_latency = deque(maxlen=1000)
+    tribunal.meter = threading.local()
+    tribunal.tier2 = Tier2Executor(max_workers=workers, rate_limits={"gemini": (rpm, burst)}, backoff=model.latency)
+    tribunal.verdict_cache = VerdictCache(":memory:")
+    tribunal.judge_token_budget = token_budget
+    tribunal.judge_max_cases = 40
+    tribunal.rejudged = 0
+    return tribunal
+
+
+def bench_judge(flags=400, latency=0.5, error_rate=0.02, drop_rate=0.02, budgets=(1000, 4000), workers=8, seed=0):
+    """Calls per flagged row and wall time: one judge call per row vs multi-case calls under a token budget."""
+    rng = random.Random(seed)
+    cases = [(synthetic_name(rng), {"id": str(i), "name": synthetic_name(rng), "addresses": [f"City, {rng.choice(COUNTRIES)}"]},
+              rng.randint(60, 100)) for i in range(flags)]
+
+    report = []
+    for budget in (None, *budgets):
+        model = FakeGenerativeModel(latency=latency, error_rate=error_rate, seed=seed, drop_rate=drop_rate)
+        tribunal = offline_tribunal(model, workers, budget or 0)
+        start = time.perf_counter()
+        verdicts = tribunal.judge_batch(cases, batched=budget is not None)
+        elapsed = time.perf_counter() - start
+        report.append({
+            "mode": f"batched ({budget} tokens)" if budget else "one per row",
+            "flags": flags,
+            "calls": model.calls,
+            "calls_per_flag": round(model.calls / flags, 3),
+            "rejudged": tribunal.rejudged,
+            "retries": tribunal.tier2.retries,
+            "failed": sum(not isinstance(v, dict) for v in verdicts),
+            "seconds": round(elapsed, 3),
+        })
+    return report
+
+
+def bench_budget(flags=400, latency=0.05, fractions=(0.5, 0.25, 0.1), workers=8, seed=0):
+    """
+    Tier 2 under a per-run token budget. An uncapped run measures the full spend, then each
+    fraction of it is enforced on a fresh cache. Reports verdicts reached, pending review, spend
+    and the mean match score of judged vs pending cases (the weakest matches should be left over).
+    """
+    from budget import PENDING_REVIEW, Tier2Budget
+    from triage import Triage
+
+    rng = random.Random(seed)
+    cases, countries = [], []
+    for i in range(flags):
+        listed = rng.choice(COUNTRIES)
+        cases.append((synthetic_name(rng), {"id": str(i), "name": synthetic_name(rng), "type": "Entity",
+                                            "programs": rng.sample(["SDGT", "IRAN", "RUSSIA-EO14024", "DPRK"], rng.randint(0, 3)),
+                                            "addresses": [f"City, {listed}"]}, rng.randint(80, 99)))
+        countries.append(rng.choice([listed, rng.choice(COUNTRIES), ""]))
+
+    report, full_tokens = [], None
+    for fraction in (None, *fractions):
+        tribunal = offline_tribunal(FakeGenerativeModel(latency=latency, seed=seed), workers)
+        tribunal.triage = Triage(log_path=None)
+        budget = Tier2Budget(max_tokens=int(full_tokens * fraction)) if fraction else Tier2Budget()
+        start = time.perf_counter()
+        verdicts = tribunal.settle_batch(cases, countries, budget=budget)
+        elapsed = time.perf_counter() - start
+        full_tokens = full_tokens or budget.tokens
+
+        pending = [case[2] for case, v in zip(cases, verdicts) if isinstance(v, dict) and v['verdict'] == PENDING_REVIEW]
+        judged = [case[2] for case, v in zip(cases, verdicts) if isinstance(v, dict) and v.get('tokens')]
+        report.append({
+            "budget": f"{fraction:.0%} ({budget.max_tokens} tokens)" if fraction else "uncapped",
+            "flags": flags,
+            "judged": len(judged),
+            "pending_review": len(pending),
+            "failed": sum(not isinstance(v, dict) for v in verdicts),
+            "tokens": budget.tokens,
+            "cost_usd": round(budget.cost, 6),
+            "verdict_tokens_sum": sum(v.get('tokens', 0) for v in verdicts if isinstance(v, dict)),
+            "judged_mean_score": round(float(np.mean(judged)), 1) if judged else None,
+            "pending_mean_score": round(float(np.mean(pending)), 1) if pending else None,
+            "seconds": round(elapsed, 3),
+        })
+    return report
+
+
+def _service_worker(store, llm_url, tier2_workers, tmp, ready_queue):
+    import asyncio
+
+    os.environ.update({"GROQ_BASE_URL": llm_url, "GEMINI_API_ENDPOINT": llm_url,
+                       "GROQ_API_KEY": "fake", "GOOGLE_API_KEY": "fake"})
+    from screening_service import ScreeningService
+    from tribunal import SanctionTribunal
+
+    tribunal = SanctionTribunal(db_file=store, cache_file=os.path.join(tmp, "service_cache.sqlite"), triage_log=None,
+                                background_load=False)
+    service = ScreeningService(tribunal, tier2_workers=tier2_workers)
+    asyncio.run(service.serve(port=0, ready=lambda s: ready_queue.put(s.sockets[0].getsockname()[1])))
+
+
+def run_users(search, corpus, users, searches_per_user, seed=0):
+    """`users` threads each run `searches_per_user` searches; half of them hit a small set of popular names."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    hot = corpus[:max(1, len(corpus) // 50)]
+
+    def user(n):
+        rng = random.Random(seed + n)
+        latencies = []
+        for _ in range(searches_per_user):
+            row = rng.choice(hot) if rng.random() < 0.5 else rng.choice(corpus)
+            start = time.perf_counter()
+            search(row["query"])
+            latencies.append(time.perf_counter() - start)
+        return latencies
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=users) as pool:
+        latencies = [x for user_latencies in pool.map(user, range(users)) for x in user_latencies]
+    elapsed = time.perf_counter() - start
+    return {"users": users, "searches": len(latencies), "searches_per_sec": round(len(latencies) / elapsed, 1),
+            **latency_stats(latencies)}
+
+
+def single_search(tribunal, threshold):
+    """What the single-search tab does: Tier 1, then the tribunal when the match clears the threshold."""
+    def search(name):
+        match, score = tribunal.scan_database(name)
+        if match and score >= threshold:
+            tribunal.convene(name, match, score, "Unknown")
+    return search
+
+
+def _direct_load_worker(store, llm, corpus, users, searches, threshold, tmp, queue):
+    from fake_llm_server import start_server
+
+    server = start_server(**llm)
+    os.environ.update({"GROQ_BASE_URL": server.url, "GEMINI_API_ENDPOINT": server.url,
+                       "GROQ_API_KEY": "fake", "GOOGLE_API_KEY": "fake"})
+    from tribunal import SanctionTribunal
+
+    report = []
+    for n in users:
+        # A fresh verdict cache per run, so every run pays for its own Tier 2 calls
+        tribunal = SanctionTribunal(db_file=store, cache_file=os.path.join(tmp, f"direct_{n}.sqlite"), triage_log=None,
+                                    background_load=False)
+        calls = server.calls
+        report.append({"mode": "direct", **run_users(single_search(tribunal, threshold), corpus, n, searches),
+                       "llm_calls": server.calls - calls})
+    queue.put(report)
+
+
+def bench_service(entities=20_000, users=(1, 8, 32), searches=20, threshold=85, llm_latency=0.3, seed=0):
+    """
+    Load test: N concurrent analysts running single searches, against one in-process tribunal
+    shared by threads ("direct", what one Streamlit worker does today) and through the screening
+    service (micro-batched Tier 1, coalesced Tier 2). Latency is per whole search.
+    """
+    from fake_llm_server import start_server
+    from screening_service import ScreeningClient
+
+    llm = {"latency": llm_latency, "seed": seed}
+    ctx = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as tmp:
+        store = os.path.join(tmp, "sanctions.sgdb")
+        entities_list = write_synthetic_store(store, entities, seed)
+        corpus = query_corpus(entities_list, 2000, seed=seed)
+        report = run_spawned(_direct_load_worker, store, llm, corpus, list(users), searches, threshold, tmp)
+
+        server = start_server(**llm)
+        for n in users:
+            # A fresh service (and verdict cache) per run, with as many Tier 2 threads as the direct run had users
+            ready = ctx.Queue()
+            proc = ctx.Process(target=_service_worker, args=(store, server.url, max(n, 8), tempfile.mkdtemp(dir=tmp), ready))
+            proc.start()
+            client = ScreeningClient(f"127.0.0.1:{ready.get()}")
+            calls = server.calls
+            row = {"mode": "service", **run_users(single_search(client, threshold), corpus, n, searches),
+                   "llm_calls": server.calls - calls}
+            stats = client.status()["service"]
+            row.update({"tier1_batches": stats["batches"], "max_batch": stats["max_batch"], "coalesced": stats["coalesced"]})
+            report.append(row)
+            client.close()
+            proc.terminate()
+            proc.join()
+        server.shutdown()
+    return report
+
+
+def bench_sources(counts=None, overlap=0.2, workers=(1, None), seed=0):
+    """
+    Multi-list ingest from synthetic local files: per-list parse time, end-to-end build time
+    serially and across processes (vs the slowest single list), and cross-list dedup accuracy.
+    """
+    from evidence_manager import build_database
+    from synthetic_data import write_synthetic_sources
+
+    counts = counts or {"OFAC_SDN": 20_000, "OFAC_CONSOLIDATED": 1_000, "UN": 1_000, "EU": 5_000, "UK": 5_000}
+    report = []
+    with tempfile.TemporaryDirectory() as tmp:
+        expected = write_synthetic_sources(tmp, counts, overlap, seed)
+        for n in workers:
+            start = time.perf_counter()
+            db, stats = build_database(tuple(counts), fixtures=tmp, workers=n)
+            elapsed = time.perf_counter() - start
+            slowest = max(stats["sources"].values(), key=lambda s: s["seconds"])
+            report.append({
+                "workers": n or len(counts),
+                "seconds": round(elapsed, 3),
+                "slowest_source_seconds": slowest["seconds"],
+                "sources": {name: s["seconds"] for name, s in stats["sources"].items()},
+                "listings": stats["merge"]["listings"],
+                "entities": len(db["entities"]),
+                "expected_entities": expected,
+                "multi_list": stats["merge"]["multi_list"],
+            })
+    return report
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def bench_suite(sizes=(10_000, 100_000), queries=2000, batch_rows=5000, threshold=85, llm_latency=0.2,
+                llm_error_rate=0.02, pdf_reports=200, ingest_entities=100_000, seed=0, out=None):
+    """
+    Regression suite: for every DB size, scan_database and batch screening against the same
+    synthetic store and noisy corpus, then ingest and PDF once. Returns (and optionally writes) one JSON report.
+    """
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "git_commit": git_commit(),
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+            "params": {"sizes": list(sizes), "queries": queries, "batch_rows": batch_rows, "threshold": threshold,
+                       "llm_latency": llm_latency, "llm_error_rate": llm_error_rate, "seed": seed},
+        },
+        "scan": [],
+        "batch": [],
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            store = os.path.join(tmp, f"sanctions_{size}.sgdb")
+            entities = write_synthetic_store(store, size, seed)
+            report["scan"].append(bench_scan(store, query_corpus(entities, queries, seed=seed), threshold))
+            print(f"🔎 scan {size}: {report['scan'][-1]['p95_ms']}ms p95", file=sys.stderr)
+            corpus = query_corpus(entities, batch_rows, seed=seed + 1)
+            report["batch"].append(bench_batch(store, corpus, threshold, latency=llm_latency, error_rate=llm_error_rate))
+            print(f"📦 batch {size}: {report['batch'][-1]['rows_per_sec']} rows/sec", file=sys.stderr)
+            del entities
+    report["ingest"] = bench_ingest(ingest_entities, modes=("stream",))
+    report["pdf"] = bench_pdf(pdf_reports, bulk_reports=pdf_reports * 10)
+    if out:
+        with open(out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SanctionGuard performance benchmarks")
+    sub = parser.add_subparsers(dest="bench", required=True)
+
+    p = sub.add_parser("suite", help="scan_database, batch, ingest and PDF benchmarks on synthetic data, as one JSON report")
+    p.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000], help="Synthetic DB sizes (entities)")
+    p.add_argument("--queries", type=int, default=2000, help="Noisy single-name queries per size")
+    p.add_argument("--batch-rows", type=int, default=5000)
+    p.add_argument("--threshold", type=float, default=85)
+    p.add_argument("--llm-latency", type=float, default=0.2, help="Fake LLM server seconds per reply")
+    p.add_argument("--llm-error-rate", type=float, default=0.02)
+    p.add_argument("--pdf-reports", type=int, default=200)
+    p.add_argument("--ingest-entities", type=int, default=100_000)
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--out", help="Also write the JSON report here")
+
+    p = sub.add_parser("pdf", help="Case-file PDF rendering: single latency and bulk ZIP / combined pages/sec")
+    p.add_argument("--reports", type=int, default=200)
+    p.add_argument("--bulk-reports", type=int, default=2000)
+    p.add_argument("--workers", type=int, nargs="+", default=[1, os.cpu_count() or 1])
+
+    p = sub.add_parser("service", help="Load test: N concurrent single-search users, direct vs screening service")
+    p.add_argument("--entities", type=int, default=20_000)
+    p.add_argument("--users", type=int, nargs="+", default=[1, 8, 32])
+    p.add_argument("--searches", type=int, default=20, help="Searches per user")
+    p.add_argument("--threshold", type=float, default=85)
+    p.add_argument("--llm-latency", type=float, default=0.3)
+
+    p = sub.add_parser("tier2", help="Concurrent Tier 2 judging against a fake LLM")
+    p.add_argument("--rows", type=int, default=200)
+    p.add_argument("--latency", type=float, default=0.2)
+    p.add_argument("--error-rate", type=float, default=0.05)
+    p.add_argument("--workers", type=int, nargs="+", default=[1, 4, 16])
+    p.add_argument("--rpm", type=float, default=6000)
+
+    p = sub.add_parser("judge", help="Multi-case judge batching vs one call per flagged row (fake judge)")
+    p.add_argument("--flags", type=int, default=400)
+    p.add_argument("--latency", type=float, default=0.5)
+    p.add_argument("--error-rate", type=float, default=0.02)
+    p.add_argument("--drop-rate", type=float, default=0.02, help="Share of cases the fake judge leaves out of a batched reply")
+    p.add_argument("--budgets", type=int, nargs="+", default=[1000, 4000], help="Token budgets per batched call")
+
+    p = sub.add_parser("budget", help="Tier 2 priority scheduling under a per-run token budget (fake judge)")
+    p.add_argument("--flags", type=int, default=400)
+    p.add_argument("--latency", type=float, default=0.05)
+    p.add_argument("--fractions", type=float, nargs="+", default=[0.5, 0.25, 0.1], help="Budgets as shares of the uncapped spend")
+
+    p = sub.add_parser("startup", help="Cold start: import, constructor and time to first Tier 1 answer")
+    p.add_argument("--entities", type=int, default=100_000)
+
+    p = sub.add_parser("ingest", help="Streaming SDN ingest: peak RSS and entities/sec")
+    p.add_argument("--entities", type=int, default=200_000)
+    p.add_argument("--modes", nargs="+", default=["stream", "tree"], choices=["stream", "tree"])
+
+    p = sub.add_parser("sources", help="Multi-list ingest: serial vs parallel build time and cross-list dedup")
+    p.add_argument("--overlap", type=float, default=0.2, help="Share of each non-SDN list that re-lists SDN designees")
+    p.add_argument("--workers", type=int, nargs="+", default=[1, 0], help="Ingest processes (0 = one per list)")
+
+    p = sub.add_parser("rescreen", help="Delta re-screen of the customer book: cost vs book and delta size")
+    p.add_argument("--book-sizes", type=int, nargs="+", default=[10_000, 50_000])
+    p.add_argument("--delta-sizes", type=int, nargs="+", default=[10, 100])
+
+    args = parser.parse_args()
+    if args.bench == "suite":
+        report = bench_suite(args.sizes, args.queries, args.batch_rows, args.threshold, args.llm_latency,
+                             args.llm_error_rate, args.pdf_reports, args.ingest_entities, args.seed, args.out)
+    elif args.bench == "pdf":
+        report = bench_pdf(args.reports, args.bulk_reports, args.workers)
+    elif args.bench == "service":
+        report = bench_service(args.entities, args.users, args.searches, args.threshold, args.llm_latency)
+    elif args.bench == "tier2":
+        report = bench_tier2(args.rows, args.latency, args.error_rate, args.workers, args.rpm)
+    elif args.bench == "judge":
+        report = bench_judge(args.flags, args.latency, args.error_rate, args.drop_rate, args.budgets)
+    elif args.bench == "budget":
+        report = bench_budget(args.flags, args.latency, args.fractions)
+    elif args.bench == "startup":
+        report = bench_startup(args.entities)
+    elif args.bench == "ingest":
+        report = bench_ingest(args.entities, args.modes)
+    elif args.bench == "sources":
+        report = bench_sources(overlap=args.overlap, workers=[n or None for n in args.workers])
+    elif args.bench == "rescreen":
+        report = bench_rescreen(args.book_sizes, args.delta_sizes)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
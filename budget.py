@@ -0,0 +1,165 @@
+"""
+Tier 2 budget scheduling for batch runs. Ambiguous cases are queued by priority (match
+score, entity risk, country agreement) and sent to the judge until the run's token, cost
+or time budget is reached; whatever is left is marked PENDING REVIEW instead of being
+dropped. Every LLM call's usage is priced so each verdict can carry what it cost.
+"""
+import threading
+import time
+
+from triage import listed_countries, risk_country, shared_countries
+
+PENDING_REVIEW = "PENDING REVIEW"
+
+# 💲 MODEL PRICES: USD per million (prompt, completion) tokens. List prices at the time of
+# writing, for estimates only; check the provider's pricing page before relying on them
+MODEL_PRICES = {
+    "gemini-2.5-flash": (0.30, 2.50),
+    "gemini-1.5-flash": (0.075, 0.30),
+    "llama-3.3-70b-versatile": (0.59, 0.79),
+    "openai/gpt-oss-20b": (0.10, 0.50),
+    "mixtral-8x7b-32768": (0.24, 0.24),
+}
+# Unknown models are priced like the judge, so a budget is never under-counted to zero
+DEFAULT_PRICE = MODEL_PRICES["gemini-2.5-flash"]
+
+# Priority points on top of the match score (0-100)
+PRIORITY_WEIGHTS = {
+    "program": 2,               # per sanctions program, up to 3
+    "high_risk_country": 10,    # listing has an address in HIGH_RISK_COUNTRIES
+    "country_agrees": 8,        # input country appears in the listing's addresses
+    "country_differs": -8,      # input country known and absent from them
+}
+
+
+def call_cost(model, prompt_tokens, completion_tokens):
+    """Estimated USD for one call."""
+    prompt_price, completion_price = MODEL_PRICES.get(model, DEFAULT_PRICE)
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000
+
+
+def usage_totals(usage):
+    """(tokens, estimated USD) over (model, prompt_tokens, completion_tokens) calls."""
+    return sum(p + c for _, p, c in usage), sum(call_cost(*call) for call in usage)
+
+
+def priority(name, match, score, country=None):
+    """Queue priority of a Tier 2 case, higher first. The score dominates; risk and country agreement reorder close calls."""
+    weights = PRIORITY_WEIGHTS
+    country = None if country in (None, "", "Unknown") else country
+    countries = listed_countries(match)
+    points = float(score) + weights["program"] * min(len(match.get('programs', [])), 3)
+    if any(risk_country(c) for c in countries):
+        points += weights["high_risk_country"]
+    if country and countries:
+        points += weights["country_agrees"] if shared_countries(country, countries) else weights["country_differs"]
+    return points
+
+
+def pending_verdict(priority_points, reason):
+    """Verdict slot for a case the budget did not reach."""
+    return {
+        "verdict": PENDING_REVIEW,
+        "confidence": 0,
+        "reasoning": f"Not sent to the judge: {reason}. Queue priority {priority_points:.0f}; needs manual review.",
+        "priority": round(priority_points, 1),
+        "tokens": 0,
+        "cost_usd": 0.0,
+    }
+
+
+class Tier2Budget:
+    """
+    Per-run caps on Tier 2 tokens, estimated USD and wall-clock seconds (None = no cap).
+    admit() reserves a call's estimated usage against what is spent and reserved by calls in
+    flight; settle() swaps the reservation for the provider-reported usage. Reply allowances are
+    scaled by the largest reported/estimated completion ratio seen so far, so caps hold unless
+    a reply runs longer than any before it. A call that only fails to fit because of
+    reservations waits for them; the first real refusal closes the budget, so lower-priority
+    work never overtakes a case that did not fit.
+    Spending can be seeded from a checkpoint to carry one budget across a resumed run.
+    """
+
+    def __init__(self, max_tokens=None, max_cost=None, max_seconds=None, spent_tokens=0, spent_cost=0.0):
+        self.max_tokens = max_tokens
+        self.max_cost = max_cost
+        self.max_seconds = max_seconds
+        self.tokens = spent_tokens
+        self.cost = spent_cost
+        self.calls = 0
+        self.reserved = {}
+        # Largest reported/estimated completion-token ratio of a settled call, for calibrating the next estimates
+        self.ratio = None
+        self.started = None
+        self.exhausted = None
+        self.lock = threading.Lock()
+
+    def limits(self):
+        return {"max_tokens": self.max_tokens, "max_cost": self.max_cost, "max_seconds": self.max_seconds}
+
+    def elapsed(self):
+        return time.monotonic() - self.started if self.started is not None else 0.0
+
+    def scale(self):
+        return self.ratio or 1.0
+
+    def headroom(self, model):
+        """Estimated tokens left under the token and cost caps, priced as `model` (None when uncapped)."""
+        with self.lock:
+            left = []
+            if self.max_tokens is not None:
+                left.append(self.max_tokens - self.tokens - sum(r[0] for r in self.reserved.values()))
+            if self.max_cost is not None:
+                # Priced at the mean of the prompt and completion rates
+                per_token = call_cost(model, 1, 1) / 2
+                left.append((self.max_cost - self.cost - sum(r[1] for r in self.reserved.values())) / per_token)
+            return max(0, int(min(left))) if left else None
+
+    def admit(self, key, model, prompt_tokens, completion_tokens):
+        """
+        True (and reserved under `key`) when the estimated call fits every cap, None when it
+        would fit once the calls in flight settle, False once the budget is closed.
+        """
+        with self.lock:
+            if self.started is None:
+                self.started = time.monotonic()
+            allowance = round(completion_tokens * self.scale())
+            tokens = prompt_tokens + allowance
+            cost = call_cost(model, prompt_tokens, allowance)
+            reserved_tokens = sum(r[0] for r in self.reserved.values())
+            reserved_cost = sum(r[1] for r in self.reserved.values())
+            if self.exhausted is None:
+                if self.max_seconds is not None and self.elapsed() >= self.max_seconds:
+                    self.exhausted = "time"
+                elif self.max_tokens is not None and self.tokens + tokens > self.max_tokens:
+                    self.exhausted = "token"
+                elif self.max_cost is not None and self.cost + cost > self.max_cost:
+                    self.exhausted = "cost"
+            if self.exhausted:
+                return False
+            if (self.max_tokens is not None and self.tokens + reserved_tokens + tokens > self.max_tokens) or \
+                    (self.max_cost is not None and self.cost + reserved_cost + cost > self.max_cost):
+                return None
+            self.reserved[key] = (tokens, cost, completion_tokens)
+            return True
+
+    def settle(self, key, usage):
+        """Releases the reservation under `key` and books (model, prompt_tokens, completion_tokens) calls."""
+        with self.lock:
+            reservation = self.reserved.pop(key, None)
+            if reservation and usage:
+                ratio = sum(c for _, _, c in usage) / max(reservation[2], 1)
+                self.ratio = max(self.ratio or 0, ratio)
+            for model, prompt_tokens, completion_tokens in usage:
+                self.tokens += prompt_tokens + completion_tokens
+                self.cost += call_cost(model, prompt_tokens, completion_tokens)
+                self.calls += 1
+
+    def reason(self):
+        return f"Tier 2 {self.exhausted} budget reached" if self.exhausted else "Tier 2 budget reached"
+
+    def summary(self):
+        return {
+            "tokens": self.tokens, "cost_usd": round(self.cost, 6), "calls": self.calls,
+            "seconds": round(self.elapsed(), 3), "exhausted": self.exhausted, **self.limits(),
+        }
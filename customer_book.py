@@ -0,0 +1,284 @@
+import argparse
+import json
+import sqlite3
+import time
+from collections import Counter
+from itertools import combinations
+
+from rapidfuzz import fuzz, process
+
+from name_index import char_ngrams, normalize_name, soundex
+
+BOOK_FILE = "customer_book.sqlite"
+
+
+def deletion_keys(token):
+    """Single-deletion neighbourhood of a token; two tokens one edit apart share at least one key."""
+    return {"d:" + token[:i] + token[i + 1:] for i in range(len(token))} | {"d:" + token}
+
+
+def name_keys(norm, ngram=3):
+    """Blocking keys for one normalized name: tokens, Soundex, one-edit neighbours, trigrams and the whole token set."""
+    tokens = set(norm.split())
+    keys = {"t:" + t for t in tokens} | {"p:" + soundex(t) for t in tokens}
+    keys |= {k for t in tokens for k in deletion_keys(t)}
+    keys |= {"g:" + g for g in char_ngrams(norm, ngram)}
+    if tokens:
+        keys.add("s:" + " ".join(sorted(tokens)))
+    return keys
+
+
+class CustomerBook:
+    """
+    Persistent store of screened customers with an on-disk reverse index (blocking key ->
+    customer postings plus per-key document frequency). When the list changes, only the
+    added/changed entities are matched against the book, so re-screening cost follows
+    the size of the delta rather than the size of the book.
+    """
+
+    def __init__(self, path=BOOK_FILE, max_candidates=256, max_posting_ratio=0.05, max_postings=1000):
+        self.max_candidates = max_candidates
+        self.max_posting_ratio = max_posting_ratio
+        # Absolute cap too, so per-entity work stops growing with the book
+        self.max_postings = max_postings
+        self.scored = 0
+        self.conn = sqlite3.connect(path)
+        with self.conn:
+            self.conn.executescript("""
+                CREATE TABLE IF NOT EXISTS customers (
+                    id INTEGER PRIMARY KEY, name TEXT, country TEXT, gram_count INTEGER,
+                    UNIQUE (name, country));
+                CREATE TABLE IF NOT EXISTS customer_keys (key TEXT, customer_id INTEGER);
+                CREATE INDEX IF NOT EXISTS customer_keys_key ON customer_keys (key);
+                CREATE TABLE IF NOT EXISTS key_stats (key TEXT PRIMARY KEY, df INTEGER);
+                CREATE TABLE IF NOT EXISTS hits (
+                    customer_id INTEGER, entity_id TEXT, score REAL, list_version INTEGER, verdict TEXT,
+                    PRIMARY KEY (customer_id, entity_id));
+                CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+            """)
+
+    # --- BOOK MAINTENANCE ---
+
+    def add_customers(self, names, countries=None):
+        """Adds customers (idempotent per name + country) and returns their ids in input order."""
+        countries = countries or [""] * len(names)
+        ids = []
+        with self.conn:
+            for name, country in zip(names, countries):
+                country = country or ""
+                row = self.conn.execute(
+                    "SELECT id FROM customers WHERE name = ? AND country = ?", (name, country)
+                ).fetchone()
+                if row:
+                    ids.append(row[0])
+                    continue
+                norm = normalize_name(name)
+                customer_id = self.conn.execute(
+                    "INSERT INTO customers (name, country, gram_count) VALUES (?, ?, ?)",
+                    (name, country, len(char_ngrams(norm))),
+                ).lastrowid
+                keys = name_keys(norm)
+                self.conn.executemany("INSERT INTO customer_keys VALUES (?, ?)", [(k, customer_id) for k in keys])
+                self.conn.executemany(
+                    "INSERT INTO key_stats VALUES (?, 1) ON CONFLICT (key) DO UPDATE SET df = df + 1",
+                    [(k,) for k in keys],
+                )
+                ids.append(customer_id)
+        return ids
+
+    def size(self):
+        return self.conn.execute("SELECT COUNT(*) FROM customers").fetchone()[0]
+
+    def get_meta(self, key, default=None):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def set_meta(self, key, value):
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, json.dumps(value)))
+
+    def known_pairs(self, entity_ids):
+        marks = ",".join("?" * len(entity_ids))
+        return set(self.conn.execute(
+            f"SELECT customer_id, entity_id FROM hits WHERE entity_id IN ({marks})", list(entity_ids)
+        ).fetchall()) if entity_ids else set()
+
+    def record_hits(self, hits, list_version):
+        """hits: iterable of (customer_id, entity_id, score, verdict dict or None)."""
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO hits VALUES (?, ?, ?, ?, ?)",
+                [(c, e, float(s), list_version, json.dumps(v) if v is not None else None) for c, e, s, v in hits],
+            )
+
+    def remove_entities(self, entity_ids):
+        with self.conn:
+            self.conn.executemany("DELETE FROM hits WHERE entity_id = ?", [(e,) for e in entity_ids])
+
+    # --- REVERSE MATCHING ---
+
+    def candidates(self, entity_name, book_size=None):
+        """Customer ids worth scoring for one list name, or None when only a full book scan is safe."""
+        norm = normalize_name(entity_name)
+        if not norm:
+            return None
+        tokens = sorted(set(norm.split()))
+        grams = {"g:" + g for g in char_ngrams(norm)}
+        exact = {"t:" + t for t in tokens} | {"p:" + soundex(t) for t in tokens}
+        exact |= {k for t in tokens for k in deletion_keys(t)}
+        # Customers whose whole token set sits inside this name score 100 on token_set_ratio
+        if len(tokens) <= 8:
+            exact |= {"s:" + " ".join(c) for size in range(1, len(tokens) + 1) for c in combinations(tokens, size)}
+
+        keys = list(grams | exact)
+        marks = ",".join("?" * len(keys))
+        df = dict(self.conn.execute(f"SELECT key, df FROM key_stats WHERE key IN ({marks})", keys).fetchall())
+        book_size = self.size() if book_size is None else book_size
+        max_postings = max(64, min(self.max_postings, int(book_size * self.max_posting_ratio)))
+
+        if not any(k in df for k in grams):
+            # No customer shares a single trigram with this name
+            return set()
+        # Work per entity is bounded by the posting cap, not by the book size. Only a name
+        # made entirely of very common keys falls back to scanning the whole book.
+        selective = [k for k in keys if k in df and (df[k] <= max_postings or k.startswith("s:"))]
+        if not selective:
+            return None
+        marks = ",".join("?" * len(selective))
+        rows = set()
+        votes = Counter()
+        for key, customer_id in self.conn.execute(
+            f"SELECT key, customer_id FROM customer_keys WHERE key IN ({marks})", selective
+        ):
+            if key.startswith("g:"):
+                votes[customer_id] += 1
+            else:
+                rows.add(customer_id)
+
+        if votes:
+            gram_counts = {}
+            voted = list(votes)
+            for start in range(0, len(voted), 900):
+                part = voted[start:start + 900]
+                gram_counts.update(self.conn.execute(
+                    f"SELECT id, gram_count FROM customers WHERE id IN ({','.join('?' * len(part))})", part
+                ))
+            ranked = sorted(votes, key=lambda c: votes[c] / (len(grams) + gram_counts[c]), reverse=True)
+            rows.update(ranked[:self.max_candidates])
+        return rows
+
+    def iter_customers(self, ids=None, chunk=50_000):
+        if ids is None:
+            cursor = self.conn.execute("SELECT id, name, country FROM customers")
+            while True:
+                block = cursor.fetchmany(chunk)
+                if not block:
+                    return
+                yield from block
+        else:
+            ids = list(ids)
+            for start in range(0, len(ids), 900):
+                part = ids[start:start + 900]
+                yield from self.conn.execute(
+                    f"SELECT id, name, country FROM customers WHERE id IN ({','.join('?' * len(part))})", part
+                )
+
+    def match_entities(self, entities, threshold=80):
+        """
+        Reverse Tier 1: scores each list entity (primary name and aliases) against its
+        candidate customers. Returns one hit dict per (customer, entity) with the best alias score.
+        """
+        hits = []
+        book_size = self.size()
+        for entity in entities:
+            best = {}
+            for entity_name in [entity["name"], *entity.get("aliases", [])]:
+                customers = list(self.iter_customers(self.candidates(entity_name, book_size)))
+                if not customers:
+                    continue
+                self.scored += len(customers)
+                # Normalized on both sides: list names are often upper case, customer names rarely
+                matches = process.extract(
+                    entity_name, [c[1] for c in customers], scorer=fuzz.token_set_ratio, processor=normalize_name,
+                    score_cutoff=threshold, limit=None,
+                )
+                for _, score, i in matches:
+                    customer = customers[i]
+                    if score > best.get(customer, -1):
+                        best[customer] = score
+            for (customer_id, name, country), score in best.items():
+                hits.append({"customer_id": customer_id, "name": name, "country": country,
+                             "entity": entity, "score": score})
+        return hits
+
+
+def rescreen(book, tribunal, entry, threshold=80):
+    """
+    Applies one changelog entry to the book: drops hits on removed and changed entities,
+    reverse-matches added/changed entities, and sends only hits not seen before to Tier 2
+    (every hit on a changed entity is new again). Returns a summary dict.
+    """
+    start = time.perf_counter()
+    changed = list(entry.get("changed", []))
+    # A changed listing may no longer match a customer it used to; its old hits must not linger
+    book.remove_entities(list(entry.get("removed", [])) + changed)
+
+    delta_ids = list(entry.get("added", [])) + changed
+    entities = [e for e in (tribunal.get_entity_details(uid) for uid in delta_ids) if e]
+    hits = book.match_entities(entities, threshold)
+
+    known = book.known_pairs([e["id"] for e in entities])
+    new_hits = [h for h in hits if (h["customer_id"], h["entity"]["id"]) not in known]
+    verdicts = tribunal.settle_batch([(h["name"], h["entity"], h["score"]) for h in new_hits],
+                                     [h["country"] for h in new_hits]) if new_hits else []
+
+    book.record_hits(
+        [(h["customer_id"], h["entity"]["id"], h["score"], v if isinstance(v, dict) else None)
+         for h, v in zip(new_hits, verdicts)],
+        entry.get("version", 0),
+    )
+    book.set_meta("list_version", entry.get("version", 0))
+    return {
+        "version": entry.get("version", 0),
+        "delta_entities": len(entities),
+        "book_size": book.size(),
+        "tier1_hits": len(hits),
+        "new_hits": len(new_hits),
+        "flagged": sum(isinstance(v, dict) and "HIGH" in str(v.get("verdict", "")) for v in verdicts),
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+
+
+def pending_entries(book, changelog_path):
+    """Changelog entries newer than the list version the book was last screened against."""
+    done = book.get_meta("list_version", 0)
+    try:
+        with open(changelog_path, "r", encoding="utf-8") as f:
+            entries = [json.loads(line) for line in f if line.strip()]
+    except FileNotFoundError:
+        return []
+    return [e for e in entries if e.get("version", 0) > done]
+
+
+def main():
+    from evidence_manager import CHANGELOG_FILE
+    from tribunal import SanctionTribunal
+
+    parser = argparse.ArgumentParser(description="Re-screen the customer book against sanctions list updates")
+    parser.add_argument("--book", default=BOOK_FILE)
+    parser.add_argument("--changelog", default=CHANGELOG_FILE)
+    parser.add_argument("--threshold", type=float, default=80)
+    args = parser.parse_args()
+
+    book = CustomerBook(args.book)
+    entries = pending_entries(book, args.changelog)
+    if not entries:
+        print("✅ Customer book is up to date.")
+        return
+    tribunal = SanctionTribunal()
+    for entry in entries:
+        print(json.dumps(rescreen(book, tribunal, entry, args.threshold)))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,44 @@
+import argparse
+import hashlib
+import multiprocessing
 import requests
 import xml.etree.ElementTree as ET
 import json
 import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from tqdm import tqdm  # pip install tqdm
+from list_parsers import (iter_eu_entries, iter_uk_entries, iter_un_entries, local_name, normalize_dob,
+                          normalize_identifier)
+from name_index import dedup_key, normalize_name
+from sanctions_store import STORE_FILE, SanctionsStore, write_store
+from triage import address_country, country_key
 
 # --- CONFIGURATION ---
+# Order is merge priority: when lists name the same designee, the first listing keeps its id and name
 SOURCES = {
-    "OFAC_SDN": "https://www.treasury.gov/ofac/downloads/sdn.xml"
+    "OFAC_SDN": "https://www.treasury.gov/ofac/downloads/sdn.xml",
+    "OFAC_CONSOLIDATED": "https://www.treasury.gov/ofac/downloads/consolidated/consolidated.xml",
+    "UN": "https://scsanctions.un.org/resources/xml/en/consolidated.xml",
+    "EU": "https://webgate.ec.europa.eu/fsd/fsf/public/files/xmlFullSanctionsList_1_1/content?token=dG9rZW4tMjAxNw",
+    "UK": "https://ofsistorage.blob.core.windows.net/publishlive/2022format/ConList.csv",
+}
+# Source -> (list format, provenance tag). OFAC's consolidated non-SDN list uses the SDN schema and uid space.
+SOURCE_FORMATS = {
+    "OFAC_SDN": ("sdn", "US_OFAC"),
+    "OFAC_CONSOLIDATED": ("sdn", "US_OFAC_NON_SDN"),
+    "UN": ("un", "UN"),
+    "EU": ("eu", "EU"),
+    "UK": ("uk", "UK_OFSI"),
+}
+# Local copies for offline runs and checks (`--fixtures fixtures/sources`)
+FIXTURE_FILES = {
+    "OFAC_SDN": "ofac_sdn.xml",
+    "OFAC_CONSOLIDATED": "ofac_consolidated.xml",
+    "UN": "un_consolidated.xml",
+    "EU": "eu_fsf.xml",
+    "UK": "uk_conlist.csv",
 }
 
 # --- COUNTRY RISK DATABASE ---
@@ -23,121 +54,472 @@ HIGH_RISK_COUNTRIES = {
 }
 
 OUTPUT_FILE = "consolidated_sanctions.json"
+CHANGELOG_FILE = "sanctions_changelog.jsonl"
+REFRESH_STATE_FILE = "refresh_state.json"
+
+def build_entity(entry, ns="", source="US_OFAC"):
+    """Turns one <sdnEntry> element into our entity dict. `ns` is the '{uri}' prefix of the document."""
+    def text(parent, tag):
+        node = parent.find(ns + tag)
+        return node.text if node is not None else None
 
-def download_file(url, filename):
-    print(f"⬇️  Downloading from {url}...")
-    response = requests.get(url, stream=True)
-    total_size = int(response.headers.get('content-length', 0))
+    entity = {
+        "source": source,
+        "id": text(entry, "uid") or "N/A",
+        "name": "Unknown",
+        "type": "Unknown",
+        "programs": [],
+        "addresses": [],
+        "aliases": [],
+        "remarks": text(entry, "remarks") or "",
+        "identifiers": [],
+        "dates_of_birth": [],
+    }
+
+    # Get Name (Last, First)
+    last_name = text(entry, "lastName") or ""
+    first_name = text(entry, "firstName") or ""
     
-    if response.status_code == 200:
-        with open(filename, 'wb') as f, tqdm(
-            desc=filename,
-            total=total_size,
-            unit='iB',
-            unit_scale=True,
-            unit_divisor=1024,
-        ) as bar:
-            for chunk in response.iter_content(chunk_size=1024):
-                size = f.write(chunk)
-                bar.update(size)
-        print("✅ Download Complete.")
-        return True
+    # Handle cases where only one name exists (e.g., Vessels or Organizations)
+    if last_name and first_name:
+        entity["name"] = f"{last_name}, {first_name}".strip(", ")
+    elif last_name:
+        entity["name"] = last_name
+    elif first_name:
+        entity["name"] = first_name
+        
+    # Get Aliases (a.k.a. / f.k.a. names, same Last, First layout)
+    aka_list = entry.find(ns + "akaList")
+    if aka_list is not None:
+        for aka in aka_list.findall(ns + "aka"):
+            aka_last = text(aka, "lastName") or ""
+            aka_first = text(aka, "firstName") or ""
+            alias = f"{aka_last}, {aka_first}".strip(", ") if aka_last and aka_first else (aka_last or aka_first)
+            if alias and alias != entity["name"] and alias not in entity["aliases"]:
+                entity["aliases"].append(alias)
+
+    # Get Type
+    entity["type"] = text(entry, "sdnType") or "Entity"
+
+    # Get Sanction Programs
+    program_list = entry.find(ns + "programList")
+    if program_list is not None:
+        entity["programs"] = [p.text for p in program_list.findall(ns + "program")]
+
+    # Get Addresses
+    address_list = entry.find(ns + "addressList")
+    if address_list is not None:
+        for addr in address_list.findall(ns + "address"):
+            country = text(addr, "country") or "Unknown"
+            city = text(addr, "city") or ""
+            
+            full_addr = f"{city}, {country}".strip(", ")
+            entity["addresses"].append(full_addr)
+
+    # Get Identifiers (passports, national ids...) & Dates of Birth, for cross-list matching
+    id_list = entry.find(ns + "idList")
+    if id_list is not None:
+        for id_entry in id_list.findall(ns + "id"):
+            number = normalize_identifier(text(id_entry, "idNumber"))
+            if number and number not in entity["identifiers"]:
+                entity["identifiers"].append(number)
+    dob_list = entry.find(ns + "dateOfBirthList")
+    if dob_list is not None:
+        for item in dob_list.findall(ns + "dateOfBirthItem"):
+            dob = normalize_dob(text(item, "dateOfBirth"))
+            if dob and dob not in entity["dates_of_birth"]:
+                entity["dates_of_birth"].append(dob)
+
+    return add_risk_warnings(entity)
+
+def risk_warning(data):
+    return f"[RISK WARNING: Location match {data['name']}]"
+
+def add_risk_warnings(entity):
+    """Country Risk: flags addresses in HIGH_RISK_COUNTRIES in the remarks (every list format), once per country."""
+    for address in entity["addresses"]:
+        country = country_key(address_country(address))
+        for code, data in HIGH_RISK_COUNTRIES.items():
+            warning = risk_warning(data)
+            if country_key(data["name"]) == country and warning not in entity["remarks"]:
+                entity["remarks"] = f"{entity['remarks']} {warning}".strip()
+    return entity
+
+def strip_risk_warnings(remarks):
+    for data in HIGH_RISK_COUNTRIES.values():
+        remarks = remarks.replace(risk_warning(data), "")
+    return " ".join(remarks.split())
+
+def iter_sdn_entries(source, source_tag="US_OFAC"):
+    """
+    Streams entities out of an SDN XML file path or binary file object with iterparse.
+    Each <sdnEntry> is cleared once emitted, so memory stays flat regardless of file size.
+    """
+    ns = ""
+    root = None
+    for event, elem in ET.iterparse(source, events=("start", "end")):
+        if event == "start":
+            if root is None:
+                root = elem
+                ns = elem.tag[:elem.tag.index('}') + 1] if '}' in elem.tag else ""
+            continue
+        if local_name(elem.tag) == "sdnEntry":
+            yield build_entity(elem, ns, source_tag)
+            elem.clear()
+            # Finished entries hang off the root until removed
+            root.clear()
+
+# --- MULTI-SOURCE INGEST ---
+
+def iter_source_entries(name, source):
+    """Entities of one configured list from a path or binary stream, in that list's format."""
+    list_format, tag = SOURCE_FORMATS[name]
+    if list_format == "sdn":
+        yield from iter_sdn_entries(source, tag)
+        return
+    parser = {"un": iter_un_entries, "eu": iter_eu_entries, "uk": iter_uk_entries}[list_format]
+    for entity in parser(source, tag):
+        yield add_risk_warnings(entity)
+
+def ingest_source(name, location, validators=None, stream=True):
+    """
+    Fetches and parses one list (worker process entry point). `location` is a URL or a local
+    file. With `validators` the download is conditional. Returns {"source", "entities",
+    "validators", "not_modified", "seconds", "error"}.
+    """
+    start = time.perf_counter()
+    result = {"source": name, "entities": None, "validators": validators or {}, "not_modified": False, "error": None}
+    try:
+        if os.path.exists(location):
+            result["entities"] = list(iter_source_entries(name, location))
+        else:
+            response, result["validators"] = conditional_get(location, validators or {})
+            if response is None:
+                result["not_modified"] = True
+            elif stream:
+                response.raw.decode_content = True  # Transparently un-gzip
+                # urllib3 otherwise reports the stream closed at EOF, which io.TextIOWrapper (UK CSV) rejects
+                response.raw.auto_close = False
+                try:
+                    result["entities"] = list(iter_source_entries(name, response.raw))
+                finally:
+                    response.close()
+            else:
+                with tempfile.TemporaryDirectory() as tmp:
+                    path = os.path.join(tmp, name)
+                    with response, open(path, "wb") as f:
+                        for chunk in response.iter_content(chunk_size=64 * 1024):
+                            f.write(chunk)
+                    result["entities"] = list(iter_source_entries(name, path))
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["seconds"] = round(time.perf_counter() - start, 3)
+    return result
+
+def ingest_sources(locations, workers=None, validators=None, stream=True):
+    """
+    Fetches and parses every {source: url or path} at once, one process per list, so the
+    whole ingest takes about as long as the slowest list. Results come back in `locations` order.
+    """
+    validators = validators or {}
+    workers = workers or len(locations)
+    jobs = [(name, location, validators.get(name), stream) for name, location in locations.items()]
+    if workers <= 1 or len(jobs) == 1:
+        results = [ingest_source(*job) for job in jobs]
     else:
-        print(f"❌ Failed to download. Status Code: {response.status_code}")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            results = list(pool.map(ingest_source, *zip(*jobs)))
+    for r in results:
+        if r["error"]:
+            print(f"❌ {r['source']}: {r['error']}")
+        elif r["not_modified"]:
+            print(f"✅ {r['source']}: not modified")
+        else:
+            print(f"✅ {r['source']}: {len(r['entities'])} entities in {r['seconds']}s")
+    return results
+
+def entity_countries(entity):
+    """Country keys of an entity's addresses: list spellings ('IRAN (ISLAMIC REPUBLIC OF)', 'Korea, North') resolve to one name."""
+    return {country_key(address_country(a)) for a in entity.get("addresses", []) if a} - {"", "unknown"}
+
+def same_designee(a, b):
+    """
+    Cross-list identity test for two listings that share a name key or an identifier.
+    A shared passport / national id / UN reference decides it; otherwise the names must
+    agree, the types must not conflict, and a date of birth or a country must corroborate.
+    """
+    if set(a.get("identifiers", [])) & set(b.get("identifiers", [])):
+        return True
+    types = {a.get("type"), b.get("type")} - {None, "Unknown"}
+    if len(types) > 1:
         return False
+    dobs_a, dobs_b = set(a.get("dates_of_birth", [])), set(b.get("dates_of_birth", []))
+    if dobs_a and dobs_b:
+        # Compare on the year: lists disagree on day / month precision
+        return bool({d[:4] for d in dobs_a} & {d[:4] for d in dobs_b})
+    # Whole countries only: 'Niger' does not corroborate 'Nigeria'
+    return bool(entity_countries(a) & entity_countries(b))
 
-def strip_namespace(tree):
+def merge_entities(results):
     """
-    Iterates through the XML tree and forcibly removes the {http://...} namespace 
-    from every tag. This makes parsing 100x easier and error-proof.
+    Cross-list de-duplication. Listings that share a dedup_key() of any of their names, or an
+    identifier, are compared with same_designee(); matches merge into one entity that keeps
+    the highest-priority listing's id, name and type, unions names, programs, addresses and
+    identifiers, and records every contributing listing under "sources" (provenance).
+    Two listings from the same list are never merged: they are separate designations.
+    Returns (entities, stats).
     """
-    for elem in tree.iter():
-        if '}' in elem.tag:
-            elem.tag = elem.tag.split('}', 1)[1]  # Keep only the tag name after '}'
-    return tree
+    listings = [(r["source"], e) for r in results for e in r["entities"] or []]
+    parent = list(range(len(listings)))
+    members = [{listings[i][0]} for i in range(len(listings))]
 
-def parse_ofac_sdn(xml_file):
-    print("⚙️  Parsing OFAC Data (This may take a moment)...")
-    
-    # Parse and Strip Namespaces immediately
-    tree = ET.parse(xml_file)
-    tree = strip_namespace(tree)
-    root = tree.getroot()
-    
-    sanctioned_entities = []
-    
-    # Now we can just search for "sdnEntry" directly without worrying about URLs
-    entries = root.findall(".//sdnEntry")
-    
-    for entry in tqdm(entries, desc="Processing Entities"):
-        entity = {
-            "source": "US_OFAC",
-            "id": entry.find("uid").text if entry.find("uid") is not None else "N/A",
-            "name": "Unknown",
-            "type": "Unknown",
-            "programs": [],
-            "addresses": [],
-            "remarks": entry.find("remarks").text if entry.find("remarks") is not None else ""
-        }
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
 
-        # Get Name (Last, First)
-        last_name = entry.find("lastName").text if entry.find("lastName") is not None else ""
-        first_name = entry.find("firstName").text if entry.find("firstName") is not None else ""
-        
-        # Handle cases where only one name exists (e.g., Vessels or Organizations)
-        if last_name and first_name:
-            entity["name"] = f"{last_name}, {first_name}".strip(", ")
-        elif last_name:
-            entity["name"] = last_name
-        elif first_name:
-            entity["name"] = first_name
-            
-        # Get Type
-        entity["type"] = entry.find("sdnType").text if entry.find("sdnType") is not None else "Entity"
-
-        # Get Sanction Programs
-        program_list = entry.find("programList")
-        if program_list is not None:
-            entity["programs"] = [p.text for p in program_list.findall("program")]
-
-        # Get Addresses & Check Country Risk
-        address_list = entry.find("addressList")
-        if address_list is not None:
-            for addr in address_list.findall("address"):
-                country = addr.find("country").text if addr.find("country") is not None else "Unknown"
-                city = addr.find("city").text if addr.find("city") is not None else ""
-                
-                full_addr = f"{city}, {country}".strip(", ")
-                entity["addresses"].append(full_addr)
-                
-                # Check Risk
-                for code, data in HIGH_RISK_COUNTRIES.items():
-                    if data["name"].lower() in country.lower():
-                        entity["remarks"] += f" [RISK WARNING: Location match {data['name']}]"
-
-        sanctioned_entities.append(entity)
-        
-    print(f"✅ Extracted {len(sanctioned_entities)} entities from OFAC.")
-    return sanctioned_entities
+    buckets = {}
+    for i, (_, entity) in enumerate(listings):
+        keys = {("name", dedup_key(n)) for n in [entity["name"], *entity.get("aliases", [])] if n}
+        keys |= {("id", x) for x in entity.get("identifiers", []) if len(x) >= 5}
+        for key in keys:
+            buckets.setdefault(key, []).append(i)
 
-def main():
-    if download_file(SOURCES["OFAC_SDN"], "ofac_sdn.xml"):
-        ofac_data = parse_ofac_sdn("ofac_sdn.xml")
-        
+    compared = merged = 0
+    for rows in buckets.values():
+        if len(rows) < 2 or len(rows) > 50:
+            # Very common names / placeholder ids are useless for matching
+            continue
+        for x, i in enumerate(rows):
+            for j in rows[x + 1:]:
+                ri, rj = find(i), find(j)
+                if ri == rj or members[ri] & members[rj]:
+                    continue
+                compared += 1
+                if same_designee(listings[i][1], listings[j][1]):
+                    # The lower index (higher-priority list) stays the root
+                    root, child = min(ri, rj), max(ri, rj)
+                    parent[child] = root
+                    members[root] |= members[child]
+                    merged += 1
+
+    clusters = {}
+    for i in range(len(listings)):
+        clusters.setdefault(find(i), []).append(i)
+
+    entities = []
+    for root in sorted(clusters):
+        group = [listings[i] for i in clusters[root]]
+        primary = dict(group[0][1])
+        primary["sources"] = [{"list": name, "source": e["source"], "id": e["id"], "name": e["name"]} for name, e in group]
+        if len(group) > 1:
+            # Risk warnings are re-derived from the merged addresses, so each appears once
+            remarks = [strip_risk_warnings(primary.get("remarks", ""))]
+            for name, other in group[1:]:
+                for field in ("aliases", "programs", "addresses", "identifiers", "dates_of_birth"):
+                    primary[field] = list(dict.fromkeys([*primary.get(field, []), *other.get(field, [])]))
+                if other["name"] != primary["name"]:
+                    primary["aliases"] = list(dict.fromkeys([*primary["aliases"], other["name"]]))
+                other_remarks = strip_risk_warnings(other.get("remarks", ""))
+                if other_remarks and other_remarks not in " ".join(remarks):
+                    remarks.append(f"[{name}] {other_remarks}")
+            primary["remarks"] = " ".join(r for r in remarks if r)
+            primary["aliases"] = [a for a in primary["aliases"] if a != primary["name"]]
+            add_risk_warnings(primary)
+        entities.append(primary)
+
+    stats = {"listings": len(listings), "entities": len(entities), "merged": merged, "pairs_compared": compared,
+             "multi_list": sum(len(c) > 1 for c in clusters.values())}
+    return entities, stats
+
+def source_locations(names, fixtures=None):
+    """{source: URL}, or {source: local fixture path} when a fixtures directory is given."""
+    if fixtures:
+        return {name: os.path.join(fixtures, FIXTURE_FILES[name]) for name in names}
+    return {name: SOURCES[name] for name in names}
+
+def stored_version(store_path=STORE_FILE):
+    """Version of the store on disk (0 when there is none). Every write moves it forward, so the
+    customer book's list_version never gets ahead of the changelog."""
+    if not os.path.exists(store_path):
+        return 0
+    return SanctionsStore(store_path).meta.get("version", 0)
+
+def build_database(names=tuple(SOURCES), fixtures=None, workers=None, stream=True, allow_partial=False,
+                   store_path=STORE_FILE):
+    """
+    Parallel ingest + cross-list merge. Returns (final_db, stats) or (None, stats) when a list failed.
+    The new DB's version follows the one in `store_path`.
+    """
+    start = time.perf_counter()
+    results = ingest_sources(source_locations(names, fixtures), workers, stream=stream)
+    failed = [r["source"] for r in results if r["error"]]
+    stats = {"sources": {r["source"]: {"entities": len(r["entities"] or []), "seconds": r["seconds"], "error": r["error"]}
+                         for r in results}}
+    if failed and not allow_partial:
+        # A database missing a whole list would silently clear its designees
+        print(f"❌ {', '.join(failed)} failed; database not rebuilt (use --allow-partial to build without them).")
+        return None, stats
+    entities, stats["merge"] = merge_entities([r for r in results if not r["error"]])
+    stats["seconds"] = round(time.perf_counter() - start, 3)
+    final_db = {
+        "last_updated": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "version": stored_version(store_path) + 1,
+        "sources": [r["source"] for r in results if not r["error"]],
+        "risk_definitions": HIGH_RISK_COUNTRIES,
+        "entities": entities
+    }
+    return final_db, stats
+
+# --- INCREMENTAL REFRESH ---
+
+def load_refresh_state(path=REFRESH_STATE_FILE):
+    """ETag / Last-Modified per source from the previous refresh."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+def save_refresh_state(state, path=REFRESH_STATE_FILE):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=4)
+    os.replace(tmp, path)
+
+def conditional_get(url, validators):
+    """
+    GET with If-None-Match / If-Modified-Since. Returns (response, new validators);
+    response is None when the server answers 304 Not Modified.
+    """
+    headers = {}
+    if validators.get("etag"):
+        headers["If-None-Match"] = validators["etag"]
+    if validators.get("last_modified"):
+        headers["If-Modified-Since"] = validators["last_modified"]
+
+    response = requests.get(url, headers=headers, stream=True)
+    if response.status_code == 304:
+        response.close()
+        return None, validators
+    response.raise_for_status()
+    return response, {
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+    }
+
+def entity_hash(entity):
+    """Content hash of one entity, independent of key order."""
+    return hashlib.sha1(json.dumps(entity, sort_keys=True).encode("utf-8")).hexdigest()
+
+def diff_entities(old_entities, new_entities):
+    """Per-uid delta between two entity lists: (added, changed, removed) id lists."""
+    old_hashes = {e["id"]: entity_hash(e) for e in old_entities}
+    new_hashes = {e["id"]: entity_hash(e) for e in new_entities}
+    added = [uid for uid in new_hashes if uid not in old_hashes]
+    changed = [uid for uid, h in new_hashes.items() if uid in old_hashes and old_hashes[uid] != h]
+    removed = [uid for uid in old_hashes if uid not in new_hashes]
+    return added, changed, removed
+
+def incremental_refresh(sources=tuple(SOURCES), store_path=STORE_FILE, changelog_path=CHANGELOG_FILE,
+                        state_path=REFRESH_STATE_FILE, fixtures=None, workers=None):
+    """
+    Refreshes the store only when a list changed. Skips every download on 304, skips the
+    rewrite when every per-uid hash matches, and otherwise swaps in a new DB version
+    atomically and appends the delta to the changelog. Returns the changelog entry, or
+    None when nothing changed.
+    """
+    state = load_refresh_state(state_path)
+    locations = source_locations(sources, fixtures)
+    print(f"⬇️  Checking {len(locations)} lists for updates...")
+    results = ingest_sources(locations, workers, validators={name: state.get(name, {}) for name in locations})
+    if all(r["not_modified"] for r in results):
+        print("✅ Not modified since last refresh.")
+        return None
+
+    # Lists that answered 304 are still part of the merged DB, so fetch those in full too
+    stale = {r["source"]: locations[r["source"]] for r in results if r["not_modified"]}
+    if stale:
+        refetched = {r["source"]: r for r in ingest_sources(stale, workers)}
+        results = [refetched.get(r["source"], r) for r in results]
+    failed = [r["source"] for r in results if r["error"]]
+    if failed:
+        print(f"❌ {', '.join(failed)} failed; database left as is.")
+        return None
+    new_entities, _ = merge_entities(results)
+
+    if os.path.exists(store_path):
+        old = SanctionsStore(store_path)
+        old_meta, old_entities = old.meta, list(old.entities)
+    else:
+        old_meta, old_entities = {}, []
+    added, changed, removed = diff_entities(old_entities, new_entities)
+
+    entry = None
+    if added or changed or removed:
+        version = old_meta.get("version", 0) + 1
         final_db = {
             "last_updated": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "version": version,
+            "sources": list(locations),
             "risk_definitions": HIGH_RISK_COUNTRIES,
-            "entities": ofac_data
+            "entities": new_entities
         }
-        
-        with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-            json.dump(final_db, f, indent=4)
-            
-        print(f"\n🎉 Success! Database built at '{OUTPUT_FILE}'")
-        print(f"Total Sanctioned Entities Tracked: {len(ofac_data)}")
-        
-        # Cleanup
-        os.remove("ofac_sdn.xml")
+        write_store(store_path, final_db)  # atomic swap; open readers keep the old mapping
+
+        entry = {
+            "version": version,
+            "previous_version": old_meta.get("version", 0),
+            "last_updated": final_db["last_updated"],
+            "source": ", ".join(locations),
+            "added": added,
+            "changed": changed,
+            "removed": removed,
+        }
+        with open(changelog_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+        print(f"🎉 Version {version}: +{len(added)} added, ~{len(changed)} changed, -{len(removed)} removed.")
+    else:
+        print("✅ Content unchanged; database left as is.")
+
+    # Validators are only saved once the new version is safely on disk
+    for r in results:
+        state[r["source"]] = r["validators"]
+    save_refresh_state(state, state_path)
+    return entry
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the consolidated sanctions database")
+    parser.add_argument("--sources", nargs="+", choices=list(SOURCES), default=list(SOURCES),
+                        help="Lists to ingest (default: all)")
+    parser.add_argument("--fixtures", help="Read every list from this directory instead of downloading "
+                                           "(e.g. fixtures/sources)")
+    parser.add_argument("--workers", type=int, help="Parallel ingest processes (default: one per list)")
+    parser.add_argument("--allow-partial", action="store_true", help="Build even if some lists failed to download")
+    parser.add_argument("--stream", action="store_true", help="Parse straight from the download stream (no temp file)")
+    parser.add_argument("--json", action="store_true", help=f"Also write the human-readable {OUTPUT_FILE}")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Conditional download + per-uid diff; only rewrites the DB when entities changed")
+    args = parser.parse_args()
+
+    if args.incremental:
+        incremental_refresh(args.sources, fixtures=args.fixtures, workers=args.workers)
+        return
+
+    final_db, stats = build_database(args.sources, args.fixtures, args.workers, args.stream, args.allow_partial)
+    if final_db is not None:
+        write_store(STORE_FILE, final_db)
+        merge = stats["merge"]
+        print(f"\n🎉 Success! Database version {final_db['version']} built at '{STORE_FILE}' in {stats['seconds']}s")
+        print(f"🔗 {merge['listings']} listings -> {merge['entities']} entities "
+              f"({merge['multi_list']} designees found on more than one list)")
+
+        if args.json:
+            with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
+                json.dump(final_db, f, indent=4)
+            print(f"📄 Auditor JSON copy written to '{OUTPUT_FILE}'")
+        print(f"Total Sanctioned Entities Tracked: {len(final_db['entities'])}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,135 @@
+"""
+Offline stand-ins for the Groq and Gemini SDK clients. They mimic the call shapes the
+tribunal uses, sleep for a configurable latency and fail with 429/503 at a configurable
+rate, so Tier 2 throughput can be measured without network access.
+"""
+import json
+import random
+import re
+import threading
+import time
+
+
+class FakeAPIError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"Fake API error {status_code}")
+        self.status_code = status_code
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+def fake_verdict(prompt):
+    """Deterministic judge JSON: HIGH when the quoted match score is 90% or more."""
+    scores = [int(s) for s in re.findall(r"\((\d+)%\)", prompt)]
+    high = bool(scores) and max(scores) >= 90
+    return json.dumps({
+        "verdict": "HIGH" if high else "LOW",
+        "confidence": 90 if high else 60,
+        "reasoning": "Fake judge verdict.",
+    })
+
+
+def fake_case_verdicts(cases, rng, drop_rate=0.0):
+    """JSON array answering multi-case judge prompts; each case is left out with `drop_rate`."""
+    return json.dumps([
+        {"id": c["id"], "verdict": "HIGH" if c.get("score", 0) >= 90 else "LOW", "reasoning": "Fake judge verdict."}
+        for c in cases if rng.random() >= drop_rate
+    ])
+
+
+def prompt_cases(prompt):
+    """The JSON case lines of a multi-case judge prompt (empty for single-case prompts)."""
+    cases = []
+    for line in prompt.splitlines():
+        line = line.strip()
+        if line.startswith('{"id"'):
+            cases.append(json.loads(line))
+    return cases
+
+
+def stream_pieces(text, size=8):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+class FakeLLM:
+    """
+    Shared latency / error behaviour and call counters. `latency` is the wait before the
+    first token; streamed replies then arrive in small pieces `token_latency` apart.
+    """
+
+    def __init__(self, latency=0.2, error_rate=0.0, seed=None, token_latency=0.0):
+        self.latency = latency
+        self.token_latency = token_latency
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+
+    def _serve(self):
+        with self.lock:
+            self.calls += 1
+            fail = self.rng.random() < self.error_rate
+            if fail:
+                self.errors += 1
+                status = self.rng.choice([429, 503])
+        time.sleep(self.latency)
+        if fail:
+            raise FakeAPIError(status)
+
+    def _stream(self, text, wrap):
+        for piece in stream_pieces(text):
+            time.sleep(self.token_latency)
+            yield wrap(piece)
+
+
+class FakeGenerativeModel(FakeLLM):
+    """Stand-in for genai.GenerativeModel. Multi-case prompts get a JSON array that skips `drop_rate` of the cases."""
+
+    def __init__(self, *args, drop_rate=0.0, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.drop_rate = drop_rate
+
+    def generate_content(self, prompt, stream=False):
+        self._serve()
+        cases = prompt_cases(prompt)
+        if cases:
+            with self.lock:
+                text = fake_case_verdicts(cases, self.rng, self.drop_rate)
+        else:
+            text = fake_verdict(prompt)
+        return self._stream(text, FakeResponse) if stream else FakeResponse(text)
+
+
+class _Message:
+    def __init__(self, content):
+        self.content = content
+
+
+class _Choice:
+    def __init__(self, content):
+        self.message = _Message(content)
+        self.delta = self.message
+
+
+class _Completion:
+    def __init__(self, content):
+        self.choices = [_Choice(content)]
+
+
+class FakeGroqClient(FakeLLM):
+    """Stand-in for groq.Groq; exposes chat.completions.create."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.chat = self
+        self.completions = self
+
+    def create(self, messages, model, stream=False, **kwargs):
+        self._serve()
+        text = f"[{model}] Your Honor, argument on: {messages[-1]['content'][:60]}"
+        # Stream chunks carry the text in choices[0].delta.content
+        return self._stream(text, _Completion) if stream else _Completion(text)
@@ -0,0 +1,187 @@
+"""
+Local HTTP stand-in for the Groq (OpenAI-style chat completions) and Gemini (generateContent)
+APIs, with configurable latency and 429/503 error rates. Point the real SDKs at it to
+exercise the whole client stack offline:
+
+    python fake_llm_server.py --port 8765 --latency 0.3 --error-rate 0.05
+    GROQ_BASE_URL=http://127.0.0.1:8765 GEMINI_API_ENDPOINT=http://127.0.0.1:8765 streamlit run app.py
+
+Replies come from the same deterministic judge as fake_llm (HIGH when the score is 90% or more).
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from fake_llm import fake_case_verdicts, fake_verdict, prompt_cases, stream_pieces
+
+GEMINI_PATH = re.compile(r"^/v1(?:beta)?/models/(?P<model>[^:]+):(?P<method>generateContent|streamGenerateContent)")
+
+
+class FakeLLMServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency=0.2, error_rate=0.0, token_latency=0.0, drop_rate=0.0, seed=None):
+        super().__init__(address, FakeLLMHandler)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.token_latency = token_latency
+        self.drop_rate = drop_rate
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def reply_text(self, prompt):
+        cases = prompt_cases(prompt)
+        if cases:
+            with self.lock:
+                return fake_case_verdicts(cases, self.rng, self.drop_rate)
+        if "Output strictly" in prompt:
+            return fake_verdict(prompt)
+        return f"Your Honor, argument on: {prompt[:60]}"
+
+
+class FakeLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def start_sse(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+    def start_stream(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+    def send_event(self, payload):
+        data = payload if isinstance(payload, str) else json.dumps(payload)
+        self.wfile.write(f"data: {data}\n\n".encode("utf-8"))
+        self.wfile.flush()
+
+    def do_POST(self):
+        server = self.server
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+
+        with server.lock:
+            server.calls += 1
+            fail = server.rng.random() < server.error_rate
+            if fail:
+                server.errors += 1
+                status = server.rng.choice([429, 503])
+        time.sleep(server.latency)
+        if fail:
+            return self.send_json(status, {"error": {"code": status, "message": "Fake overload", "status": "UNAVAILABLE"}})
+
+        path = self.path.split("?")[0]
+        if path.endswith("/chat/completions"):
+            return self.groq_reply(request)
+        match = GEMINI_PATH.match(path)
+        if match:
+            return self.gemini_reply(request, match["method"] == "streamGenerateContent", "alt=sse" in self.path)
+        self.send_json(404, {"error": {"code": 404, "message": f"Unknown path {path}", "status": "NOT_FOUND"}})
+
+    def groq_reply(self, request):
+        prompt = request["messages"][-1]["content"]
+        text = self.server.reply_text(prompt)
+        base = {"id": "chatcmpl-fake", "created": int(time.time()), "model": request.get("model", "fake")}
+        usage = {"prompt_tokens": len(prompt) // 4 + 1, "completion_tokens": len(text) // 4 + 1,
+                 "total_tokens": (len(prompt) + len(text)) // 4 + 2}
+        if not request.get("stream"):
+            return self.send_json(200, {**base, "object": "chat.completion", "usage": usage, "choices": [
+                {"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}]})
+
+        self.start_sse()
+        for piece in stream_pieces(text):
+            time.sleep(self.server.token_latency)
+            self.send_event({**base, "object": "chat.completion.chunk", "choices": [
+                {"index": 0, "delta": {"content": piece}, "finish_reason": None}]})
+        self.send_event({**base, "object": "chat.completion.chunk", "choices": [
+            {"index": 0, "delta": {}, "finish_reason": "stop"}]})
+        self.send_event("[DONE]")
+
+    def gemini_reply(self, request, stream, sse):
+        prompt = "".join(p.get("text", "") for c in request.get("contents", []) for p in c.get("parts", []))
+        text = self.server.reply_text(prompt)
+        usage = {"promptTokenCount": len(prompt) // 4 + 1, "candidatesTokenCount": len(text) // 4 + 1,
+                 "totalTokenCount": (len(prompt) + len(text)) // 4 + 2}
+
+        def candidate(piece, finished):
+            return {"content": {"parts": [{"text": piece}], "role": "model"}, "index": 0,
+                    **({"finishReason": "STOP"} if finished else {})}
+
+        if not stream:
+            return self.send_json(200, {"candidates": [candidate(text, True)], "usageMetadata": usage})
+
+        # The REST SDK transport reads one streamed JSON array; ?alt=sse gets server-sent events instead
+        if sse:
+            self.start_sse()
+        else:
+            self.start_stream()
+        pieces = stream_pieces(text)
+        for i, piece in enumerate(pieces):
+            time.sleep(self.server.token_latency)
+            last = i == len(pieces) - 1
+            chunk = {"candidates": [candidate(piece, last)], **({"usageMetadata": usage} if last else {})}
+            if sse:
+                self.send_event(chunk)
+            else:
+                self.wfile.write(("[" if i == 0 else ",\n").encode() + json.dumps(chunk).encode("utf-8"))
+                self.wfile.flush()
+        if not sse:
+            self.wfile.write(b"]")
+
+
+def start_server(port=0, **options):
+    """Starts the fake server on a daemon thread (port 0 picks a free one). Call .shutdown() when done."""
+    server = FakeLLMServer(("127.0.0.1", port), **options)
+    threading.Thread(target=server.serve_forever, name="fake-llm-server", daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Groq/Gemini API server for offline benchmarks")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds before each reply (or first token)")
+    parser.add_argument("--token-latency", type=float, default=0.0, help="Seconds between streamed pieces")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered 429/503")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="Share of cases left out of multi-case replies")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    server = FakeLLMServer(("127.0.0.1", args.port), args.latency, args.error_rate, args.token_latency,
+                           args.drop_rate, args.seed)
+    print(f"🤖 Fake LLM server on {server.url} (latency {args.latency}s, errors {args.error_rate:.0%})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
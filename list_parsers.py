@@ -0,0 +1,228 @@
+"""
+Streaming parsers for the non-OFAC list formats: UN Security Council consolidated XML,
+EU Financial Sanctions Files XML and the UK OFSI consolidated CSV. Each yields entity dicts
+in the same shape as evidence_manager.build_entity (plus identifiers and dates of birth,
+used to recognise the same designee across lists). OFAC SDN and consolidated non-SDN share
+one schema and are parsed by evidence_manager.iter_sdn_entries.
+"""
+import csv
+import io
+import itertools
+import re
+import xml.etree.ElementTree as ET
+from datetime import datetime
+
+# OFSI has no UN reference column; it is published inside 'Other Information', e.g. "(UN Ref):KPi.001"
+UK_UN_REF = re.compile(r"UN Ref\)?\s*:?\s*([A-Z]{2,3}[a-z]\.\d+)", re.IGNORECASE)
+
+DATE_FORMATS = ("%Y-%m-%d", "%d %b %Y", "%d/%m/%Y", "%d-%m-%Y", "%b %Y", "%Y")
+
+
+def local_name(tag):
+    return tag.rsplit('}', 1)[-1]
+
+
+def normalize_identifier(number):
+    """Passport / national id / list reference as comparable text: upper-case alphanumerics only."""
+    return re.sub(r"[^A-Z0-9]", "", (number or "").upper())
+
+
+def normalize_dob(text):
+    """ISO date (or bare year) from the date layouts the lists use; None if unparseable."""
+    text = (text or "").strip()
+    for fmt in DATE_FORMATS:
+        try:
+            parsed = datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+        return str(parsed.year) if fmt == "%Y" else parsed.strftime("%Y-%m") if fmt == "%b %Y" else parsed.strftime("%Y-%m-%d")
+    # "circa 1964", "1964 to 1966": keep the first year
+    year = re.search(r"\b(19|20)\d{2}\b", text)
+    return year.group(0) if year else None
+
+
+def new_entity(source, uid):
+    return {
+        "source": source,
+        "id": uid,
+        "name": "Unknown",
+        "type": "Entity",
+        "programs": [],
+        "addresses": [],
+        "aliases": [],
+        "remarks": "",
+        "identifiers": [],
+        "dates_of_birth": [],
+    }
+
+
+def add_unique(values, value):
+    if value and value not in values:
+        values.append(value)
+
+
+def join_name(*parts):
+    return " ".join(p.strip() for p in parts if p and p.strip())
+
+
+# --- UN SECURITY COUNCIL (consolidated.xml) ---
+
+def build_un_entity(elem, source="UN"):
+    """One <INDIVIDUAL> or <ENTITY> element."""
+    def text(parent, tag):
+        node = parent.find(tag)
+        return node.text.strip() if node is not None and node.text else ""
+
+    individual = elem.tag == "INDIVIDUAL"
+    entity = new_entity(source, f"UN-{text(elem, 'DATAID') or 'N/A'}")
+    entity["type"] = "Individual" if individual else "Entity"
+    entity["name"] = join_name(*(text(elem, t) for t in ("FIRST_NAME", "SECOND_NAME", "THIRD_NAME", "FOURTH_NAME"))) \
+        or "Unknown"
+    entity["remarks"] = text(elem, "COMMENTS1")
+    add_unique(entity["programs"], text(elem, "UN_LIST_TYPE"))
+
+    reference = text(elem, "REFERENCE_NUMBER")
+    if reference:
+        entity["identifiers"].append(f"UN:{normalize_identifier(reference)}")
+
+    prefix = "INDIVIDUAL" if individual else "ENTITY"
+    for alias in elem.findall(f"{prefix}_ALIAS"):
+        name = text(alias, "ALIAS_NAME")
+        if name != entity["name"]:
+            add_unique(entity["aliases"], name)
+    for address in elem.findall(f"{prefix}_ADDRESS"):
+        country, city = text(address, "COUNTRY"), text(address, "CITY")
+        if country or city:
+            add_unique(entity["addresses"], f"{city}, {country or 'Unknown'}".strip(", "))
+    for nationality in elem.findall("NATIONALITY/VALUE"):
+        if nationality.text and not entity["addresses"]:
+            add_unique(entity["addresses"], nationality.text.strip())
+    for document in elem.findall("INDIVIDUAL_DOCUMENT"):
+        number = normalize_identifier(text(document, "NUMBER"))
+        if number:
+            add_unique(entity["identifiers"], number)
+    for dob in elem.findall("INDIVIDUAL_DATE_OF_BIRTH"):
+        add_unique(entity["dates_of_birth"], normalize_dob(text(dob, "DATE") or text(dob, "YEAR")))
+    return entity
+
+
+def iter_un_entries(source, source_tag="UN"):
+    """Streams <INDIVIDUAL> / <ENTITY> records out of the UN consolidated XML."""
+    root = None
+    for event, elem in ET.iterparse(source, events=("start", "end")):
+        if event == "start":
+            if root is None:
+                root = elem
+            continue
+        if elem.tag in ("INDIVIDUAL", "ENTITY"):
+            yield build_un_entity(elem, source_tag)
+            elem.clear()
+            # INDIVIDUALS / ENTITIES containers keep finished records until emptied
+            for container in root:
+                container.clear()
+
+
+# --- EUROPEAN UNION (Financial Sanctions Files XML) ---
+
+def build_eu_entity(elem, ns="", source="EU"):
+    """One <sanctionEntity> element; names, ids and addresses live in attributes."""
+    entity = new_entity(source, f"EU-{elem.get('logicalId', 'N/A')}")
+    subject = elem.find(ns + "subjectType")
+    entity["type"] = "Individual" if subject is not None and subject.get("code") == "person" else "Entity"
+
+    names = [a.get("wholeName") or join_name(a.get("firstName"), a.get("middleName"), a.get("lastName"))
+             for a in elem.findall(ns + "nameAlias")]
+    names = [n for n in names if n]
+    if names:
+        entity["name"] = names[0]
+        for name in names[1:]:
+            if name != entity["name"]:
+                add_unique(entity["aliases"], name)
+
+    for regulation in elem.findall(ns + "regulation"):
+        add_unique(entity["programs"], regulation.get("programme"))
+    if elem.get("unitedNationId"):
+        entity["identifiers"].append(f"UN:{normalize_identifier(elem.get('unitedNationId'))}")
+    for identification in elem.findall(ns + "identification"):
+        add_unique(entity["identifiers"], normalize_identifier(identification.get("number")))
+    for address in elem.findall(ns + "address"):
+        country, city = address.get("countryDescription") or "", address.get("city") or ""
+        if country or city:
+            add_unique(entity["addresses"], f"{city}, {country or 'Unknown'}".strip(", "))
+    for birth in elem.findall(ns + "birthdate"):
+        add_unique(entity["dates_of_birth"], normalize_dob(birth.get("birthdate") or birth.get("year")))
+    entity["remarks"] = " ".join(r.text.strip() for r in elem.findall(ns + "remark") if r.text)
+    return entity
+
+
+def iter_eu_entries(source, source_tag="EU"):
+    ns = ""
+    root = None
+    for event, elem in ET.iterparse(source, events=("start", "end")):
+        if event == "start":
+            if root is None:
+                root = elem
+                ns = elem.tag[:elem.tag.index('}') + 1] if '}' in elem.tag else ""
+            continue
+        if local_name(elem.tag) == "sanctionEntity":
+            yield build_eu_entity(elem, ns, source_tag)
+            elem.clear()
+            root.clear()
+
+
+# --- UNITED KINGDOM (OFSI ConList.csv) ---
+
+def uk_rows(source):
+    """csv.DictReader over the OFSI file, skipping its 'Last Updated' preamble line."""
+    if isinstance(source, str):
+        source = open(source, "rb")
+    text = io.TextIOWrapper(source, encoding="utf-8-sig", errors="replace", newline="")
+    first = text.readline()
+    if first.lower().startswith("last updated"):
+        return csv.DictReader(text)
+    # No preamble: that line was already the header
+    return csv.DictReader(itertools.chain([first], text))
+
+
+def iter_uk_entries(source, source_tag="UK"):
+    """
+    One row per name; rows sharing a 'Group ID' are one designee ('Primary name' row first
+    in practice, but any order is handled). Groups are emitted when the ID changes, so the
+    file streams as long as a group's rows are contiguous, as OFSI publishes them.
+    """
+    current, entity = None, None
+    for row in uk_rows(source):
+        group = (row.get("Group ID") or "").strip()
+        if not group:
+            continue
+        if group != current:
+            if entity:
+                yield entity
+            current = group
+            entity = new_entity(source_tag, f"UK-{group}")
+            entity["type"] = "Individual" if (row.get("Group Type") or "").strip() == "Individual" else "Entity"
+
+        name = join_name(*(row.get(f"Name {i}") for i in range(1, 6)), row.get("Name 6"))
+        if (row.get("Alias Type") or "").strip().lower().startswith("primary") or entity["name"] == "Unknown":
+            if entity["name"] != "Unknown":
+                add_unique(entity["aliases"], entity["name"])
+            entity["name"] = name or entity["name"]
+            if name in entity["aliases"]:
+                entity["aliases"].remove(name)
+        elif name != entity["name"]:
+            add_unique(entity["aliases"], name)
+
+        add_unique(entity["programs"], (row.get("Regime") or "").strip())
+        country, city = (row.get("Country") or "").strip(), (row.get("Address 6") or row.get("Address 5") or "").strip()
+        if country:
+            add_unique(entity["addresses"], f"{city}, {country}".strip(", "))
+        for field in ("Passport Number", "National Identification Number"):
+            add_unique(entity["identifiers"], normalize_identifier(row.get(field)))
+        un_ref = UK_UN_REF.search(row.get("Other Information") or "")
+        if un_ref:
+            add_unique(entity["identifiers"], f"UN:{normalize_identifier(un_ref.group(1))}")
+        add_unique(entity["dates_of_birth"], normalize_dob(row.get("DOB")))
+        if row.get("Other Information") and not entity["remarks"]:
+            entity["remarks"] = row["Other Information"].strip()
+    if entity:
+        yield entity
@@ -0,0 +1,155 @@
+"""
+Lightweight in-process metrics: counters and timers keyed by name + labels, exported as
+Prometheus text or JSON lines, with an optional per-observation trace file. When disabled,
+timer() hands back a shared no-op context manager and count()/observe() return at once.
+Set SANCTIONGUARD_METRICS=0 to start disabled.
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+PREFIX = "sanctionguard_"
+NULL_TIMER = nullcontext()
+
+
+def label_key(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def escape_label(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def prometheus_labels(key):
+    if not key:
+        return ""
+    return "{" + ",".join(f'{k}="{escape_label(v)}"' for k, v in key) + "}"
+
+
+class Metrics:
+    def __init__(self, enabled=True, trace_path=None):
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self.counters = {}
+        # (name, labels) -> [count, total seconds, max seconds]
+        self.timers = {}
+        self.trace_file = None
+        if trace_path:
+            self.trace_to(trace_path)
+
+    # --- RECORDING ---
+
+    def count(self, name, value=1, **labels):
+        if not self.enabled:
+            return
+        key = (name, label_key(labels))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, seconds, **labels):
+        if not self.enabled:
+            return
+        key = (name, label_key(labels))
+        with self.lock:
+            timer = self.timers.setdefault(key, [0, 0.0, 0.0])
+            timer[0] += 1
+            timer[1] += seconds
+            timer[2] = max(timer[2], seconds)
+            if self.trace_file:
+                self.trace_file.write(json.dumps({"ts": time.time(), "metric": name, "labels": dict(key[1]),
+                                                  "seconds": round(seconds, 6)}) + "\n")
+
+    def timer(self, name, **labels):
+        """`with metrics.timer("stage_seconds", mode="batch"):` records the block's wall time."""
+        if not self.enabled:
+            return NULL_TIMER
+        return self._timed(name, labels)
+
+    @contextmanager
+    def _timed(self, name, labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def trace_to(self, path):
+        """Appends one JSON line per timed observation to `path` (None stops tracing)."""
+        with self.lock:
+            if self.trace_file:
+                self.trace_file.close()
+            self.trace_file = open(path, "a", encoding="utf-8") if path else None
+
+    def reset(self):
+        with self.lock:
+            self.counters.clear()
+            self.timers.clear()
+
+    # --- EXPORT ---
+
+    def snapshot(self):
+        with self.lock:
+            return {"counters": dict(self.counters), "timers": {k: list(v) for k, v in self.timers.items()}}
+
+    def summary(self, since=None):
+        """Rows of {metric, labels, count, total_s, mean_ms} since an earlier snapshot() (or since start)."""
+        now = self.snapshot()
+        before = since or {"counters": {}, "timers": {}}
+        rows = []
+        for (name, key), (n, total, _) in sorted(now["timers"].items()):
+            n0, total0, _ = before["timers"].get((name, key), (0, 0.0, 0.0))
+            if n > n0:
+                rows.append({"metric": name, "labels": ", ".join(f"{k}={v}" for k, v in key), "count": n - n0,
+                             "total_s": round(total - total0, 3), "mean_ms": round((total - total0) / (n - n0) * 1000, 2)})
+        for (name, key), value in sorted(now["counters"].items()):
+            delta = value - before["counters"].get((name, key), 0)
+            if delta:
+                rows.append({"metric": name, "labels": ", ".join(f"{k}={v}" for k, v in key), "count": delta,
+                             "total_s": None, "mean_ms": None})
+        return rows
+
+    def to_prometheus(self):
+        """Prometheus text exposition: counters as *_total, timers as *_count / *_sum / *_max."""
+        snap = self.snapshot()
+        lines = []
+        for name in sorted({n for n, _ in snap["counters"]}):
+            lines.append(f"# TYPE {PREFIX}{name}_total counter")
+            lines += [f"{PREFIX}{name}_total{prometheus_labels(key)} {value:g}"
+                      for (n, key), value in sorted(snap["counters"].items()) if n == name]
+        for name in sorted({n for n, _ in snap["timers"]}):
+            series = [(prometheus_labels(key), timer) for (n, key), timer in sorted(snap["timers"].items()) if n == name]
+            lines.append(f"# TYPE {PREFIX}{name} summary")
+            for labels, (count, total, _) in series:
+                lines.append(f"{PREFIX}{name}_count{labels} {count}")
+                lines.append(f"{PREFIX}{name}_sum{labels} {total:.6f}")
+            # The slowest observation is its own gauge family
+            lines.append(f"# TYPE {PREFIX}{name}_max gauge")
+            lines += [f"{PREFIX}{name}_max{labels} {peak:.6f}" for labels, (_, _, peak) in series]
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        """Atomic write, so a node_exporter textfile collector never reads half a file."""
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp, path)
+
+    def export_jsonl(self, path, **run):
+        """Appends one JSON line per series (plus `run` fields such as a run id) to `path`."""
+        snap = self.snapshot()
+        now = time.time()
+        with open(path, "a", encoding="utf-8") as f:
+            for (name, key), value in sorted(snap["counters"].items()):
+                f.write(json.dumps({"ts": now, **run, "metric": name, "labels": dict(key), "value": value}) + "\n")
+            for (name, key), (count, total, peak) in sorted(snap["timers"].items()):
+                f.write(json.dumps({"ts": now, **run, "metric": name, "labels": dict(key), "count": count,
+                                    "sum": round(total, 6), "max": round(peak, 6)}) + "\n")
+        with self.lock:
+            if self.trace_file:
+                self.trace_file.flush()
+
+
+# Process-wide registry used by the tribunal, the batch runner and the app
+METRICS = Metrics(enabled=os.getenv("SANCTIONGUARD_METRICS", "1") != "0")
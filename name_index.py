@@ -0,0 +1,149 @@
+import re
+import unicodedata
+from collections import Counter, defaultdict
+from itertools import combinations
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Soundex digit for each consonant; vowels and h/w/y carry no code.
+SOUNDEX_CODES = {
+    **dict.fromkeys("bfpv", "1"),
+    **dict.fromkeys("cgjkqsxz", "2"),
+    **dict.fromkeys("dt", "3"),
+    "l": "4",
+    **dict.fromkeys("mn", "5"),
+    "r": "6",
+}
+
+
+def normalize_name(name):
+    """Lowercases, folds accents and drops punctuation so queries and list names line up."""
+    text = unicodedata.normalize("NFKD", name or "")
+    text = text.encode("ascii", "ignore").decode("ascii").lower()
+    return " ".join(TOKEN_RE.findall(text))
+
+
+# Legal-form tokens that say nothing about who the counterparty is
+LEGAL_SUFFIXES = {
+    "llc", "ltd", "limited", "inc", "incorporated", "corp", "corporation", "co", "company", "plc",
+    "llp", "lp", "gmbh", "ag", "sa", "sarl", "srl", "spa", "bv", "nv", "oy", "ab", "as", "pte",
+    "pvt", "jsc", "ojsc", "pjsc", "cjsc", "ooo", "zao", "oao", "fze", "fzc", "fzco", "fzllc",
+}
+
+
+def dedup_key(name):
+    """
+    Grouping key for input de-duplication: normalize_name(), legal suffixes dropped, tokens sorted.
+    "Acme Trading, L.L.C." and "ACME TRADING LLC" share a key. A name made only of legal
+    tokens keeps them.
+    """
+    # Dotted abbreviations (L.L.C., S.A.) collapse to one token before matching suffixes
+    tokens = normalize_name(re.sub(r"(?<=\b\w)\.(?=\w\b)", "", name or "")).split()
+    kept = [t for t in tokens if t not in LEGAL_SUFFIXES] or tokens
+    return " ".join(sorted(kept))
+
+
+def char_ngrams(text, n=3):
+    padded = f" {text} "
+    return {padded[i:i + n] for i in range(len(padded) - n + 1)}
+
+
+def soundex(token):
+    """Classic 4-character Soundex key, used to catch transliteration variants (Mohammed/Muhamad)."""
+    if not token:
+        return ""
+    if token[0].isdigit():
+        return token
+    key = token[0]
+    last = SOUNDEX_CODES.get(token[0], "")
+    for ch in token[1:]:
+        code = SOUNDEX_CODES.get(ch, "")
+        if code and code != last:
+            key += code
+        if ch not in "hw":
+            last = code
+    return (key + "000")[:4]
+
+
+class CandidateIndex:
+    """
+    Blocking index for Tier 1. Holds token, phonetic and character n-gram postings
+    over the list names so a query only has to be fuzzy-scored against a short
+    candidate set instead of the whole sanctions list.
+    """
+
+    def __init__(self, names, ngram=3, max_candidates=256, max_posting_ratio=0.05, max_subset_tokens=8,
+                 normalized=None):
+        self.size = len(names)
+        self.ngram = ngram
+        self.max_candidates = max_candidates
+        self.max_subset_tokens = max_subset_tokens
+        # Postings longer than this (e.g. "llc", "company") are too common to narrow anything down
+        self.max_postings = max(64, int(self.size * max_posting_ratio))
+
+        self.token_postings = defaultdict(list)
+        self.phonetic_postings = defaultdict(list)
+        self.gram_postings = defaultdict(list)
+        # token_set_ratio scores 100 when a list name's tokens are a subset of the query,
+        # so names are also keyed by their whole token set ("TRADING" inside "X TRADING CO")
+        self.token_set_postings = defaultdict(list)
+        self.gram_counts = []
+        # Precomputed normalize_name() output (e.g. from the sanctions store) skips re-normalizing
+        if normalized is None:
+            normalized = [normalize_name(name) for name in names]
+        for row, norm in enumerate(normalized):
+            tokens = set(norm.split())
+            for token in tokens:
+                self.token_postings[token].append(row)
+            for key in {soundex(t) for t in tokens}:
+                self.phonetic_postings[key].append(row)
+            if tokens:
+                self.token_set_postings[" ".join(sorted(tokens))].append(row)
+            grams = char_ngrams(norm, self.ngram)
+            for gram in grams:
+                self.gram_postings[gram].append(row)
+            self.gram_counts.append(len(grams))
+
+    def candidates(self, query):
+        """
+        Returns the sorted row ids worth scoring for `query`, or None when the query
+        has no selective feature and the caller should fall back to a full scan.
+        """
+        norm = normalize_name(query)
+        if not norm:
+            return None
+
+        tokens = sorted(set(norm.split()))
+        rows = set()
+        if len(tokens) <= self.max_subset_tokens:
+            for size in range(1, len(tokens) + 1):
+                for subset in combinations(tokens, size):
+                    rows.update(self.token_set_postings.get(" ".join(subset), ()))
+
+        for token in tokens:
+            for postings in (self.token_postings.get(token), self.phonetic_postings.get(soundex(token))):
+                if postings and len(postings) <= self.max_postings:
+                    rows.update(postings)
+
+        # Rank rows by n-gram overlap (Dice); typos still keep most of the grams
+        query_grams = char_ngrams(norm, self.ngram)
+        votes = Counter()
+        seen = common = 0
+        for gram in query_grams:
+            postings = self.gram_postings.get(gram)
+            if postings is None:
+                continue
+            seen += 1
+            if len(postings) > self.max_postings:
+                common += 1
+            else:
+                votes.update(postings)
+
+        # Short or generic queries ("UMRI", "Trading Co") leave too little signal to block on safely
+        if common * 2 >= seen or not (rows or votes):
+            return None
+
+        total = len(query_grams)
+        ranked = sorted(votes, key=lambda r: votes[r] / (total + self.gram_counts[r]), reverse=True)
+        rows.update(ranked[:self.max_candidates])
+        return sorted(rows)
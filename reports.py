@@ -0,0 +1,193 @@
+"""
+PDF case reports (kept out of app.py so batch jobs and benchmarks can render them without Streamlit).
+Bulk case files for a batch run are rendered across a process pool and streamed into a ZIP,
+or written as one combined, paginated PDF.
+"""
+import copy
+import multiprocessing
+import os
+import re
+import time
+import zipfile
+from datetime import datetime
+from functools import lru_cache
+from fpdf import FPDF
+
+from budget import PENDING_REVIEW
+from triage import AMBIGUOUS
+
+BATCH_NOTE = "Not argued: judged in a multi-case batch call."
+# Below this many cases a process pool costs more to start than it saves
+MIN_POOL_CASES = 200
+
+def clean_text(text):
+    """Sanitizes text for FPDF to prevent crashes with emojis/smart quotes."""
+    if not isinstance(text, str): return str(text)
+    replacements = {
+        '\u2018': "'", '\u2019': "'", '\u201c': '"', '\u201d': '"', 
+        '\u2013': '-', '\u00a0': ' ', '\t': ' '
+    }
+    for old, new in replacements.items(): text = text.replace(old, new)
+    return text.encode('latin-1', 'replace').decode('latin-1')
+
+class PDFReport(FPDF):
+    def header(self):
+        self.set_font('Arial', 'B', 12)
+        self.cell(0, 10, 'SanctionGuard AI // Tribunal Record', 0, 1, 'C')
+        self.ln(5)
+    def footer(self):
+        self.set_y(-15)
+        self.set_font('Arial', 'I', 8)
+        self.cell(0, 10, f'Page {self.page_no()}', 0, 0, 'C')
+
+# FPDF (1.7) state filled in per document; everything else is set up once by report_shell()
+DOCUMENT_STATE = ("offsets", "pages", "orientation_changes", "fonts", "font_files", "diffs", "images",
+                  "page_links", "links")
+
+@lru_cache(maxsize=None)
+def report_shell():
+    """The configured blank report, built once per process."""
+    pdf = PDFReport()
+    pdf.set_auto_page_break(auto=True, margin=15)
+    return pdf
+
+def new_report():
+    """A blank document: a copy of report_shell() with fresh per-document state."""
+    pdf = copy.copy(report_shell())
+    for name in DOCUMENT_STATE:
+        setattr(pdf, name, {})
+    return pdf
+
+def render_case(pdf, case_data):
+    """Writes one case onto `pdf`, starting a new page (so many cases can share one document)."""
+    pdf.add_page()
+    
+    # Title
+    pdf.set_font("Arial", "B", 16)
+    pdf.cell(0, 10, f"CASE: {clean_text(case_data['target_name']).upper()}", ln=True)
+    pdf.set_font("Arial", "", 10)
+    pdf.cell(0, 10, f"ID: {hash(case_data['target_name']) % 10000} | Date: {datetime.now().strftime('%Y-%m-%d')}", ln=True)
+    
+    # Dynamic Line
+    current_y = pdf.get_y()
+    pdf.line(10, current_y, 200, current_y)
+    pdf.ln(5)
+    
+    # Verdict Highlight
+    pdf.set_font("Arial", "B", 14)
+    if "HIGH" in case_data['verdict']: pdf.set_text_color(255, 0, 0)
+    else: pdf.set_text_color(0, 150, 0)
+    pdf.cell(0, 10, clean_text(f"VERDICT: {case_data['verdict']} ({case_data['confidence']}%)"), ln=True)
+    pdf.set_text_color(0, 0, 0)
+    
+    # Details
+    pdf.set_font("Arial", "", 10)
+    details = f"Match: {case_data['match_name']} ({case_data['match_score']}%)\nReasoning: {case_data['reasoning']}"
+    pdf.multi_cell(0, 6, clean_text(details))
+    pdf.ln(5)
+    
+    # Arguments
+    pdf.set_font("Arial", "B", 10)
+    pdf.set_text_color(200, 50, 50)
+    pdf.cell(0, 6, "PROSECUTION:", ln=True)
+    pdf.set_font("Arial", "", 9)
+    pdf.set_text_color(0,0,0)
+    pdf.multi_cell(0, 5, clean_text(case_data['pros_arg']))
+    pdf.ln(3)
+    
+    pdf.set_font("Arial", "B", 10)
+    pdf.set_text_color(50, 50, 200)
+    pdf.cell(0, 6, "DEFENSE:", ln=True)
+    pdf.set_font("Arial", "", 9)
+    pdf.set_text_color(0,0,0)
+    pdf.multi_cell(0, 5, clean_text(case_data['def_arg']))
+
+def create_pdf_report(case_data):
+    pdf = new_report()
+    render_case(pdf, case_data)
+    return pdf.output(dest='S').encode('latin-1', 'replace')
+
+# --- BULK CASE FILES ---
+
+def batch_case(name, match, score, verdict, country=""):
+    """case_data for a flagged batch row (batch verdicts carry no prosecution/defense arguments)."""
+    if not isinstance(verdict, dict):
+        verdict = {"verdict": "ERROR", "confidence": 0, "reasoning": str(verdict)}
+    rule = verdict.get('rule', AMBIGUOUS)
+    note = BATCH_NOTE if rule == AMBIGUOUS else f"Settled by triage rule {rule} (no LLM call)."
+    if verdict.get('verdict') == PENDING_REVIEW:
+        note = "Not argued: the Tier 2 budget ran out before this case was reached."
+    return {
+        "target_name": name, "target_country": country or "",
+        "match_name": match['name'], "match_score": int(score),
+        "pros_arg": note, "def_arg": note,
+        "verdict": verdict.get('verdict', 'UNKNOWN'), "confidence": verdict.get('confidence', 0),
+        "reasoning": verdict.get('reasoning', ''),
+    }
+
+def case_filename(index, case_data):
+    safe = re.sub(r"[^A-Za-z0-9]+", "_", case_data['target_name']).strip("_")[:60] or "case"
+    return f"{index + 1:05d}_SanctionGuard_Case_{safe}.pdf"
+
+def _render_cases(indexed):
+    """Renders (index, case_data) pairs one document each, yielding (filename, bytes, pages) as each is done."""
+    for index, case_data in indexed:
+        pdf = new_report()
+        render_case(pdf, case_data)
+        yield case_filename(index, case_data), pdf.output(dest='S').encode('latin-1', 'replace'), pdf.page_no()
+
+def _render_chunk(chunk):
+    """Worker: one chunk of _render_cases, returned whole to the parent."""
+    return list(_render_cases(chunk))
+
+def iter_rendered(cases, workers=None, chunksize=16):
+    """
+    Yields (filename, bytes, pages) in input order. Chunks of cases go to a spawned process
+    pool; small jobs (or workers=1) render in-process, where pool startup would dominate,
+    and each PDF is yielded as soon as it is rendered.
+    """
+    indexed = list(enumerate(cases))
+    chunks = [indexed[i:i + chunksize] for i in range(0, len(indexed), chunksize)]
+    workers = min(workers or os.cpu_count() or 1, len(chunks))
+    if workers <= 1 or len(cases) < MIN_POOL_CASES:
+        yield from _render_cases(indexed)
+        return
+    with multiprocessing.get_context("spawn").Pool(workers) as pool:
+        for rendered in pool.imap(_render_chunk, chunks):
+            yield from rendered
+
+def write_case_zip(cases, out, workers=None, chunksize=16, progress=None):
+    """
+    Streams one PDF per case into a ZIP at `out` (a path or a binary file object). Each PDF is
+    written and released as soon as it arrives, so memory stays at a few chunks, not the whole run.
+    Returns {reports, pages, seconds, pages_per_sec}.
+    """
+    start = time.perf_counter()
+    reports = pages = 0
+    # PDFs are already deflated internally; storing them skips a second, useless compression pass
+    with zipfile.ZipFile(out, "w", compression=zipfile.ZIP_STORED) as archive:
+        for filename, data, page_count in iter_rendered(cases, workers, chunksize):
+            archive.writestr(filename, data)
+            reports += 1
+            pages += page_count
+            if progress:
+                progress(reports, len(cases))
+    return render_stats(reports, pages, time.perf_counter() - start)
+
+def write_case_book(cases, path, progress=None):
+    """
+    One combined, paginated PDF of every case (shared fonts and header, continuous page numbers).
+    FPDF keeps pages until output, so this renders in one process; use write_case_zip for large runs.
+    """
+    start = time.perf_counter()
+    pdf = new_report()
+    for done, case_data in enumerate(cases, 1):
+        render_case(pdf, case_data)
+        if progress:
+            progress(done, len(cases))
+    pdf.output(path, 'F')
+    return render_stats(len(cases), pdf.page_no(), time.perf_counter() - start)
+
+def render_stats(reports, pages, seconds):
+    return {"reports": reports, "pages": pages, "seconds": round(seconds, 3),
+            "pages_per_sec": round(pages / seconds, 1) if seconds else None}
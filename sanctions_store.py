@@ -0,0 +1,222 @@
+"""
+Binary sanctions store (.sgdb): a memory-mapped replacement for the indent=4 JSON database.
+Entity records stay in the mapping and are decoded one at a time when a row is looked at.
+Not everything is shared, though: each process that opens the store decodes the name, id
+and normalized-name columns into Python lists (EntityRecords, SanctionTribunal.build_tables)
+and builds its own CandidateIndex from them, so those columns and the index cost memory and
+load time per process, in proportion to the number of names. The record JSON is what the
+mapping saves.
+"""
+import argparse
+import json
+import mmap
+import os
+import struct
+from collections.abc import Sequence
+
+import numpy as np
+
+from name_index import normalize_name
+
+# --- FILE LAYOUT ---
+# MAGIC | header length (u64) | header JSON | 8-byte aligned sections
+# String columns are one UTF-8 blob (values joined by SEP) plus u64 byte offsets (n + 1),
+# so a value can be sliced out directly or the whole column decoded in one split.
+MAGIC = b"SGDB\x00\x00\x00\x01"
+SEP = "\x1f"
+STRING_COLUMNS = ("names", "norm_names", "ids")
+STORE_FILE = "consolidated_sanctions.sgdb"
+
+
+def _pack_column(values):
+    encoded = [v.replace(SEP, " ").encode("utf-8") for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype="<u8")
+    # Each value is followed by a 1-byte separator
+    np.cumsum([len(e) + 1 for e in encoded], out=offsets[1:])
+    return SEP.encode().join(encoded) + (SEP.encode() if encoded else b""), offsets
+
+
+def flatten_names(entities):
+    """
+    Flat name table grouped by entity: each entity's primary name followed by its aliases.
+    Returns (names, starts) where entity i owns names[starts[i]:starts[i + 1]].
+    """
+    names = []
+    starts = np.zeros(len(entities) + 1, dtype="<u4")
+    for i, e in enumerate(entities):
+        names.append(e["name"])
+        names.extend(a for a in dict.fromkeys(e.get("aliases", ())) if a != e["name"])
+        starts[i + 1] = len(names)
+    return names, starts
+
+
+def write_store(path, db):
+    """Writes a consolidated DB dict (the JSON shape) to the binary store, atomically."""
+    entities = db["entities"]
+    names, starts = flatten_names(entities)
+    columns = {
+        # Primary names and aliases share one flat table; name_starts maps it back to entities
+        "names": names,
+        "norm_names": [normalize_name(n) for n in names],
+        "ids": [str(e["id"]) for e in entities],
+        # Everything except name/id is only needed once a row is looked at
+        "records": [json.dumps({k: v for k, v in e.items() if k not in ("name", "id")}, separators=(",", ":"))
+                    for e in entities],
+    }
+
+    sections = [("name_starts", starts.tobytes())]
+    for column, values in columns.items():
+        blob, offsets = _pack_column(values)
+        sections.append((column, blob))
+        sections.append((column + "_offsets", offsets.tobytes()))
+
+    meta = {k: v for k, v in db.items() if k != "entities"}
+    layout = {}
+    # Section positions depend on the header length, which depends on the positions: iterate to a fixed point
+    while True:
+        header = json.dumps({"count": len(entities), "name_count": len(names), "meta": meta,
+                             "sections": layout}).encode("utf-8")
+        position = len(MAGIC) + 8 + len(header)
+        placed = {}
+        for name, data in sections:
+            position += -position % 8
+            placed[name] = [position, len(data)]
+            position += len(data)
+        if placed == layout:
+            break
+        layout = placed
+
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(MAGIC + struct.pack("<Q", len(header)) + header)
+        for name, data in sections:
+            f.write(b"\x00" * (layout[name][0] - f.tell()))
+            f.write(data)
+    os.replace(tmp, path)
+
+
+class EntityRecords(Sequence):
+    """
+    Entity dicts decoded on access from the mapped store. Names, ids and the flat name table
+    are decoded into plain lists once per process (see the module docstring).
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.name_table = store.column("names")
+        self.name_starts = store.name_starts
+        # Primary names are the same str objects as in the flat table, not copies
+        self.names = [self.name_table[s] for s in self.name_starts[:-1].tolist()]
+        self.ids = store.column("ids")
+
+    def __len__(self):
+        return self.store.count
+
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            return [self[i] for i in range(*row.indices(len(self)))]
+        if row < 0:
+            row += len(self)
+        record = json.loads(self.store.value("records", row))
+        return {"id": self.ids[row], "name": self.names[row], **record}
+
+
+class SanctionsStore:
+    """
+    Read-only, memory-mapped view of the binary sanctions store. Every process that
+    opens the same file shares one page-cached copy of the file; records are decoded lazily.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.mm[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a SanctionGuard store")
+        (header_len,) = struct.unpack_from("<Q", self.mm, len(MAGIC))
+        start = len(MAGIC) + 8
+        header = json.loads(self.mm[start:start + header_len])
+        self.count = header["count"]
+        self.name_count = header.get("name_count", self.count)
+        self.meta = header["meta"]
+        self.sections = header["sections"]
+        counts = {"names": self.name_count, "norm_names": self.name_count}
+        self.offsets = {
+            column: np.frombuffer(self.mm, dtype="<u8", count=counts.get(column, self.count) + 1,
+                                  offset=self.sections[column + "_offsets"][0])
+            for column in (*STRING_COLUMNS, "records")
+        }
+        if "name_starts" in self.sections:
+            self.name_starts = np.frombuffer(self.mm, dtype="<u4", count=self.count + 1,
+                                             offset=self.sections["name_starts"][0])
+        else:
+            # Stores written before aliases: one name per entity
+            self.name_starts = np.arange(self.count + 1, dtype="<u4")
+        self.entities = EntityRecords(self)
+
+    def value(self, column, row):
+        base = self.sections[column][0]
+        offsets = self.offsets[column]
+        # Stored end offset includes the trailing separator
+        return self.mm[base + int(offsets[row]):base + int(offsets[row + 1]) - 1].decode("utf-8")
+
+    def column(self, column):
+        """Decodes a whole string column in one pass."""
+        base, length = self.sections[column]
+        if not length:
+            return []
+        return self.mm[base:base + length - 1].decode("utf-8").split(SEP)
+
+    def to_dict(self):
+        return {**self.meta, "entities": list(self.entities)}
+
+
+def open_database(path):
+    """
+    Loads the sanctions DB as {last_updated, risk_definitions, entities}. Binary stores are
+    memory-mapped (entities is an EntityRecords); .json files are loaded as before.
+    A missing store falls back to the JSON file of the same name.
+    """
+    if not path.endswith(".json") and not os.path.exists(path):
+        json_path = os.path.splitext(path)[0] + ".json"
+        if os.path.exists(json_path):
+            path = json_path
+    if path.endswith(".json"):
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    store = SanctionsStore(path)
+    return {**store.meta, "entities": store.entities}
+
+
+def export_json(store_path, json_path):
+    """Auditor export: the store as the original indented JSON document."""
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(SanctionsStore(store_path).to_dict(), f, indent=4)
+
+
+def import_json(json_path, store_path):
+    with open(json_path, "r", encoding="utf-8") as f:
+        write_store(store_path, json.load(f))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert between the binary sanctions store and JSON")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("export", help="store -> JSON (for auditors)")
+    p.add_argument("store")
+    p.add_argument("json")
+    p = sub.add_parser("import", help="JSON -> store")
+    p.add_argument("json")
+    p.add_argument("store")
+    args = parser.parse_args()
+
+    if args.command == "export":
+        export_json(args.store, args.json)
+        print(f"✅ Exported {args.store} -> {args.json}")
+    else:
+        import_json(args.json, args.store)
+        print(f"✅ Imported {args.json} -> {args.store}")
+
+
+if __name__ == "__main__":
+    main()
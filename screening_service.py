@@ -0,0 +1,324 @@
+"""
+Shared screening service: one SanctionTribunal (one index, one verdict cache, one set of LLM
+SDK clients and their connection pools) for every analyst, instead of one per Streamlit worker.
+
+    python screening_service.py --port 8770            (or --unix /tmp/sanctionguard.sock)
+    SANCTIONGUARD_SERVICE=127.0.0.1:8770 streamlit run app.py
+
+Concurrent single searches are collected into micro-batches for Tier 1 (scan_many), and
+identical Tier 2 requests already in flight share one tribunal run.
+Protocol: one JSON object per line each way, {"id", "op", ...} -> {"id", "result"} or {"id", "error"};
+requests on one connection may be pipelined and are answered as they finish.
+"""
+import argparse
+import asyncio
+import json
+import os
+import queue
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from metrics import METRICS
+from name_index import normalize_name
+
+DEFAULT_PORT = 8770
+
+
+def json_default(value):
+    """numpy scalars (scores, ids) from Tier 1 -> plain Python."""
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def encode(message):
+    return (json.dumps(message, default=json_default, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+class ScreeningService:
+    """
+    Wraps one tribunal. Tier 1 requests wait up to `batch_window` seconds (or until `max_batch`
+    have queued) and are scored together; Tier 2 runs on `tier2_workers` threads, keyed like the
+    verdict cache so duplicates in flight are coalesced. Batch screens get their own
+    `screen_workers` threads, so a long upload never holds up single-case tribunals.
+    """
+
+    def __init__(self, tribunal, max_batch=64, batch_window=0.005, tier2_workers=8, screen_workers=2):
+        self.tribunal = tribunal
+        self.max_batch = max_batch
+        self.batch_window = batch_window
+        self.tier1_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tier1")
+        self.tier2_pool = ThreadPoolExecutor(max_workers=tier2_workers, thread_name_prefix="tier2")
+        self.screen_pool = ThreadPoolExecutor(max_workers=screen_workers, thread_name_prefix="screen")
+        self.scan_queue = None
+        self.in_flight = {}
+        self.stats = {"requests": 0, "batches": 0, "batched_queries": 0, "max_batch": 0, "convened": 0, "coalesced": 0}
+
+    # --- TIER 1: MICRO-BATCHING ---
+
+    async def scan(self, name):
+        future = asyncio.get_running_loop().create_future()
+        await self.scan_queue.put((name, future))
+        return await future
+
+    async def batcher(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.scan_queue.get()]
+            deadline = loop.time() + self.batch_window
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.scan_queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            self.stats["batches"] += 1
+            self.stats["batched_queries"] += len(batch)
+            self.stats["max_batch"] = max(self.stats["max_batch"], len(batch))
+            METRICS.count("service_tier1_batches")
+            try:
+                found = await loop.run_in_executor(self.tier1_pool, self.tribunal.scan_many, [n for n, _ in batch])
+            except Exception as e:
+                found = [e] * len(batch)
+            for (_, future), result in zip(batch, found):
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+    # --- TIER 2: IN-FLIGHT COALESCING ---
+
+    async def convene(self, name, match, score, country):
+        key = (normalize_name(name), match['id'], country or "")
+        shared = self.in_flight.get(key)
+        if shared is not None:
+            self.stats["coalesced"] += 1
+            METRICS.count("service_tier2_requests", outcome="coalesced")
+            return await asyncio.shield(shared)
+
+        self.stats["convened"] += 1
+        METRICS.count("service_tier2_requests", outcome="convened")
+        shared = asyncio.get_running_loop().run_in_executor(
+            self.tier2_pool, self.tribunal.convene, name, match, score, country)
+        self.in_flight[key] = shared
+        try:
+            return await asyncio.shield(shared)
+        finally:
+            if self.in_flight.get(key) is shared:
+                del self.in_flight[key]
+
+    async def screen(self, names, threshold, countries=None, limits=None):
+        from batch_runner import screen_names
+        from budget import Tier2Budget
+
+        # Each screen request is one run with its own budget
+        budget = Tier2Budget(**limits) if limits else None
+        screened = await asyncio.get_running_loop().run_in_executor(
+            self.screen_pool, lambda: screen_names(self.tribunal, names, threshold, countries=countries, budget=budget))
+        # Failed verdicts are exceptions; they travel as their message (the app treats non-dicts as ERROR)
+        screened["verdicts"] = [v if isinstance(v, dict) else f"{type(v).__name__}: {v}" for v in screened["verdicts"]]
+        return screened
+
+    def status(self):
+        tribunal = self.tribunal
+        loaded = tribunal.loaded.is_set() and tribunal.load_error is None
+        error = tribunal.load_error if tribunal.loaded.is_set() else None
+        return {
+            "loaded": loaded,
+            # The client shows this instead of waiting for a load that already failed
+            "load_error": f"{type(error).__name__}: {error}" if error is not None else None,
+            "keys_configured": tribunal.keys_configured(),
+            "entities": len(tribunal.entity_names) if loaded else None,
+            "list_version": tribunal.data.get('version', 0) if loaded else None,
+            "verdict_cache": tribunal.verdict_cache.stats() if loaded else None,
+            "latency": tribunal.latency_summary(),
+            "service": dict(self.stats),
+        }
+
+    # --- PROTOCOL ---
+
+    async def dispatch(self, request):
+        op = request.get("op")
+        if op == "scan":
+            match, score = await self.scan(request["name"])
+            return {"match": match, "score": score}
+        if op == "convene":
+            return await self.convene(request["name"], request["match"], request["score"], request.get("country"))
+        if op == "screen":
+            return await self.screen(request["names"], request["threshold"], request.get("countries"), request.get("limits"))
+        if op == "status":
+            return self.status()
+        if op == "cache_stats":
+            # Waits for the index to finish loading, like the local tribunal does
+            return await asyncio.get_running_loop().run_in_executor(None, self.tribunal.cache_stats)
+        raise ValueError(f"Unknown op {op!r}")
+
+    async def answer(self, request, writer, write_lock):
+        self.stats["requests"] += 1
+        try:
+            reply = {"id": request.get("id"), "result": await self.dispatch(request)}
+        except Exception as e:
+            reply = {"id": request.get("id"), "error": f"{type(e).__name__}: {e}"}
+        async with write_lock:
+            writer.write(encode(reply))
+            await writer.drain()
+
+    async def handle(self, reader, writer):
+        write_lock = asyncio.Lock()
+        tasks = set()
+        try:
+            while line := await reader.readline():
+                try:
+                    request = json.loads(line)
+                except json.JSONDecodeError as e:
+                    request = {"op": None, "error": str(e)}
+                task = asyncio.create_task(self.answer(request, writer, write_lock))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host="127.0.0.1", port=DEFAULT_PORT, unix_path=None, ready=None):
+        self.scan_queue = asyncio.Queue()
+        batcher = asyncio.create_task(self.batcher())
+        if unix_path:
+            if os.path.exists(unix_path):
+                os.remove(unix_path)
+            server = await asyncio.start_unix_server(self.handle, path=unix_path, limit=2**24)
+        else:
+            server = await asyncio.start_server(self.handle, host, port, limit=2**24)
+        if ready:
+            ready(server)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            batcher.cancel()
+
+
+class ScreeningClient:
+    """
+    Thin, thread-safe client with the slice of the SanctionTribunal interface the app uses.
+    `address` is "host:port" or "unix:/path". Connections are pooled and kept open.
+    Tier 2 replies arrive whole, so convene() does not stream tokens.
+    """
+
+    def __init__(self, address, timeout=300):
+        self.address = address
+        self.timeout = timeout
+        self.pool = queue.LifoQueue()
+        self.next_id = 0
+        self.id_lock = threading.Lock()
+        self.loaded = threading.Event()
+        self.load_error = None
+        self.status()
+
+    def connect(self):
+        if self.address.startswith("unix:"):
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.address[len("unix:"):])
+        else:
+            host, port = self.address.rsplit(":", 1)
+            sock = socket.create_connection((host, int(port)), timeout=self.timeout)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return sock, sock.makefile("rb")
+
+    def call(self, op, **args):
+        with self.id_lock:
+            self.next_id += 1
+            request_id = self.next_id
+        try:
+            conn = self.pool.get_nowait()
+        except queue.Empty:
+            conn = self.connect()
+        sock, reader = conn
+        try:
+            sock.sendall(encode({"id": request_id, "op": op, **args}))
+            line = reader.readline()
+            if not line:
+                raise ConnectionError("Screening service closed the connection")
+        except Exception:
+            sock.close()
+            raise
+        self.pool.put(conn)
+        reply = json.loads(line)
+        if "error" in reply:
+            raise RuntimeError(f"Screening service: {reply['error']}")
+        return reply["result"]
+
+    def close(self):
+        while not self.pool.empty():
+            self.pool.get_nowait()[0].close()
+
+    # --- SanctionTribunal-shaped API ---
+
+    def status(self):
+        status = self.call("status")
+        self.last_status = status
+        self.load_error = status.get("load_error")
+        if status["loaded"]:
+            self.loaded.set()
+        return status
+
+    def keys_configured(self):
+        return self.last_status["keys_configured"]
+
+    def latency_summary(self):
+        return self.status()["latency"]
+
+    def cache_stats(self):
+        return self.call("cache_stats")
+
+    def scan_database(self, query_name):
+        result = self.call("scan", name=query_name)
+        return result["match"], result["score"]
+
+    def convene(self, name, match, score, country, on_token=None):
+        return self.call("convene", name=name, match=match, score=score, country=country)
+
+    def screen_names(self, names, threshold, progress=None, countries=None, budget=None):
+        # The budget is re-created service-side from its caps; its summary comes back in the result
+        return self.call("screen", names=names, threshold=threshold, countries=countries,
+                         limits=budget.limits() if budget else None)
+
+
+def main():
+    from colorama import Fore, Style, init
+    from tribunal import SanctionTribunal
+
+    init(autoreset=True)
+    parser = argparse.ArgumentParser(description="Shared SanctionGuard screening service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--unix", help="Listen on this Unix socket instead of TCP")
+    parser.add_argument("--max-batch", type=int, default=64, help="Most single searches scored together")
+    parser.add_argument("--batch-window", type=float, default=0.005, help="Seconds to wait for more searches")
+    parser.add_argument("--tier2-workers", type=int, default=8)
+    parser.add_argument("--screen-workers", type=int, default=2, help="Batch screens run at once")
+    args = parser.parse_args()
+
+    tribunal = SanctionTribunal(tier2_workers=args.tier2_workers)
+    service = ScreeningService(tribunal, args.max_batch, args.batch_window, args.tier2_workers, args.screen_workers)
+    where = f"unix:{args.unix}" if args.unix else f"{args.host}:{args.port}"
+    print(f"{Style.BRIGHT}🛰️  Screening service on {where} (batch ≤{args.max_batch}, window {args.batch_window * 1000:g}ms)")
+    try:
+        asyncio.run(service.serve(args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        print(f"{Fore.YELLOW}Stopped. {service.stats}")
+
+
+if __name__ == "__main__":
+    main()
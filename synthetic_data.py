@@ -0,0 +1,293 @@
+"""
+Synthetic, reproducible test data: SDN-shaped XML feeds, consolidated sanctions stores of any
+size (10k-1M entities) and noisy query corpora with known ground truth for recall measurement.
+
+    python synthetic_data.py --entities 100000 --queries 5000 --out-dir bench_data
+"""
+import argparse
+import json
+import os
+import random
+from xml.sax.saxutils import escape
+
+SDN_NAMESPACE = "https://sanctionslistservice.ofac.treas.gov/api/PublicationPreview/exports/XML"
+SYLLABLES = [c + v for c in "bcdfghjklmnprstvz" for v in "aeiou"] + ["al", "ov", "ich", "ski", "mad", "ir", "ah"]
+COUNTRIES = ["Iran", "Russia", "Syria", "China", "United Arab Emirates", "Venezuela", "Turkey", "Cuba"]
+ORG_SUFFIXES = ["LLC", "CO", "TRADING"]
+PROGRAMS = ["SDGT", "IRAN", "RUSSIA-EO14024", "SYRIA", "CUBA", "VENEZUELA-EO13850", "NPWMD"]
+
+
+def synthetic_word(rng):
+    return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).upper()
+
+
+def write_synthetic_sdn(path, entities, seed=0):
+    """Writes an SDN-shaped XML file (namespaced, like the OFAC export) with `entities` entries."""
+    rng = random.Random(seed)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f'<?xml version="1.0" standalone="yes"?>\n<sdnList xmlns="{SDN_NAMESPACE}">\n')
+        f.write(f"<publshInformation><Publish_Date>01/01/2026</Publish_Date><Record_Count>{entities}</Record_Count></publshInformation>\n")
+        for uid in range(1, entities + 1):
+            person = rng.random() < 0.4
+            name = f"<lastName>{synthetic_word(rng)}</lastName>"
+            if person:
+                name += f"<firstName>{synthetic_word(rng)}</firstName>"
+            else:
+                name = f"<lastName>{' '.join(synthetic_word(rng) for _ in range(rng.randint(1, 3)))} {rng.choice(['LLC', 'CO', 'TRADING'])}</lastName>"
+            akas = "".join(
+                f"<aka><uid>{uid * 10 + i}</uid><type>a.k.a.</type><category>strong</category>"
+                f"<lastName>{synthetic_word(rng)}</lastName></aka>"
+                for i in range(rng.choice([0, 0, 1, 2]))
+            )
+            programs = "".join(f"<program>{p}</program>" for p in rng.sample(PROGRAMS, rng.randint(1, 2)))
+            addresses = "".join(
+                f"<address><uid>{uid * 10 + i}</uid><city>{synthetic_word(rng).title()}</city><country>{escape(rng.choice(COUNTRIES))}</country></address>"
+                for i in range(rng.randint(0, 2))
+            )
+            f.write(
+                f"<sdnEntry><uid>{uid}</uid>{name}<sdnType>{'Individual' if person else 'Entity'}</sdnType>"
+                f"<programList>{programs}</programList><akaList>{akas}</akaList><addressList>{addresses}</addressList>"
+                f"<remarks>Synthetic record {uid}.</remarks></sdnEntry>\n"
+            )
+        f.write("</sdnList>\n")
+
+
+def synthetic_name(rng):
+    if rng.random() < 0.5:
+        return f"{synthetic_word(rng)} {synthetic_word(rng)}"
+    return f"{' '.join(synthetic_word(rng) for _ in range(rng.randint(1, 3)))} {rng.choice(['LLC', 'CO', 'TRADING'])}"
+
+
+def synthetic_entities(count, seed=0):
+    """Consolidated-DB entity dicts: ~40% individuals ("LAST, FIRST"), the rest organisations, some with aliases."""
+    rng = random.Random(seed)
+    entities = []
+    for uid in range(1, count + 1):
+        person = rng.random() < 0.4
+        if person:
+            name = f"{synthetic_word(rng)}, {synthetic_word(rng)}"
+        else:
+            name = f"{' '.join(synthetic_word(rng) for _ in range(rng.randint(1, 3)))} {rng.choice(ORG_SUFFIXES)}"
+        country = rng.choice(COUNTRIES)
+        entities.append({
+            "source": "SYNTHETIC",
+            "id": str(uid),
+            "name": name,
+            "type": "Individual" if person else "Entity",
+            "programs": rng.sample(PROGRAMS, rng.randint(1, 2)),
+            "addresses": [f"{synthetic_word(rng).title()}, {country}"] if rng.random() < 0.7 else [],
+            "aliases": [synthetic_word(rng) + (f", {synthetic_word(rng)}" if person else "")
+                        for _ in range(rng.choice([0, 0, 1, 2]))],
+            "remarks": f"Synthetic record {uid}.",
+        })
+    return entities
+
+
+def write_synthetic_store(path, count, seed=0):
+    """Writes a binary sanctions store of `count` synthetic entities and returns the entities."""
+    from sanctions_store import write_store
+
+    entities = synthetic_entities(count, seed)
+    write_store(path, {"last_updated": f"synthetic-{count}-{seed}", "risk_definitions": {}, "entities": entities})
+    return entities
+
+
+# --- MULTI-LIST FEEDS ---
+
+def sdn_entry_xml(e):
+    last, _, first = e["name"].partition(", ")
+    name = f"<lastName>{escape(last)}</lastName>" + (f"<firstName>{escape(first)}</firstName>" if first else "")
+    akas = "".join(f"<aka><type>a.k.a.</type><lastName>{escape(a)}</lastName></aka>" for a in e["aliases"])
+    addresses = "".join(f"<address><city>{escape(a.split(', ')[0])}</city><country>{escape(a.split(', ')[-1])}</country></address>"
+                        for a in e["addresses"])
+    ids = "".join(f"<id><idType>Passport</idType><idNumber>{x}</idNumber></id>" for x in e["identifiers"])
+    dobs = "".join(f"<dateOfBirthItem><dateOfBirth>{d}</dateOfBirth></dateOfBirthItem>" for d in e["dates_of_birth"])
+    programs = "".join(f"<program>{p}</program>" for p in e["programs"])
+    return (f"<sdnEntry><uid>{e['id']}</uid>{name}<sdnType>{e['type']}</sdnType><programList>{programs}</programList>"
+            f"<idList>{ids}</idList><akaList>{akas}</akaList><addressList>{addresses}</addressList>"
+            f"<dateOfBirthList>{dobs}</dateOfBirthList></sdnEntry>\n")
+
+
+def un_entry_xml(e):
+    tag = "INDIVIDUAL" if e["type"] == "Individual" else "ENTITY"
+    parts = [f"<DATAID>{e['id']}</DATAID><FIRST_NAME>{escape(e['name'].replace(',', ''))}</FIRST_NAME>",
+             f"<UN_LIST_TYPE>{e['programs'][0]}</UN_LIST_TYPE>"]
+    parts += [f"<{tag}_ALIAS><ALIAS_NAME>{escape(a)}</ALIAS_NAME></{tag}_ALIAS>" for a in e["aliases"]]
+    parts += [f"<{tag}_ADDRESS><CITY>{escape(a.split(', ')[0])}</CITY><COUNTRY>{escape(a.split(', ')[-1])}</COUNTRY></{tag}_ADDRESS>"
+              for a in e["addresses"]]
+    parts += [f"<INDIVIDUAL_DOCUMENT><TYPE_OF_DOCUMENT>Passport</TYPE_OF_DOCUMENT><NUMBER>{x}</NUMBER></INDIVIDUAL_DOCUMENT>"
+              for x in e["identifiers"] if tag == "INDIVIDUAL"]
+    return f"<{tag}>{''.join(parts)}</{tag}>\n"
+
+
+def eu_entry_xml(e):
+    code = "person" if e["type"] == "Individual" else "enterprise"
+    names = "".join(f'<nameAlias wholeName="{escape(n)}"/>' for n in [e["name"], *e["aliases"]])
+    addresses = "".join(f'<address city="{escape(a.split(", ")[0])}" countryDescription="{escape(a.split(", ")[-1])}"/>'
+                        for a in e["addresses"])
+    ids = "".join(f'<identification number="{x}" identificationTypeCode="passport"/>' for x in e["identifiers"])
+    dobs = "".join(f'<birthdate birthdate="{d}"/>' for d in e["dates_of_birth"])
+    return (f'<sanctionEntity logicalId="{e["id"]}"><regulation programme="{e["programs"][0]}"/>'
+            f'<subjectType code="{code}"/>{names}{dobs}{ids}{addresses}</sanctionEntity>\n')
+
+
+UK_COLUMNS = ["Name 6", "Name 1", "DOB", "Passport Number", "Address 6", "Country", "Group Type", "Alias Type", "Regime",
+              "Group ID"]
+
+
+def uk_rows_for(e):
+    address = e["addresses"][0].split(", ") if e["addresses"] else ["", ""]
+    base = {"DOB": e["dates_of_birth"][0] if e["dates_of_birth"] else "", "Address 6": address[0], "Country": address[-1],
+            "Passport Number": e["identifiers"][0] if e["identifiers"] else "", "Regime": e["programs"][0],
+            "Group Type": e["type"], "Group ID": e["id"]}
+    rows = [{**base, "Name 6": e["name"], "Alias Type": "Primary name"}]
+    rows += [{**base, "Name 6": a, "Alias Type": "AKA"} for a in e["aliases"]]
+    return rows
+
+
+def write_synthetic_sources(directory, counts, overlap=0.2, seed=0):
+    """
+    One synthetic file per list format (names as in evidence_manager.FIXTURE_FILES). A share
+    `overlap` of every non-SDN list re-lists SDN designees (same passport, list-specific ids),
+    so the merged index should hold exactly the returned number of unique designees.
+    """
+    import csv
+
+    from evidence_manager import FIXTURE_FILES
+
+    rng = random.Random(seed)
+    pool = synthetic_entities(sum(counts.values()), seed)
+    for e in pool:
+        e["identifiers"] = [f"P{int(e['id']):09d}"]
+        e["dates_of_birth"] = [f"{rng.randint(1940, 2000)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"] \
+            if e["type"] == "Individual" else []
+    sdn = pool[:counts.get("OFAC_SDN", 0)]
+    fresh = iter(pool[len(sdn):])
+    unique = len(sdn)
+    lists = {"OFAC_SDN": sdn}
+    for name in ("OFAC_CONSOLIDATED", "UN", "EU", "UK"):
+        shared = rng.sample(sdn, min(len(sdn), int(counts.get(name, 0) * overlap))) if sdn else []
+        own = [next(fresh) for _ in range(counts.get(name, 0) - len(shared))]
+        unique += len(own)
+        # The consolidated non-SDN list shares the SDN uid space; the others get their own prefixes on parse
+        lists[name] = [{**e, "id": str(900_000 + i) if name == "OFAC_CONSOLIDATED" else str(i)}
+                       for i, e in enumerate(shared + own, 1)]
+
+    os.makedirs(directory, exist_ok=True)
+    for name in ("OFAC_SDN", "OFAC_CONSOLIDATED"):
+        with open(os.path.join(directory, FIXTURE_FILES[name]), "w", encoding="utf-8") as f:
+            f.write(f'<?xml version="1.0" standalone="yes"?>\n<sdnList xmlns="{SDN_NAMESPACE}">\n')
+            f.writelines(sdn_entry_xml(e) for e in lists[name])
+            f.write("</sdnList>\n")
+    with open(os.path.join(directory, FIXTURE_FILES["UN"]), "w", encoding="utf-8") as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n<CONSOLIDATED_LIST><INDIVIDUALS>\n')
+        f.writelines(un_entry_xml(e) for e in lists["UN"] if e["type"] == "Individual")
+        f.write("</INDIVIDUALS><ENTITIES>\n")
+        f.writelines(un_entry_xml(e) for e in lists["UN"] if e["type"] != "Individual")
+        f.write("</ENTITIES></CONSOLIDATED_LIST>\n")
+    with open(os.path.join(directory, FIXTURE_FILES["EU"]), "w", encoding="utf-8") as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n<export xmlns="http://eu.europa.ec/fpi/fsd/export">\n')
+        f.writelines(eu_entry_xml(e) for e in lists["EU"])
+        f.write("</export>\n")
+    with open(os.path.join(directory, FIXTURE_FILES["UK"]), "w", encoding="utf-8", newline="") as f:
+        f.write("Last Updated,01/01/2026\n")
+        writer = csv.DictWriter(f, fieldnames=UK_COLUMNS)
+        writer.writeheader()
+        for e in lists["UK"]:
+            writer.writerows(uk_rows_for(e))
+    return unique
+
+
+# --- NOISY QUERIES ---
+
+def typo(rng, text):
+    """One random character edit: substitution, deletion, insertion or transposition."""
+    letters = [i for i, ch in enumerate(text) if ch.isalpha()]
+    if len(letters) < 4:
+        return text
+    i = rng.choice(letters[1:-1])
+    op = rng.choice(["sub", "del", "ins", "swap"])
+    if op == "sub":
+        return text[:i] + rng.choice("AEIOUKSTMN") + text[i + 1:]
+    if op == "del":
+        return text[:i] + text[i + 1:]
+    if op == "ins":
+        return text[:i] + rng.choice("AEIOUH") + text[i:]
+    return text[:i - 1] + text[i] + text[i - 1] + text[i + 1:]
+
+
+def noisy_query(rng, entity):
+    """A realistic variant of one listed name. Returns (query, noise kind)."""
+    name = entity["name"]
+    if entity.get("aliases") and rng.random() < 0.15:
+        return rng.choice(entity["aliases"]), "alias"
+    tokens = name.replace(",", "").split()
+    kind = rng.choice(["exact", "typo", "reorder", "case", "suffix", "drop_token", "typo2"])
+    if kind == "typo":
+        return typo(rng, name), kind
+    if kind == "typo2":
+        return typo(rng, typo(rng, name)), kind
+    if kind == "reorder" and len(tokens) > 1:
+        return " ".join(tokens[1:] + tokens[:1]), kind
+    if kind == "case":
+        return name.title(), kind
+    if kind == "suffix" and tokens[-1] in ORG_SUFFIXES:
+        return " ".join(tokens[:-1] + [rng.choice(["LTD", "Limited", "L.L.C.", "Company"])]), kind
+    if kind == "drop_token" and len(tokens) > 2:
+        drop = rng.randrange(len(tokens))
+        return " ".join(t for i, t in enumerate(tokens) if i != drop), kind
+    return name, "exact"
+
+
+def query_corpus(entities, count, negative_ratio=0.2, seed=0):
+    """
+    Query rows {"query", "entity_id", "noise"}: noisy variants of listed names (entity_id is
+    the ground truth) plus fresh names that are not listed (entity_id None).
+    """
+    rng = random.Random(seed + 1)
+    listed = {e["name"] for e in entities}
+    corpus = []
+    for _ in range(count):
+        if rng.random() < negative_ratio:
+            query = synthetic_name(rng)
+            while query in listed:
+                query = synthetic_name(rng)
+            corpus.append({"query": query, "entity_id": None, "noise": "negative"})
+        else:
+            entity = rng.choice(entities)
+            query, noise = noisy_query(rng, entity)
+            corpus.append({"query": query, "entity_id": entity["id"], "noise": noise})
+    return corpus
+
+
+def write_query_corpus(path, corpus):
+    with open(path, "w", encoding="utf-8") as f:
+        for row in corpus:
+            f.write(json.dumps(row) + "\n")
+
+
+def load_query_corpus(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic sanctions stores and query corpora")
+    parser.add_argument("--entities", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--queries", type=int, default=5_000)
+    parser.add_argument("--negative-ratio", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out-dir", default="bench_data")
+    args = parser.parse_args()
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    for count in args.entities:
+        store = os.path.join(args.out_dir, f"sanctions_{count}.sgdb")
+        entities = write_synthetic_store(store, count, args.seed)
+        queries = os.path.join(args.out_dir, f"queries_{count}.jsonl")
+        write_query_corpus(queries, query_corpus(entities, args.queries, args.negative_ratio, args.seed))
+        print(f"✅ {store} + {queries}")
+
+
+if __name__ == "__main__":
+    main()
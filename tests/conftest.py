@@ -0,0 +1,44 @@
+import functools
+import os
+import sys
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+FIXTURE_SOURCES = os.path.join(ROOT, "fixtures", "sources")
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def serve_directory():
+    """Serves a directory over local HTTP (Last-Modified / If-Modified-Since -> 304 included). Returns the base URL."""
+    servers = []
+
+    def serve(directory):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(QuietHandler, directory=directory))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_address[1]}"
+
+    yield serve
+    for server in servers:
+        server.shutdown()
+
+
+@pytest.fixture(scope="session")
+def fixture_store(tmp_path_factory):
+    """The sanctions store built from fixtures/sources."""
+    import evidence_manager
+    from sanctions_store import write_store
+
+    path = str(tmp_path_factory.mktemp("store") / "store.sgdb")
+    final_db, _ = evidence_manager.build_database(fixtures=FIXTURE_SOURCES, workers=1, store_path=path)
+    write_store(path, final_db)
+    return path
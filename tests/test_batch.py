@@ -0,0 +1,31 @@
+import pytest
+
+from batch_runner import iter_input_chunks, screen_names
+from tribunal import SanctionTribunal
+
+
+@pytest.fixture(scope="module")
+def tribunal(fixture_store, tmp_path_factory):
+    cache = tmp_path_factory.mktemp("tribunal") / "cache.sqlite"
+    return SanctionTribunal(db_file=fixture_store, cache_file=str(cache), triage_log=None, background_load=False)
+
+
+def statuses(tribunal, names):
+    return [(r["Status"], r["Match Score"]) for r in screen_names(tribunal, names, 80)["results"]]
+
+
+@pytest.mark.parametrize("names", [["Sea Phantom", "SEA PHANTOM"], ["krasnov, dmitry", "KRASNOV, Dmitry"]])
+def test_duplicate_spellings_get_their_own_result(tribunal, names):
+    grouped = statuses(tribunal, names)
+    alone = [statuses(tribunal, [name])[0] for name in names]
+    assert grouped == alone
+    assert all(status == "⚠️ FLAGGED" for status, _ in grouped)
+
+
+def test_input_chunks_resume_after_start_row(tmp_path):
+    path = tmp_path / "input.csv"
+    path.write_text("name,country\n" + "".join(f"name {i},Russia\n" for i in range(10)))
+    chunks = list(iter_input_chunks(str(path), 4, start_row=3))
+    assert [len(c) for c in chunks] == [4, 3]
+    assert list(chunks[0].columns) == ["name", "country"]
+    assert chunks[0]["name"].iloc[0] == "name 3"
@@ -0,0 +1,50 @@
+from customer_book import CustomerBook, rescreen
+
+
+class ListTribunal:
+    """Just what rescreen needs: entity lookup by id and a Tier 2 that clears everything."""
+
+    def __init__(self, entities):
+        self.entities = entities
+        self.settled = []
+
+    def get_entity_details(self, uid):
+        return self.entities.get(uid)
+
+    def settle_batch(self, cases, countries=None):
+        self.settled.extend(name for name, _, _ in cases)
+        return [{"verdict": "LOW RISK"} for _ in cases]
+
+
+def hit_pairs(book):
+    return set(book.conn.execute("SELECT customer_id, entity_id FROM hits").fetchall())
+
+
+def test_rescreen_drops_hits_of_changed_and_removed_entities(tmp_path):
+    book = CustomerBook(str(tmp_path / "book.sqlite"))
+    acme, zenith = book.add_customers(["Acme Shipping Ltd", "Zenith Holdings"])
+    tribunal = ListTribunal({
+        "E1": {"id": "E1", "name": "ACME SHIPPING LTD", "aliases": []},
+        "E2": {"id": "E2", "name": "ZENITH HOLDINGS", "aliases": []},
+    })
+    rescreen(book, tribunal, {"version": 1, "added": ["E1", "E2"]})
+    assert hit_pairs(book) == {(acme, "E1"), (zenith, "E2")}
+
+    # E1 is renamed and no longer matches Acme; E2 is delisted
+    tribunal.entities["E1"] = {"id": "E1", "name": "NORTHWIND CARGO", "aliases": []}
+    del tribunal.entities["E2"]
+    summary = rescreen(book, tribunal, {"version": 2, "changed": ["E1"], "removed": ["E2"]})
+    assert hit_pairs(book) == set()
+    assert summary["tier1_hits"] == 0
+
+
+def test_rescreen_rejudges_every_hit_on_a_changed_entity(tmp_path):
+    book = CustomerBook(str(tmp_path / "book.sqlite"))
+    acme, = book.add_customers(["Acme Shipping Ltd"])
+    tribunal = ListTribunal({"E1": {"id": "E1", "name": "ACME SHIPPING LTD", "aliases": []}})
+    rescreen(book, tribunal, {"version": 1, "added": ["E1"]})
+    tribunal.entities["E1"] = {"id": "E1", "name": "ACME SHIPPING LTD", "aliases": ["ACME MARITIME"]}
+    summary = rescreen(book, tribunal, {"version": 2, "changed": ["E1"]})
+    assert summary["new_hits"] == 1
+    assert tribunal.settled == ["Acme Shipping Ltd", "Acme Shipping Ltd"]
+    assert book.conn.execute("SELECT list_version FROM hits").fetchall() == [(2,)]
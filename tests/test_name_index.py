@@ -0,0 +1,81 @@
+import random
+
+import pytest
+from rapidfuzz import fuzz, process
+
+from name_index import CandidateIndex, normalize_name
+
+
+def synthetic_names(count, seed=0):
+    """Company-like names made of random consonant-vowel words, enough for the index to block on."""
+    rng = random.Random(seed)
+
+    def word():
+        return "".join(rng.choice("bcdfghklmnprstvz") + rng.choice("aeiou") for _ in range(rng.randint(2, 4))).capitalize()
+
+    suffixes = ["LLC", "LTD", "TRADING", "SHIPPING", "HOLDINGS", "GROUP", "CO", ""]
+    return [" ".join([word() for _ in range(rng.randint(1, 3))] + [rng.choice(suffixes)]).strip() for _ in range(count)]
+
+
+def variants(names, count, seed=0):
+    """Screening-style inputs for random list names: case, word order, typos, extra and dropped words."""
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        name = rng.choice(names)
+        tokens = name.split()
+        cut = rng.randrange(len(name))
+        queries += [name.upper(), " ".join(reversed(tokens)), name[:cut] + name[cut + 1:], name + " International",
+                    " ".join(tokens[:-1]) or name]
+    return queries
+
+
+@pytest.fixture(scope="module")
+def names():
+    return synthetic_names(5000)
+
+
+@pytest.fixture(scope="module")
+def index(names):
+    return CandidateIndex(names)
+
+
+def brute_force(query, norms):
+    return process.extractOne(normalize_name(query), norms, scorer=fuzz.token_set_ratio)
+
+
+def test_candidates_keep_the_brute_force_best_score(names, index):
+    norms = [normalize_name(n) for n in names]
+    checked = blocked = 0
+    for query in variants(names, 300):
+        exact = brute_force(query, norms)
+        if exact[1] < 80:
+            continue
+        checked += 1
+        rows = index.candidates(query)
+        if rows is None:
+            continue
+        blocked += 1
+        found = process.extractOne(normalize_name(query), [norms[r] for r in rows], scorer=fuzz.token_set_ratio)
+        assert found and found[1] == exact[1], query
+    # The index has to narrow most lookups for the check to mean anything
+    assert blocked > checked * 0.8
+
+
+def test_names_inside_a_longer_query_are_candidates(names, index):
+    # token_set_ratio scores a list name whose tokens are a subset of the query at 100
+    for name in names[:50]:
+        rows = index.candidates(f"{name} Trading International")
+        assert rows is None or names.index(name) in rows
+
+
+def test_queries_without_selective_features_fall_back_to_a_full_scan(index):
+    assert index.candidates("") is None
+    assert index.candidates("!!!") is None
+    assert index.candidates("Trading Co LLC") is None
+
+
+def test_precomputed_normalized_names_build_the_same_index(names, index):
+    precomputed = CandidateIndex(names, normalized=[normalize_name(n) for n in names])
+    for query in variants(names, 20, seed=1):
+        assert precomputed.candidates(query) == index.candidates(query)
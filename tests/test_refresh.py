@@ -0,0 +1,60 @@
+import json
+import os
+import shutil
+
+import pytest
+
+import evidence_manager
+from sanctions_store import SanctionsStore, write_store
+
+FIXTURE_SOURCES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "fixtures", "sources")
+
+
+@pytest.fixture
+def lists(tmp_path, serve_directory, monkeypatch):
+    """Copies of the fixture lists served over HTTP, with SOURCES pointing at them."""
+    served = tmp_path / "served"
+    shutil.copytree(FIXTURE_SOURCES, served)
+    base = serve_directory(str(served))
+    for name, path in evidence_manager.FIXTURE_FILES.items():
+        monkeypatch.setitem(evidence_manager.SOURCES, name, f"{base}/{path}")
+    return served
+
+
+def refresh(tmp_path):
+    return evidence_manager.incremental_refresh(
+        store_path=str(tmp_path / "store.sgdb"), changelog_path=str(tmp_path / "changelog.jsonl"),
+        state_path=str(tmp_path / "state.json"), workers=1)
+
+
+def touch_later(path):
+    """Moves the file's mtime forward so If-Modified-Since sees it as new."""
+    mtime = os.path.getmtime(path) + 10
+    os.utime(path, (mtime, mtime))
+
+
+def test_full_build_then_304_then_per_uid_delta(tmp_path, lists):
+    store = str(tmp_path / "store.sgdb")
+    final_db, _ = evidence_manager.build_database(workers=1, store_path=store)
+    write_store(store, final_db)
+    assert SanctionsStore(store).meta["version"] == 1
+
+    # First refresh downloads everything (no validators yet) and finds nothing new
+    assert refresh(tmp_path) is None
+    assert os.path.exists(tmp_path / "state.json")
+    # Second one is answered 304 everywhere
+    assert refresh(tmp_path) is None
+
+    uk = lists / "uk_conlist.csv"
+    uk.write_text(uk.read_text(encoding="utf-8").replace("Omar,,,,,", "Omar,Hassan,,,,"), encoding="utf-8")
+    touch_later(uk)
+    entry = refresh(tmp_path)
+    assert entry["version"] == 2 and entry["previous_version"] == 1
+    assert entry["changed"] == ["UK-60002"]
+    assert entry["added"] == [] and entry["removed"] == []
+    assert json.loads((tmp_path / "changelog.jsonl").read_text().splitlines()[-1]) == entry
+    assert SanctionsStore(store).meta["version"] == 2
+
+    # A full rebuild keeps counting, so later deltas stay newer than the customer book's version
+    final_db, _ = evidence_manager.build_database(workers=1, store_path=store)
+    assert final_db["version"] == 3
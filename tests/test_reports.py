@@ -0,0 +1,37 @@
+import zipfile
+
+import reports
+from reports import BATCH_NOTE, iter_rendered, new_report, write_case_book, write_case_zip
+
+
+def case(name):
+    return {"target_name": name, "match_name": name.upper(), "match_score": 91, "pros_arg": BATCH_NOTE,
+            "def_arg": BATCH_NOTE, "verdict": "HIGH RISK", "confidence": 90, "reasoning": "Name and country agree."}
+
+
+def test_reports_from_the_shell_are_independent_documents():
+    first, second = new_report(), new_report()
+    reports.render_case(first, case("Acme Shipping"))
+    assert second.page_no() == 0 and second.pages == {}
+    reports.render_case(second, case("Zenith Holdings"))
+    assert first.output(dest="S") != second.output(dest="S")
+
+
+def test_pdfs_are_yielded_as_they_are_rendered(monkeypatch):
+    rendered = []
+    render_case = reports.render_case
+    monkeypatch.setattr(reports, "render_case", lambda pdf, data: (rendered.append(data), render_case(pdf, data)))
+    pdfs = iter_rendered([case(f"Customer {i}") for i in range(5)], workers=1)
+    filename, data, pages = next(pdfs)
+    assert len(rendered) == 1
+    assert filename == "00001_SanctionGuard_Case_Customer_0.pdf" and data.startswith(b"%PDF") and pages == 1
+
+
+def test_case_zip_and_case_book(tmp_path):
+    cases = [case(f"Customer {i}") for i in range(3)]
+    stats = write_case_zip(cases, str(tmp_path / "cases.zip"), workers=1)
+    with zipfile.ZipFile(tmp_path / "cases.zip") as archive:
+        assert len(archive.namelist()) == 3
+        assert all(archive.read(name).startswith(b"%PDF") for name in archive.namelist())
+    assert stats["reports"] == 3 and stats["pages"] == 3
+    assert write_case_book(cases, str(tmp_path / "cases.pdf"))["pages"] == 3
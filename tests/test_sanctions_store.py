@@ -0,0 +1,78 @@
+import json
+
+import pytest
+
+from name_index import normalize_name
+from sanctions_store import SanctionsStore, export_json, flatten_names, import_json, open_database, write_store
+
+DB = {
+    "last_updated": "2024-05-01 09:00:00",
+    "risk_definitions": {"North Korea": "CRITICAL"},
+    "entities": [
+        {"id": "OFAC-101", "name": "KRASNOV, Dmitri Alexeyevich", "type": "Individual",
+         "aliases": ["KRASNOV, Dmitry", "Dmitriy Alekseevich KRASNOV", "KRASNOV, Dmitry"],
+         "addresses": ["Moscow, Russia"], "remarks": "DOB 1971"},
+        {"id": "UN-7", "name": "Société Générale d'Armement", "type": "Entity", "aliases": [],
+         "addresses": ["Pyongyang, Korea, North"], "remarks": ""},
+        {"id": "EU-3", "name": "SEA PHANTOM", "type": "Vessel", "addresses": []},
+    ],
+}
+
+
+@pytest.fixture
+def store_path(tmp_path):
+    path = str(tmp_path / "store.sgdb")
+    write_store(path, DB)
+    return path
+
+
+def test_store_reads_back_the_json_document(store_path):
+    db = open_database(store_path)
+    assert {k: v for k, v in db.items() if k != "entities"} == {k: v for k, v in DB.items() if k != "entities"}
+    assert list(db["entities"]) == DB["entities"]
+    assert db["entities"][-1] == DB["entities"][-1]
+    assert db["entities"][1:] == DB["entities"][1:]
+
+
+def test_name_columns_hold_aliases_grouped_by_entity(store_path):
+    store = SanctionsStore(store_path)
+    names, starts = flatten_names(DB["entities"])
+    # Repeated aliases are stored once
+    assert len(names) == 5
+    assert store.column("names") == names
+    assert store.column("norm_names") == [normalize_name(n) for n in names]
+    assert store.name_starts.tolist() == starts.tolist()
+    assert store.entities.names == [e["name"] for e in DB["entities"]]
+    assert store.value("ids", 2) == "EU-3"
+
+
+def test_export_then_import_rebuilds_the_same_store(store_path, tmp_path):
+    json_path = str(tmp_path / "audit.json")
+    export_json(store_path, json_path)
+    with open(json_path, encoding="utf-8") as f:
+        assert json.load(f) == DB
+    rebuilt = str(tmp_path / "rebuilt.sgdb")
+    import_json(json_path, rebuilt)
+    with open(store_path, "rb") as a, open(rebuilt, "rb") as b:
+        assert a.read() == b.read()
+
+
+def test_empty_database_round_trips(tmp_path):
+    path = str(tmp_path / "empty.sgdb")
+    write_store(path, {"last_updated": "", "entities": []})
+    db = open_database(path)
+    assert len(db["entities"]) == 0 and list(db["entities"]) == []
+    assert SanctionsStore(path).column("names") == []
+
+
+def test_missing_store_falls_back_to_the_json_file(tmp_path):
+    json_path = tmp_path / "db.json"
+    json_path.write_text(json.dumps(DB), encoding="utf-8")
+    assert open_database(str(tmp_path / "db.sgdb")) == DB
+
+
+def test_other_files_are_rejected(tmp_path):
+    path = tmp_path / "not_a_store.sgdb"
+    path.write_bytes(b"{}" * 16)
+    with pytest.raises(ValueError, match="not a SanctionGuard store"):
+        open_database(str(path))
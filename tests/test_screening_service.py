@@ -0,0 +1,63 @@
+import asyncio
+import threading
+
+import batch_runner
+from screening_service import ScreeningClient, ScreeningService
+from tribunal import SanctionTribunal
+
+
+class StubTribunal:
+    def convene(self, name, match, score, country):
+        return {"verdict": "LOW RISK", "name": name}
+
+
+def test_batch_screens_do_not_hold_up_convene(monkeypatch):
+    release = threading.Event()
+
+    def screen_names(tribunal, names, threshold, countries=None, budget=None):
+        release.wait(5)
+        return {"results": [], "verdicts": []}
+
+    monkeypatch.setattr(batch_runner, "screen_names", screen_names)
+    service = ScreeningService(StubTribunal(), tier2_workers=1)
+
+    async def run():
+        screen = asyncio.ensure_future(service.screen(["Acme"], 80))
+        await asyncio.sleep(0.05)
+        # The only Tier 2 thread must still be free while the screen is running
+        verdict = await asyncio.wait_for(service.convene("Acme", {"id": "E1"}, 85, None), 2)
+        release.set()
+        await screen
+        return verdict
+
+    assert asyncio.run(run())["verdict"] == "LOW RISK"
+
+
+def test_load_errors_reach_the_client(fixture_store, tmp_path):
+    broken = tmp_path / "broken.sgdb"
+    broken.write_bytes(b"not a store")
+    tribunal = SanctionTribunal(db_file=str(broken), cache_file=str(tmp_path / "cache.sqlite"), triage_log=None)
+    tribunal.loaded.wait(10)
+    service = ScreeningService(tribunal)
+    ready = threading.Event()
+    servers = []
+    loop = asyncio.new_event_loop()
+    task = loop.create_task(service.serve(port=0, ready=lambda server: (servers.append(server), ready.set())))
+
+    def serve():
+        try:
+            loop.run_until_complete(task)
+        except asyncio.CancelledError:
+            pass
+
+    thread = threading.Thread(target=serve, daemon=True)
+    thread.start()
+    assert ready.wait(5)
+    client = ScreeningClient(f"127.0.0.1:{servers[0].sockets[0].getsockname()[1]}")
+    try:
+        assert not client.loaded.is_set()
+        assert "not a SanctionGuard store" in client.load_error
+    finally:
+        client.close()
+        loop.call_soon_threadsafe(task.cancel)
+        thread.join(5)
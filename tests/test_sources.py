@@ -0,0 +1,90 @@
+import os
+
+import pytest
+
+import evidence_manager
+
+FIXTURE_SOURCES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "fixtures", "sources")
+
+
+def entity_named(entities, name):
+    return next(e for e in entities if e["name"] == name)
+
+
+@pytest.mark.parametrize("stream", [True, False])
+def test_every_list_ingests_over_http(serve_directory, stream):
+    base = serve_directory(FIXTURE_SOURCES)
+    locations = {name: f"{base}/{path}" for name, path in evidence_manager.FIXTURE_FILES.items()}
+    over_http = evidence_manager.ingest_sources(locations, workers=1, stream=stream)
+    local = evidence_manager.ingest_sources(evidence_manager.source_locations(locations, FIXTURE_SOURCES), workers=1)
+
+    assert [r["error"] for r in over_http] == [None] * len(locations)
+    assert [r["entities"] for r in over_http] == [r["entities"] for r in local]
+    assert len(next(r for r in over_http if r["source"] == "UK")["entities"]) == 4
+
+
+def test_fixture_lists_merge_across_sources():
+    final_db, stats = evidence_manager.build_database(fixtures=FIXTURE_SOURCES, workers=1)
+    entities = final_db["entities"]
+
+    assert stats["merge"]["listings"] == 14
+    assert len(entities) == 7
+    assert stats["merge"]["multi_list"] == 4
+
+    krasnov = entity_named(entities, "KRASNOV, Dmitri Alexeyevich")
+    assert [s["list"] for s in krasnov["sources"]] == ["OFAC_SDN", "EU", "UK"]
+    assert "KRASNOV, Dmitry" in krasnov["aliases"]
+    assert "Dmitri Alexeyevich KRASNOV" in krasnov["aliases"]
+    assert krasnov["remarks"].count("[RISK WARNING: Location match Russia]") == 1
+
+    northstar = entity_named(entities, "NORTHSTAR MARITIME TRADING LLC")
+    assert [s["list"] for s in northstar["sources"]] == ["OFAC_SDN", "UN", "EU", "UK"]
+    assert {"Puksong Shipping", "NORTHSTAR MARITIME TRADING", "Northstar Maritime Trading Company"} <= set(northstar["aliases"])
+    assert "UN:KPE901" in northstar["identifiers"]
+    assert northstar["remarks"].count("[RISK WARNING: Location match North Korea]") == 1
+
+    helix = entity_named(entities, "HELIX ORBITAL SYSTEMS")
+    assert [s["list"] for s in helix["sources"]] == ["OFAC_CONSOLIDATED", "UK"]
+
+    ri = entity_named(entities, "RI WON SOK")
+    assert [s["list"] for s in ri["sources"]] == ["UN", "EU"]
+    assert "654310999" in ri["identifiers"]
+
+    # Same name, different birth years: two designees
+    assert [s["list"] for s in entity_named(entities, "AL-RASHID, Omar")["sources"]] == ["OFAC_SDN"]
+    assert [s["list"] for s in entity_named(entities, "Omar AL-RASHID")["sources"]] == ["UK"]
+    assert [s["list"] for s in entity_named(entities, "SEA PHANTOM")["sources"]] == ["OFAC_SDN"]
+
+
+def test_uk_un_reference_comes_from_other_information():
+    from list_parsers import iter_uk_entries
+
+    entities = {e["name"]: e for e in iter_uk_entries(f"{FIXTURE_SOURCES}/uk_conlist.csv")}
+    assert entities["NORTHSTAR MARITIME TRADING"]["identifiers"] == ["UN:KPE901"]
+
+
+def listing(uid, name, address):
+    return {"id": uid, "source": uid.split("-")[0], "name": name, "type": "Entity", "aliases": [], "programs": [],
+            "addresses": [address], "identifiers": [], "dates_of_birth": [], "remarks": ""}
+
+
+@pytest.mark.parametrize("first, second", [
+    ("Niamey, Niger", "Lagos, Nigeria"),
+    ("Conakry, Guinea", "Malabo, Equatorial Guinea"),
+    ("Conakry, Guinea", "Port Moresby, Papua New Guinea"),
+])
+def test_neighbouring_country_names_do_not_merge_designees(first, second):
+    entities, stats = evidence_manager.merge_entities([
+        {"source": "OFAC_SDN", "entities": [listing("OFAC-1", "SAHEL TRADING COMPANY", first)]},
+        {"source": "EU", "entities": [listing("EU-1", "Sahel Trading Company", second)]},
+    ])
+    assert stats["entities"] == 2
+
+
+def test_list_spellings_of_one_country_merge_designees():
+    entities, stats = evidence_manager.merge_entities([
+        {"source": "OFAC_SDN", "entities": [listing("OFAC-1", "SAHEL TRADING COMPANY", "Tehran, Iran")]},
+        {"source": "UN", "entities": [listing("UN-1", "Sahel Trading Company", "Tehran, IRAN (ISLAMIC REPUBLIC OF)")]},
+    ])
+    assert stats["entities"] == 1
+    assert [s["list"] for s in entities[0]["sources"]] == ["OFAC_SDN", "UN"]
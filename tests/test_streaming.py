@@ -0,0 +1,134 @@
+import json
+import re
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+from tribunal import MODEL_FALLBACKS, SanctionTribunal
+
+
+class ModelError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+
+
+class FakeGroq:
+    """Groq client stand-in: replies word by word when streamed; `unavailable` models fail with `status`."""
+
+    def __init__(self, unavailable=(), status=404):
+        self.unavailable = set(unavailable)
+        self.status = status
+        self.models = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, messages, model, stream=False):
+        self.models.append(model)
+        if model in self.unavailable:
+            raise ModelError(self.status)
+        text = f"Your Honor, {model} argues this case."
+        if not stream:
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=text))], usage=None)
+        # Providers also send chunks without text (role headers, the final usage chunk)
+        deltas = [None, *re.findall(r"\S+\s*", text), None]
+        return iter(SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=d))]) for d in deltas)
+
+
+class FakeGemini:
+    def __init__(self, model_id, unavailable=()):
+        self.model_id = model_id
+        self.unavailable = unavailable
+
+    def generate_content(self, prompt, stream=False):
+        if self.model_id in self.unavailable:
+            raise ModelError(404)
+        text = json.dumps({"verdict": "LOW RISK", "confidence": 70, "reasoning": f"ruled by {self.model_id}"})
+        if not stream:
+            return SimpleNamespace(text=text, usage_metadata=None)
+        return iter(SimpleNamespace(text=text[i:i + 7]) for i in range(0, len(text), 7))
+
+
+@pytest.fixture
+def tribunal(fixture_store, tmp_path, monkeypatch):
+    tribunal = SanctionTribunal(db_file=fixture_store, cache_file=str(tmp_path / "cache.sqlite"), triage_log=None,
+                                background_load=False)
+    monkeypatch.setattr(tribunal.triage, "decide", lambda *args: {"action": "TRIBUNAL", "rule": "T2"})
+    tribunal.groq_client = FakeGroq()
+    tribunal.judge_model = FakeGemini(tribunal.judge_model_id)
+    return tribunal
+
+
+@pytest.fixture
+def gemini_sdk(monkeypatch):
+    """google.generativeai stand-in, so a fallback that rebuilds the judge model gets a fake one."""
+    models = []
+
+    def model(model_id):
+        models.append(model_id)
+        return FakeGemini(model_id, unavailable={"gemini-2.5-flash"})
+
+    monkeypatch.setitem(sys.modules, "google.generativeai",
+                        SimpleNamespace(configure=lambda **kwargs: None, GenerativeModel=model))
+    monkeypatch.setenv("GOOGLE_API_KEY", "test")
+    return models
+
+
+def test_convene_streams_each_agent_in_order(tribunal):
+    match = tribunal.entity_by_row[0]
+    streamed = []
+    case = tribunal.convene("Dmitry Krasnov", match, 85, "Russia", on_token=lambda agent, token: streamed.append((agent, token)))
+
+    agents = [agent for agent, _ in streamed]
+    assert agents == sorted(agents, key=["prosecutor", "defense", "judge"].index)
+    for agent, text in (("prosecutor", case["pros_arg"]), ("defense", case["def_arg"])):
+        assert "".join(t for a, t in streamed if a == agent) == text
+        assert sum(a == agent for a, _ in streamed) > 1
+    assert json.loads("".join(t for a, t in streamed if a == "judge")) == case["verdict"]
+    assert {(s["agent"], s["streamed"]) for s in tribunal.agent_latency} == \
+        {("prosecutor", True), ("defense", True), ("judge", True)}
+    assert all(s["ttft"] <= s["total"] for s in tribunal.agent_latency)
+
+
+def test_streamed_and_buffered_replies_are_the_same(tribunal):
+    match = tribunal.entity_by_row[0]
+    buffered = tribunal.convene("Dmitry Krasnov", match, 85, "Russia")
+    streamed = tribunal.convene("Sea Phantom", match, 85, "Russia", on_token=lambda agent, token: None)
+    assert streamed["verdict"] == buffered["verdict"]
+    assert (streamed["pros_arg"], streamed["def_arg"]) == (buffered["pros_arg"], buffered["def_arg"])
+
+
+def test_unavailable_defense_model_falls_back_mid_stream(tribunal):
+    preferred = tribunal.MODEL_DEFENSE
+    tribunal.groq_client = FakeGroq(unavailable={preferred})
+    tokens = []
+    text = tribunal.defend("Dmitry Krasnov", tribunal.entity_by_row[0], "claim", on_token=tokens.append)
+
+    assert tribunal.MODEL_DEFENSE == MODEL_FALLBACKS[preferred]
+    assert tribunal.groq_client.models == [preferred, MODEL_FALLBACKS[preferred]]
+    assert "".join(tokens) == text and MODEL_FALLBACKS[preferred] in text
+    # Later calls go straight to the fallback
+    tribunal.defend("Dmitry Krasnov", tribunal.entity_by_row[0], "claim")
+    assert tribunal.groq_client.models[-1] == MODEL_FALLBACKS[preferred]
+
+
+def test_transient_errors_do_not_switch_models(tribunal):
+    preferred = tribunal.MODEL_DEFENSE
+    tribunal.groq_client = FakeGroq(unavailable={preferred}, status=503)
+    with pytest.raises(ModelError):
+        tribunal.defend("Dmitry Krasnov", tribunal.entity_by_row[0], "claim", on_token=lambda token: None)
+    assert tribunal.MODEL_DEFENSE == preferred
+
+
+def test_unavailable_judge_model_falls_back(tribunal, gemini_sdk):
+    preferred = tribunal.judge_model_id
+    tribunal.judge_model = FakeGemini(preferred, unavailable={preferred})
+    tokens = []
+    verdict = tribunal.judge("pros", "def", 85, on_token=tokens.append)
+
+    assert tribunal.judge_model_id == MODEL_FALLBACKS[preferred]
+    assert gemini_sdk == [MODEL_FALLBACKS[preferred]]
+    assert verdict["reasoning"] == f"ruled by {MODEL_FALLBACKS[preferred]}"
+    assert json.loads("".join(tokens)) == verdict
+    # Cached verdicts from the old judge no longer apply
+    assert tribunal.verdict_cache.models == "|".join(tribunal.model_ids())
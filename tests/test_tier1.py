@@ -0,0 +1,72 @@
+import pytest
+from rapidfuzz import fuzz
+
+from name_index import normalize_name
+from tribunal import SanctionTribunal
+
+QUERIES = ["Sea Phantom", "SEA PHANTOM", "krasnov, dmitry", "KRASNOV, Dmitry", "Northstar Maritime Trading",
+           "north-star maritime", "Helix Orbital", "Ri Won-Sok", "Omar al Rashid", "Completely Unrelated Bakery"]
+
+
+@pytest.fixture(scope="module")
+def tribunal(fixture_store, tmp_path_factory):
+    cache = tmp_path_factory.mktemp("tier1") / "cache.sqlite"
+    return SanctionTribunal(db_file=fixture_store, cache_file=str(cache), triage_log=None, background_load=False)
+
+
+@pytest.mark.parametrize("query", QUERIES)
+def test_single_and_batch_search_score_alike(tribunal, query):
+    entity, score = tribunal.scan_database(query)
+    batch = tribunal.scan_batch([query])
+    assert float(batch["scores"][0, 0]) == pytest.approx(score, abs=1e-3)
+    assert tribunal.entity_by_row[int(batch["rows"][0, 0])]["id"] == entity["id"]
+
+
+def test_micro_batch_scores_match_single_search(tribunal):
+    single = [tribunal.scan_database(q) for q in QUERIES]
+    many = tribunal.scan_many(QUERIES)
+    assert [(e["id"], pytest.approx(s, abs=1e-3)) for e, s in single] == [(e["id"], s) for e, s in many]
+
+
+def test_case_does_not_change_a_single_search_score(tribunal):
+    assert tribunal.scan_database("SEA PHANTOM")[1] == tribunal.scan_database("sea phantom")[1] == 100
+
+
+def test_batch_agrees_with_single_search_on_every_listed_name(tribunal):
+    queries = [variant for name in tribunal.name_table for variant in (name, name.upper(), name.replace(" ", "-"))]
+    batch = tribunal.scan_batch(queries)
+    for query, row, score in zip(queries, batch["rows"][:, 0], batch["scores"][:, 0]):
+        entity, single = tribunal.scan_database(query)
+        assert float(score) == pytest.approx(single, abs=1e-3), query
+        assert tribunal.entity_by_row[int(row)]["id"] == entity["id"], query
+
+
+def test_batch_threshold_leaves_weak_rows_empty(tribunal):
+    batch = tribunal.scan_batch(["Sea Phantom", "Completely Unrelated Bakery"], threshold=90)
+    assert batch["rows"][1, 0] == -1 and batch["scores"][1, 0] == 0
+    assert tribunal.entity_by_row[int(batch["rows"][0, 0])]["name"] == "SEA PHANTOM"
+
+
+def best_per_entity(tribunal, query):
+    """Brute force: every name and alias scored on its own, each entity keeping its best."""
+    best = {}
+    for norm, owner in zip(tribunal.norm_table, tribunal.name_owner.tolist()):
+        best[owner] = max(best.get(owner, 0), fuzz.token_set_ratio(normalize_name(query), norm))
+    return best
+
+
+@pytest.mark.parametrize("chunk_cells", [16_000_000, 20])
+def test_batch_keeps_each_entitys_best_alias_score(tribunal, chunk_cells):
+    # "Puksong Shipping" is only an alias; the Krasnov spellings differ across aliases
+    queries = ["Puksong Shipping", "Dmitriy Alekseevich Krasnov", "Helix Orbital Systems Ltd", "Omar al Rashid"]
+    top_k = 3
+    batch = tribunal.scan_batch(queries, top_k=top_k, chunk_cells=chunk_cells)
+    for query, rows, scores in zip(queries, batch["rows"], batch["scores"]):
+        best = best_per_entity(tribunal, query)
+        expected = sorted(best.values(), reverse=True)[:top_k]
+        assert scores.tolist() == pytest.approx(expected, abs=1e-3), query
+        # Distinct entities, each with its own best score; which of several tied at the cut-off is returned is open
+        assert len(set(rows.tolist())) == top_k
+        assert [best[row] for row in rows.tolist()] == pytest.approx(scores.tolist(), abs=1e-3)
+        assert {row for row in best if best[row] > expected[-1] + 1e-3} <= set(rows.tolist())
+    assert tribunal.entity_by_row[int(batch["rows"][0, 0])]["name"] == "NORTHSTAR MARITIME TRADING LLC"
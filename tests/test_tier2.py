@@ -0,0 +1,29 @@
+from metrics import METRICS, label_key
+from tier2 import Tier2Executor
+
+
+class RateLimited(Exception):
+    status_code = 429
+
+
+def test_retries_are_counted_per_model():
+    executor = Tier2Executor(max_workers=2, backoff=0)
+    models = iter(["gemini-2.5-flash", "gemini-1.5-flash"])
+    current = {"model": next(models)}
+    failures = {"left": 2}
+
+    def flaky(item):
+        if failures["left"]:
+            failures["left"] -= 1
+            if failures["left"] == 0:
+                # A fallback switched models between the two retries
+                current["model"] = next(models)
+            raise RateLimited()
+        return item
+
+    before = METRICS.snapshot()["counters"]
+    assert executor.map("gemini", flaky, ["case"], model=lambda: current["model"]) == ["case"]
+    after = METRICS.snapshot()["counters"]
+    for model in ("gemini-2.5-flash", "gemini-1.5-flash"):
+        key = ("llm_retries", label_key({"model": model, "status": 429}))
+        assert after.get(key, 0) - before.get(key, 0) == 1
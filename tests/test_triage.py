@@ -0,0 +1,90 @@
+import pytest
+
+from evidence_manager import add_risk_warnings
+from triage import (COUNTRY_CHOICES, COUNTRY_MISMATCH, Triage, canonical_country, country_key, listed_countries,
+                    risk_country, shared_countries)
+
+
+def listing(*addresses):
+    return {"name": "HELIOS TRADING LLC", "type": "Entity", "aliases": [], "addresses": list(addresses)}
+
+
+@pytest.mark.parametrize("country, addresses", [
+    ("Niger", ["Lagos, Nigeria"]),
+    ("Nigeria", ["Niamey, Niger"]),
+    ("Sudan", ["Juba, South Sudan"]),
+    ("South Sudan", ["Khartoum, Sudan"]),
+    ("Korea, South", ["Pyongyang, Korea, North"]),
+])
+def test_different_countries_do_not_share(country, addresses):
+    assert shared_countries(country, listed_countries(listing(*addresses))) == []
+
+
+@pytest.mark.parametrize("country", ["North Korea", "Korea, North", "NORTH KOREA", "DPRK",
+                                     "Democratic People's Republic of Korea"])
+def test_spellings_of_one_country_share(country):
+    countries = listed_countries(listing("Pyongyang, Korea, North", "Pyongyang, Democratic People's Republic of Korea"))
+    assert countries == ["North Korea"]
+    assert shared_countries(country, countries) == ["North Korea"]
+
+
+def test_listed_countries_keep_names_with_commas_whole():
+    assert listed_countries(listing("Korea, North", "Moscow, RUSSIAN FEDERATION", "Amman, Jordan")) == \
+        ["Jordan", "North Korea", "Russia"]
+
+
+def test_risk_country_matches_whole_names():
+    assert risk_country("Korea, North")["name"] == "North Korea"
+    assert risk_country("Russian Federation")["name"] == "Russia"
+    assert risk_country("Cuba") is not None
+    assert risk_country("Belarusian Trade Mission") is None
+    assert risk_country("Niger") is None
+
+
+def test_country_mismatch_clears_neighbouring_names():
+    decision = Triage(log_path=None).decide("Helios Trading", listing("Lagos, Nigeria"), 85, "Niger")
+    assert decision["rule"] == COUNTRY_MISMATCH
+
+
+def test_risk_warnings_for_comma_country_names():
+    entity = add_risk_warnings({**listing("Pyongyang, Korea, North"), "remarks": ""})
+    assert entity["remarks"] == "[RISK WARNING: Location match North Korea]"
+
+
+def test_every_dropdown_country_resolves_to_one_country():
+    choices = [c for c in COUNTRY_CHOICES if c != "Unknown"]
+    canonical = [canonical_country(c) for c in choices]
+    assert not [c for c in canonical if "(" in c]
+    assert [canonical_country(c) for c in canonical] == canonical
+    # No two dropdown countries collapse into one (Niger / Nigeria, the two Congos)
+    assert len({country_key(c) for c in choices}) == len(choices)
+
+
+@pytest.mark.parametrize("choice, listed", [
+    ("Myanmar (Burma)", "Yangon, Burma"),
+    ("Congo (Kinshasa)", "Kinshasa, Congo, Democratic Republic of the"),
+    ("Congo (Brazzaville)", "Brazzaville, Congo, Republic of the"),
+    ("Ivory Coast", "Abidjan, Cote d'Ivoire"),
+    ("Czech Republic", "Prague, Czechia"),
+])
+def test_dropdown_countries_agree_with_list_spellings(choice, listed):
+    assert shared_countries(choice, listed_countries(listing(listed)))
+
+
+def test_burmese_listing_is_not_cleared_for_a_myanmar_customer():
+    match = {"name": "MYANMA GEMS ENTERPRISE", "type": "Entity", "aliases": [], "addresses": ["Yangon, Burma"]}
+    decision = Triage(log_path=None).decide("Myanma Gems Enterprises", match, 85, "Myanmar (Burma)")
+    assert decision["rule"] != COUNTRY_MISMATCH
+    assert risk_country("Myanmar (Burma)")["name"] == "Myanmar"
+
+
+def test_score_bands_are_off_by_default():
+    match = {"name": "HELIOS TRADING LLC", "type": "Entity", "aliases": [], "addresses": []}
+    triage = Triage(log_path=None)
+    # Just above a low slider threshold, and a token subset scoring 100: both go to the tribunal
+    assert triage.decide("Helios Shipping", match, 62)["action"] == "TRIBUNAL"
+    assert triage.decide("Helios", match, 100)["action"] == "TRIBUNAL"
+
+    banded = Triage({"clear_below": 80, "escalate_at": 100}, log_path=None)
+    assert banded.decide("Helios Shipping", match, 62)["action"] == "CLEAR"
+    assert banded.decide("Helios", match, 100)["action"] == "ESCALATE"
@@ -0,0 +1,204 @@
+import json
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+from types import SimpleNamespace
+
+import pytest
+
+from budget import PENDING_REVIEW, Tier2Budget
+from tribunal import MULTI_JUDGE_PROMPT, VERDICT_TOKENS, SanctionTribunal, estimate_tokens
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def tribunal(fixture_store, tmp_path, monkeypatch):
+    tribunal = SanctionTribunal(db_file=fixture_store, cache_file=str(tmp_path / "cache.sqlite"), triage_log=None,
+                                background_load=False)
+    tribunal.calls = []
+
+    def ask_gemini(agent, prompt, on_token=None):
+        ids = [int(i) for i in re.findall(r'"id": (\d+)', prompt)]
+        tribunal.calls.append(ids)
+        if not ids:
+            return json.dumps({"verdict": "LOW", "reasoning": "single case"})
+        return json.dumps([{"id": i, "verdict": "LOW", "reasoning": "packed case"} for i in ids])
+
+    monkeypatch.setattr(tribunal, "ask_gemini", ask_gemini)
+    return tribunal
+
+
+def cases(tribunal, count):
+    return [(f"Input Name {i}", tribunal.entity_by_row[i], 85.0) for i in range(count)]
+
+
+def smallest_case(tribunal, batch):
+    return estimate_tokens(MULTI_JUDGE_PROMPT.format(cases="")) + VERDICT_TOKENS + \
+        min(estimate_tokens(tribunal.case_line(i, *case)) for i, case in enumerate(batch))
+
+
+def test_headroom_under_one_case_leaves_every_case_pending(tribunal):
+    batch = cases(tribunal, 4)
+    budget = Tier2Budget(max_tokens=smallest_case(tribunal, batch) - 1)
+    assert tribunal.judge_batch(batch, budget=budget) == [None] * 4
+    assert tribunal.calls == []
+
+
+def test_headroom_under_one_case_per_worker_still_packs_small_calls(tribunal, monkeypatch):
+    batch = cases(tribunal, 4)
+    smallest = smallest_case(tribunal, batch)
+    # More workers than tokens of headroom: the per-worker share rounds down to zero
+    monkeypatch.setattr(tribunal.tier2, "max_workers", smallest * 2 + 1)
+    budget = Tier2Budget(max_tokens=smallest * 2)
+    verdicts = tribunal.judge_batch(batch, budget=budget)
+    # Calls are sized to the headroom, not to the full judge_token_budget, so the first one is admitted
+    assert tribunal.calls and len(tribunal.calls[0]) < len(batch)
+    assert verdicts[0]["verdict"] == "LOW"
+    assert budget.tokens <= budget.max_tokens
+
+
+def test_settle_batch_without_budget_reports_missing_verdicts_as_errors(tribunal, monkeypatch):
+    batch = cases(tribunal, 2)
+    monkeypatch.setattr(tribunal.triage, "decide", lambda *args: {"action": "TRIBUNAL", "rule": "T2"})
+    monkeypatch.setattr(tribunal, "judge_batch", lambda cases, **kwargs: [None] * len(cases))
+    verdicts = tribunal.settle_batch(batch)
+    assert all(isinstance(v, Exception) for v in verdicts)
+
+    verdicts = tribunal.settle_batch(batch, budget=Tier2Budget(max_tokens=0))
+    assert all(v["verdict"] == PENDING_REVIEW for v in verdicts)
+
+
+def test_importing_the_app_modules_does_not_load_colorama():
+    code = "import sys, screening_service, tribunal; sys.exit('colorama' in sys.modules)"
+    assert subprocess.run([sys.executable, "-c", code], cwd=ROOT).returncode == 0
+
+
+def test_batch_verdict_cache_is_keyed_by_country(tribunal):
+    batch = cases(tribunal, 1)
+    tribunal.judge_batch(batch, countries=["Russia"])
+    tribunal.judge_batch(batch, countries=["Russia"])
+    assert len(tribunal.calls) == 1
+    tribunal.judge_batch(batch, countries=["Cyprus"])
+    assert len(tribunal.calls) == 2
+
+
+class RateLimited(Exception):
+    status_code = 429
+
+
+class FlakyJudge:
+    """Gemini stand-in: case 0 is rate limited once; case 1 is rate limited, then answers only after case 0 has."""
+
+    def __init__(self):
+        self.attempts = Counter()
+        self.case0_done = threading.Event()
+
+    def generate_content(self, prompt):
+        case = int(re.search(r"Input: Input Name (\d+)", prompt).group(1))
+        self.attempts[case] += 1
+        if case in (0, 1) and self.attempts[case] == 1:
+            raise RateLimited()
+        if case == 1:
+            # Leave the executor time to admit more work while case 1 is still retrying
+            self.case0_done.wait(2)
+            time.sleep(0.2)
+        if case == 0:
+            self.case0_done.set()
+        return SimpleNamespace(text='{"verdict": "LOW", "reasoning": "ok"}', usage_metadata=None)
+
+
+def test_retries_keep_their_budget_reservation(fixture_store, tmp_path):
+    tribunal = SanctionTribunal(db_file=fixture_store, cache_file=str(tmp_path / "cache.sqlite"), triage_log=None,
+                                background_load=False, tier2_workers=4)
+    tribunal.judge_model = FlakyJudge()
+    tribunal.tier2.backoff = 0.01
+    batch = cases(tribunal, 6)
+    per_call = max(estimate_tokens(tribunal.match_prompt(*case)) for case in batch) + VERDICT_TOKENS
+    budget = Tier2Budget(max_tokens=int(per_call * 2.5))
+    verdicts = tribunal.judge_batch(batch, batched=False, budget=budget)
+    assert tribunal.tier2.retries == 2
+    assert budget.tokens <= budget.max_tokens
+    assert isinstance(verdicts[0], dict) and isinstance(verdicts[1], dict)
+
+
+def test_pack_cases_fills_calls_up_to_the_token_budget(tribunal, monkeypatch):
+    monkeypatch.setattr(tribunal, "judge_max_cases", 5)
+    lines = {i: tribunal.case_line(i, *case) for i, case in enumerate(cases(tribunal, 7) * 3)}
+    lines[99] = json.dumps({"id": 99, "input": "X" * 2000})
+    overhead = estimate_tokens(MULTI_JUDGE_PROMPT.format(cases=""))
+    groups = tribunal.pack_cases(lines, token_budget=400)
+
+    assert [i for group in groups for i in group] == list(lines)
+    assert all(len(group) <= 5 for group in groups)
+    for group in groups:
+        used = overhead + sum(estimate_tokens(lines[i]) + VERDICT_TOKENS for i in group)
+        # A case over the budget on its own still gets a call of its own
+        assert used <= 400 or group == [99]
+    # Groups only close when the next case would not fit
+    for group, following in zip(groups, groups[1:]):
+        used = overhead + sum(estimate_tokens(lines[i]) + VERDICT_TOKENS for i in group)
+        assert len(group) == 5 or used + estimate_tokens(lines[following[0]]) + VERDICT_TOKENS > 400
+    # With room to spare, judge_max_cases caps a call instead
+    assert [len(group) for group in tribunal.pack_cases(lines, token_budget=100_000)] == [5, 5, 5, 5, 2]
+
+
+def test_judge_matches_keeps_only_cases_answered_once(tribunal, monkeypatch):
+    batch = cases(tribunal, 4)
+    lines = {i: tribunal.case_line(i, *case) for i, case in enumerate(batch)}
+    reply = [{"id": 3, "verdict": "HIGH", "reasoning": "three"}, {"id": 0, "verdict": "LOW", "reasoning": "zero"},
+             {"id": 1, "verdict": "LOW"}, {"id": 1, "verdict": "HIGH"}, {"id": 7, "verdict": "LOW"},
+             {"id": 2, "reasoning": "no verdict"}]
+    monkeypatch.setattr(tribunal, "ask_gemini", lambda agent, prompt, on_token=None: json.dumps(reply))
+    assert tribunal.judge_matches([0, 1, 2, 3], lines) == {
+        3: {"verdict": "HIGH", "reasoning": "three"}, 0: {"verdict": "LOW", "reasoning": "zero"}}
+
+    monkeypatch.setattr(tribunal, "ask_gemini", lambda agent, prompt, on_token=None: '{"verdict": "LOW"}')
+    with pytest.raises(ValueError):
+        tribunal.judge_matches([0, 1], lines)
+
+
+def test_batch_verdicts_map_back_to_their_cases(tribunal, monkeypatch):
+    batch = cases(tribunal, 5)
+
+    def ask_gemini(agent, prompt, on_token=None):
+        ids = [int(i) for i in re.findall(r'"id": (\d+)', prompt)]
+        tribunal.calls.append(ids)
+        if not ids:
+            name = re.search(r"Input: (Input Name \d+)", prompt).group(1)
+            return json.dumps({"verdict": "HIGH", "reasoning": f"re-judged {name}"})
+        # Answers out of order and skips case 2
+        return json.dumps([{"id": i, "verdict": "LOW", "reasoning": f"packed {i}"} for i in reversed(ids) if i != 2])
+
+    monkeypatch.setattr(tribunal, "ask_gemini", ask_gemini)
+    verdicts = tribunal.judge_batch(batch)
+    assert [v["reasoning"] for v in verdicts] == ["packed 0", "packed 1", "re-judged Input Name 2", "packed 3", "packed 4"]
+    assert tribunal.calls == [[0, 1, 2, 3, 4], []]
+
+
+def test_rejudged_counts_distinct_cases(tribunal, monkeypatch):
+    # Rows 0, 2 and 4 are the same case; the packed call skips all of them
+    first, second, _, fourth = cases(tribunal, 4)
+    batch = [first, second, first, fourth, first]
+
+    def ask_gemini(agent, prompt, on_token=None):
+        ids = [int(i) for i in re.findall(r'"id": (\d+)', prompt)]
+        if not ids:
+            return json.dumps({"verdict": "LOW", "reasoning": "single case"})
+        return json.dumps([{"id": i, "verdict": "LOW", "reasoning": "packed"} for i in ids if i not in (0, 2, 4)])
+
+    monkeypatch.setattr(tribunal, "ask_gemini", ask_gemini)
+    verdicts = tribunal.judge_batch(batch)
+    assert [v["reasoning"] for v in verdicts] == ["single case", "packed", "single case", "packed", "single case"]
+    assert tribunal.rejudged == 1
+
+
+def test_default_verdict_cache_sits_beside_the_database(fixture_store, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    tribunal = SanctionTribunal(db_file=fixture_store, triage_log=None, background_load=False)
+    assert tribunal.verdict_cache.path == os.path.join(os.path.dirname(fixture_store), "verdict_cache.sqlite")
+    assert not os.path.exists(tmp_path / "verdict_cache.sqlite")
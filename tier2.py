@@ -0,0 +1,138 @@
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import nullcontext
+
+from metrics import METRICS
+
+# --- PROVIDER RATE LIMITS: (requests per minute, burst) ---
+DEFAULT_RATE_LIMITS = {
+    "groq": (30, 5),
+    "gemini": (60, 10),
+}
+
+# Rate limits and transient server errors are worth another attempt; anything else is final
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilling at `rate` tokens per second, holding at most `capacity`."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def status_code(exc):
+    """HTTP status of an SDK error. Groq errors carry `status_code`, google.api_core errors carry `code`."""
+    code = getattr(exc, "status_code", None)
+    if code is None:
+        code = getattr(exc, "code", None)
+    return code if isinstance(code, int) else None
+
+
+def retry_after(exc):
+    """Seconds from a Retry-After header, when the SDK exposes the response."""
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class Tier2Executor:
+    """
+    Runs Tier 2 LLM calls on a thread pool. Each provider gets its own token bucket,
+    429/5xx responses are retried with exponential backoff, and `map` returns results
+    in input order.
+    """
+
+    def __init__(self, max_workers=8, rate_limits=None, max_retries=4, backoff=1.0, max_backoff=30.0):
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        limits = {**DEFAULT_RATE_LIMITS, **(rate_limits or {})}
+        self.buckets = {provider: TokenBucket(rpm / 60, burst) for provider, (rpm, burst) in limits.items()}
+        self.retries = 0
+        self.lock = threading.Lock()
+
+    def call(self, provider, fn, *args, model=None, around=None):
+        """
+        fn(*args) under the provider's limits. Retries are counted per model, `model()` at the
+        time of the retry. `around(*args)` is a context manager held across every attempt.
+        """
+        bucket = self.buckets.get(provider)
+        with around(*args) if around else nullcontext():
+            for attempt in range(self.max_retries + 1):
+                if bucket:
+                    bucket.acquire()
+                try:
+                    return fn(*args)
+                except Exception as e:
+                    if status_code(e) not in RETRYABLE_STATUS or attempt == self.max_retries:
+                        raise
+                    with self.lock:
+                        self.retries += 1
+                    METRICS.count("llm_retries", model=model() if model else provider, status=status_code(e))
+                    delay = retry_after(e) or min(self.max_backoff, self.backoff * 2 ** attempt)
+                    time.sleep(delay * random.uniform(0.5, 1.0))
+
+    def map(self, provider, fn, items, progress=None, admit=None, model=None, around=None):
+        """
+        Calls fn(item) for every item under the provider's limits. A failed item's slot
+        holds the exception instead of a result. `progress(done, total)` runs on the
+        calling thread, so it is safe for Streamlit widgets.
+        With `admit`, items are submitted in order, at most max_workers at a time, each only
+        after admit(item) returns True; None means "ask again when a call in flight finishes".
+        After the first False (or None with nothing in flight) nothing more is submitted and
+        the remaining slots stay None. `model` and `around` are passed on to call().
+        """
+        results = [None] * len(items)
+        if not items:
+            return results
+        queued = deque(enumerate(items))
+        in_flight = self.max_workers if admit else len(items)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures, done = {}, 0
+            while queued or futures:
+                while queued and len(futures) < in_flight:
+                    i, item = queued[0]
+                    admitted = admit(item) if admit else True
+                    if admitted is None and futures:
+                        break
+                    if not admitted:
+                        queued.clear()
+                        break
+                    queued.popleft()
+                    futures[pool.submit(self.call, provider, fn, item, model=model, around=around)] = i
+                if not futures:
+                    break
+                finished, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    i = futures.pop(future)
+                    try:
+                        results[i] = future.result()
+                    except Exception as e:
+                        results[i] = e
+                    done += 1
+                    if progress:
+                        progress(done, len(items))
+        return results
@@ -0,0 +1,225 @@
+"""
+Deterministic triage between Tier 1 (RapidFuzz) and Tier 2 (the LLM tribunal).
+Clear-cut matches are escalated or cleared by fixed rules; only the ambiguous middle
+band is sent to the LLMs. Every decision carries the id of the rule that made it and
+can be appended to a JSONL audit log.
+"""
+import json
+import re
+import time
+
+from metrics import METRICS
+from name_index import LEGAL_SUFFIXES, normalize_name
+
+TRIAGE_LOG = "triage_audit.jsonl"
+
+# Rule ids, in evaluation order (escalations first, so a clear never masks an escalation)
+EXACT_NAME = "TR01_EXACT_NAME"
+HIGH_RISK_COUNTRY = "TR02_HIGH_RISK_COUNTRY"
+HIGH_SCORE = "TR03_HIGH_SCORE_BAND"
+TYPE_MISMATCH = "TR04_TYPE_MISMATCH"
+COUNTRY_MISMATCH = "TR05_COUNTRY_MISMATCH"
+LOW_SCORE = "TR06_LOW_SCORE_BAND"
+AMBIGUOUS = "TR00_AMBIGUOUS"
+
+DEFAULT_RULES = {
+    # Score bands are off (None) by default: the caller's threshold already decides what is a
+    # match, and a token subset scores 100 on token_set_ratio. Set them to clear or escalate by score alone.
+    # Scores below this are cleared without the tribunal
+    "clear_below": None,
+    # Scores at or above this are escalated without the tribunal
+    "escalate_at": None,
+    # Input and listing share a high-risk country and the score is at least this
+    "country_escalate_at": 90,
+    # A company-looking input against a listed Individual is cleared below this score
+    "type_mismatch_below": 95,
+    # Input country known, low risk and absent from the listing's addresses: cleared below this score
+    "country_mismatch_below": 90,
+    "disabled": [],
+}
+
+# Tokens that make an input look like an organisation (two-letter suffixes are too ambiguous in personal names)
+ORG_TOKENS = {t for t in LEGAL_SUFFIXES if len(t) > 2} | {
+    "co", "bank", "trading", "group", "holding", "holdings", "industries", "shipping", "airlines", "enterprises",
+}
+
+
+# Official and list spellings of a country -> the one name countries are compared under
+COUNTRY_NAMES = {
+    "North Korea": ["Korea, North", "Democratic People's Republic of Korea", "Korea, Democratic People's Republic of",
+                    "DPRK"],
+    "South Korea": ["Korea, South", "Republic of Korea", "Korea, Republic of"],
+    "Russia": ["Russian Federation"],
+    "Iran": ["Iran, Islamic Republic of", "Islamic Republic of Iran"],
+    "Syria": ["Syrian Arab Republic"],
+    "Venezuela": ["Venezuela, Bolivarian Republic of", "Bolivarian Republic of Venezuela"],
+    "Myanmar": ["Burma", "Myanmar (Burma)"],
+    "Belarus": ["Republic of Belarus"],
+    "Moldova": ["Moldova, Republic of", "Republic of Moldova"],
+    "Laos": ["Lao People's Democratic Republic"],
+    "Vietnam": ["Viet Nam"],
+    "Turkey": ["Turkiye"],
+    "United States": ["United States of America", "USA", "US"],
+    "United Kingdom": ["UK", "Great Britain", "United Kingdom of Great Britain and Northern Ireland"],
+    "United Arab Emirates": ["UAE"],
+    "Democratic Republic of the Congo": ["Congo (Kinshasa)", "Congo, Democratic Republic of the",
+                                         "Congo, The Democratic Republic of the", "DR Congo", "DRC"],
+    "Republic of the Congo": ["Congo (Brazzaville)", "Congo, Republic of the", "Congo-Brazzaville"],
+    "Ivory Coast": ["Cote d'Ivoire", "Côte d'Ivoire"],
+    "Czech Republic": ["Czechia"],
+    "Timor-Leste": ["East Timor"],
+    "North Macedonia": ["Macedonia", "The former Yugoslav Republic of Macedonia"],
+    "Palestine": ["Palestinian Territories", "State of Palestine", "West Bank and Gaza"],
+    "Gambia": ["The Gambia", "Gambia, The"],
+    "Bahamas": ["The Bahamas", "Bahamas, The"],
+    "Tanzania": ["Tanzania, United Republic of", "United Republic of Tanzania"],
+    "Bolivia": ["Bolivia, Plurinational State of", "Plurinational State of Bolivia"],
+    "Brunei": ["Brunei Darussalam"],
+}
+# The app's country dropdown; every entry resolves to one country through canonical_country()
+COUNTRY_CHOICES = [
+    "Unknown", "Afghanistan", "Albania", "Algeria", "Andorra", "Angola", "Argentina", "Armenia", "Australia", "Austria",
+    "Azerbaijan", "Bahamas", "Bahrain", "Bangladesh", "Barbados", "Belarus", "Belgium", "Belize", "Benin", "Bhutan",
+    "Bolivia", "Bosnia and Herzegovina", "Botswana", "Brazil", "Brunei", "Bulgaria", "Burkina Faso", "Burundi", "Cambodia",
+    "Cameroon", "Canada", "Central African Republic", "Chad", "Chile", "China", "Colombia", "Comoros", "Congo (Brazzaville)",
+    "Congo (Kinshasa)", "Costa Rica", "Croatia", "Cuba", "Cyprus", "Czech Republic", "Denmark", "Djibouti", "Dominican Republic",
+    "Ecuador", "Egypt", "El Salvador", "Equatorial Guinea", "Eritrea", "Estonia", "Ethiopia", "Fiji", "Finland", "France",
+    "Gabon", "Gambia", "Georgia", "Germany", "Ghana", "Greece", "Guatemala", "Guinea", "Guyana", "Haiti", "Honduras",
+    "Hong Kong", "Hungary", "Iceland", "India", "Indonesia", "Iran", "Iraq", "Ireland", "Israel", "Italy", "Ivory Coast",
+    "Jamaica", "Japan", "Jordan", "Kazakhstan", "Kenya", "Kuwait", "Kyrgyzstan", "Laos", "Latvia", "Lebanon", "Liberia",
+    "Libya", "Liechtenstein", "Lithuania", "Luxembourg", "Madagascar", "Malawi", "Malaysia", "Maldives", "Mali", "Malta",
+    "Mexico", "Moldova", "Monaco", "Mongolia", "Montenegro", "Morocco", "Mozambique", "Myanmar (Burma)", "Namibia", "Nepal",
+    "Netherlands", "New Zealand", "Nicaragua", "Niger", "Nigeria", "North Korea", "North Macedonia", "Norway", "Oman",
+    "Pakistan", "Palestine", "Panama", "Papua New Guinea", "Paraguay", "Peru", "Philippines", "Poland", "Portugal", "Qatar",
+    "Romania", "Russia", "Rwanda", "Saudi Arabia", "Senegal", "Serbia", "Sierra Leone", "Singapore", "Slovakia", "Slovenia",
+    "Somalia", "South Africa", "South Korea", "South Sudan", "Spain", "Sri Lanka", "Sudan", "Sweden", "Switzerland", "Syria",
+    "Taiwan", "Tajikistan", "Tanzania", "Thailand", "Timor-Leste", "Togo", "Trinidad and Tobago", "Tunisia", "Turkey",
+    "Turkmenistan", "Uganda", "Ukraine", "United Arab Emirates", "United Kingdom", "United States", "Uruguay", "Uzbekistan",
+    "Venezuela", "Vietnam", "Yemen", "Zambia", "Zimbabwe"
+]
+PARENTHETICAL = re.compile(r"\s*\([^)]*\)")
+COUNTRY_ALIASES = {normalize_name(alias): name for name, aliases in COUNTRY_NAMES.items() for alias in [name, *aliases]}
+
+
+def canonical_country(country):
+    """
+    The COUNTRY_NAMES name of a spelling, else the spelling itself (stripped). A spelling that
+    is not known as written is looked up again without its parenthetical ('Iran (Islamic Republic of)').
+    """
+    known = COUNTRY_ALIASES.get(normalize_name(country))
+    if known:
+        return known
+    bare = PARENTHETICAL.sub("", country or "").strip()
+    return COUNTRY_ALIASES.get(normalize_name(bare), bare)
+
+
+def country_key(country):
+    """Whole-name comparison key: 'Niger' and 'Nigeria', 'Sudan' and 'South Sudan' stay apart."""
+    return normalize_name(canonical_country(country))
+
+
+def address_country(address):
+    """The country of a 'City, Country' address; a known name with a comma in it ('Korea, North') is kept whole."""
+    parts = [p.strip() for p in address.split(",")]
+    for i in range(len(parts)):
+        known = COUNTRY_ALIASES.get(normalize_name(", ".join(parts[i:])))
+        if known:
+            return known
+    return parts[-1]
+
+
+def listed_countries(entity):
+    """Countries from an entity's 'City, Country' addresses, one name per country."""
+    return sorted({address_country(a) for a in entity.get('addresses', []) if a})
+
+
+def shared_countries(country, countries):
+    """Listed countries that are the input country, compared as whole normalized names."""
+    key = country_key(country) if country else None
+    return [c for c in countries if key and country_key(c) == key]
+
+
+def risk_country(country):
+    """The HIGH_RISK_COUNTRIES entry for a country name, or None."""
+    if not country:
+        return None
+    # Imported here: evidence_manager pulls in requests, which the screening path never needs
+    from evidence_manager import HIGH_RISK_COUNTRIES
+    key = country_key(country)
+    for data in HIGH_RISK_COUNTRIES.values():
+        if country_key(data["name"]) == key:
+            return data
+    return None
+
+
+def name_tokens(name):
+    """Normalized tokens in sorted order, so 'SMITH, John' and 'John Smith' compare equal."""
+    return tuple(sorted(normalize_name(name).split()))
+
+
+def guess_input_type(name):
+    """'Entity' when the input carries an organisation token, else None (unknown)."""
+    return "Entity" if ORG_TOKENS & set(normalize_name(name).split()) else None
+
+
+class Triage:
+    """Rules tier. `rules` overrides DEFAULT_RULES; rule ids listed in rules['disabled'] are skipped."""
+
+    def __init__(self, rules=None, log_path=TRIAGE_LOG):
+        self.rules = {**DEFAULT_RULES, **(rules or {})}
+        self.log_path = log_path
+
+    def decide(self, name, match, score, country=None, input_type=None):
+        """
+        Returns {"rule", "action", "reason"} where action is ESCALATE, CLEAR or TRIBUNAL.
+        ESCALATE/CLEAR decisions also carry a ready-made "verdict" dict.
+        """
+        rules = self.rules
+        country = None if country in (None, "", "Unknown") else country
+        input_type = input_type or guess_input_type(name)
+        countries = listed_countries(match)
+        shared = shared_countries(country, countries)
+
+        checks = [
+            (EXACT_NAME, "ESCALATE",
+             name_tokens(name) in {name_tokens(n) for n in [match['name'], *match.get('aliases', [])]},
+             "Input is an exact normalized match of a listed name."),
+            (HIGH_RISK_COUNTRY, "ESCALATE",
+             score >= rules["country_escalate_at"] and bool(shared) and risk_country(country) is not None,
+             f"Input and listing share high-risk country {country}."),
+            (HIGH_SCORE, "ESCALATE", rules["escalate_at"] is not None and score >= rules["escalate_at"],
+             f"Match score {int(score)}% is in the escalation band."),
+            (TYPE_MISMATCH, "CLEAR",
+             score < rules["type_mismatch_below"] and input_type == "Entity" and match.get('type') == "Individual",
+             "Input is an organisation, the listing is an individual."),
+            (COUNTRY_MISMATCH, "CLEAR",
+             score < rules["country_mismatch_below"] and bool(country) and bool(countries) and not shared
+             and risk_country(country) is None,
+             f"Input country {country} does not appear in the listing's addresses ({', '.join(countries)})."),
+            (LOW_SCORE, "CLEAR", rules["clear_below"] is not None and score < rules["clear_below"],
+             f"Match score {int(score)}% is in the clearance band."),
+        ]
+        for rule, action, hit, reason in checks:
+            if hit and rule not in rules["disabled"]:
+                verdict = {
+                    "verdict": "HIGH RISK" if action == "ESCALATE" else "LOW RISK",
+                    "confidence": 99 if rule == EXACT_NAME else 90,
+                    "reasoning": f"Triage rule {rule}: {reason}",
+                    "rule": rule,
+                }
+                return {"rule": rule, "action": action, "reason": reason, "verdict": verdict}
+        return {"rule": AMBIGUOUS, "action": "TRIBUNAL", "reason": "Ambiguous band, sent to the tribunal."}
+
+    def record(self, entries):
+        """Appends (name, match, score, country, decision) tuples to the audit log."""
+        for *_, decision in entries:
+            METRICS.count("triage_decisions", rule=decision["rule"])
+        if not self.log_path or not entries:
+            return
+        now = time.time()
+        with open(self.log_path, "a", encoding="utf-8") as f:
+            for name, match, score, country, decision in entries:
+                f.write(json.dumps({
+                    "ts": now, "input": name, "country": country or "", "entity_id": match['id'],
+                    "match": match['name'], "score": float(score), "rule": decision["rule"], "action": decision["action"],
+                }, ensure_ascii=False) + "\n")
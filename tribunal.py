@@ -1,92 +1,752 @@
 import json
 import os
-import streamlit as st
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from functools import lru_cache
+import numpy as np
 from rapidfuzz import process, fuzz
-from colorama import Fore, init
-import google.generativeai as genai
-from groq import Groq
+from budget import call_cost, pending_verdict, priority, usage_totals
+from metrics import METRICS
+from name_index import CandidateIndex, normalize_name
+from tier2 import Tier2Executor, status_code
+from triage import AMBIGUOUS, TRIAGE_LOG, Triage, listed_countries
+from verdict_cache import VerdictCache, cache_path
+from sanctions_store import STORE_FILE, flatten_names, open_database
 
-# Initialize Colorama
-init(autoreset=True)
+# 📦 JUDGE BATCHING: Rough token sizing (~4 chars per token) for multi-case prompts
+CHARS_PER_TOKEN = 4
+VERDICT_TOKENS = 60  # reply allowance per case
 
-class SanctionTribunal:
-    def __init__(self, db_file="consolidated_sanctions.json"):
-        # 🔒 KEYS: Look in Streamlit Secrets first, then Environment Variables
+MULTI_JUDGE_PROMPT = """
+        Role: Sanction Judge.
+        Each line below is one screening case: the customer input, the sanctioned match, the fuzzy score and the listed country.
+        {cases}
+        Task: For every case decide if it is High Risk. Output strictly a JSON array with one object per case id:
+        [{{ "id": <case id>, "verdict": "HIGH" or "LOW", "reasoning": "short reason" }}]
+        """
+
+
+# 🛡️ MODEL FALLBACKS: Used once a preferred model actually fails, instead of probing at startup
+MODEL_FALLBACKS = {"openai/gpt-oss-20b": "mixtral-8x7b-32768", "gemini-2.5-flash": "gemini-1.5-flash"}
+# Errors that mean "this model is not available to us" rather than a transient failure
+MODEL_UNAVAILABLE_STATUS = {400, 403, 404}
+
+# Built by the background loader; reading one before it finishes waits for it
+LOADED_ATTRS = {"data", "entity_by_row", "entity_names", "name_table", "norm_table", "name_starts", "name_owner",
+                "row_by_id", "rows_by_name", "name_index", "verdict_cache"}
+
+
+@lru_cache(maxsize=None)
+def colors():
+    """colorama's Fore, imported and initialised on the first console line rather than at module import."""
+    from colorama import Fore, init
+    init(autoreset=True)
+    return Fore
+
+
+def estimate_tokens(text):
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def parse_json_reply(text):
+    with METRICS.timer("verdict_parse_seconds"):
         try:
-            self.groq_api_key = st.secrets["GROQ_API_KEY"]
-            self.google_api_key = st.secrets["GOOGLE_API_KEY"]
-        except:
-            # Fallback for local testing
-            self.groq_api_key = os.getenv("GROQ_API_KEY")
-            self.google_api_key = os.getenv("GOOGLE_API_KEY")
+            return json.loads(text.replace("```json","").replace("```",""))
+        except ValueError:
+            METRICS.count("verdict_parse_errors")
+            raise
+
 
-        if not self.groq_api_key or not self.google_api_key:
-            print(f"{Fore.RED}❌ Warning: API Keys missing. Set them in .streamlit/secrets.toml")
+def reported_usage(response):
+    """(prompt, completion) token counts from a Groq or Gemini response, or None when it has none."""
+    usage = getattr(response, "usage", None)
+    if usage is not None and getattr(usage, "prompt_tokens", None) is not None:
+        return usage.prompt_tokens, usage.completion_tokens
+    usage = getattr(response, "usage_metadata", None)
+    if usage is not None and getattr(usage, "prompt_token_count", None) is not None:
+        return usage.prompt_token_count, usage.candidates_token_count
+    return None
+
+
+class SanctionTribunal:
+    def __init__(self, db_file=STORE_FILE, recall_check=False, tier2_workers=8, rate_limits=None,
+                 cache_file=None, judge_token_budget=4000, judge_max_cases=40,
+                 triage_rules=None, triage_log=TRIAGE_LOG, background_load=True):
+        # 🔒 KEYS & CLIENTS: Resolved on the first Tier 2 call, so startup needs no SDK import or network
+        self.clients_lock = threading.Lock()
+        self._groq_client = None
+        self._judge_model = None
 
-        # Initialize Clients
-        self.groq_client = Groq(api_key=self.groq_api_key)
-        genai.configure(api_key=self.google_api_key)
-        
         # --- MODELS CONFIGURATION ---
         self.MODEL_PROSECUTOR = "llama-3.3-70b-versatile"
-        
-        # 🛡️ DEFENSE (Auto-Fallback)
+
+        # 🛡️ DEFENSE (Auto-Fallback on first failure)
         self.PREFERRED_DEFENSE = "openai/gpt-oss-20b"
-        self.FALLBACK_DEFENSE = "mixtral-8x7b-32768"
-        self.MODEL_DEFENSE = self.verify_defense_model()
-        
-        # ⚖️ JUDGE (Strictly enforced as requested)
-        # ✅ FIX: We now initialize the actual GenerativeModel object
-        self.judge_model_id = "gemini-2.5-flash" 
-        try:
-            self.judge_model = genai.GenerativeModel(self.judge_model_id)
-        except Exception:
-            # Fallback if 2.5 is not found (just in case)
-            print(f"{Fore.YELLOW}⚠️ Gemini 2.5 not found, falling back to 1.5-flash")
-            self.judge_model = genai.GenerativeModel("gemini-1.5-flash")
+        self.FALLBACK_DEFENSE = MODEL_FALLBACKS[self.PREFERRED_DEFENSE]
+        self.MODEL_DEFENSE = self.PREFERRED_DEFENSE
 
-        print(f"{Fore.CYAN}📂 Loading Evidence Room ({db_file})...")
+        # ⚖️ JUDGE (Strictly enforced as requested; 1.5-flash only if 2.5 turns out to be missing)
+        self.judge_model_id = "gemini-2.5-flash"
+
+        # 🚦 TIER 2 EXECUTOR: Concurrent, rate-limited LLM calls for batch runs
+        self.tier2 = Tier2Executor(max_workers=tier2_workers, rate_limits=rate_limits)
+        # Multi-case judge calls stay under this many prompt + reply tokens
+        self.judge_token_budget = judge_token_budget
+        self.judge_max_cases = judge_max_cases
+        self.rejudged = 0
+        # ⏱️ AGENT LATENCY: Time-to-first-token and total per call, for comparing models
+        self.agent_latency = deque(maxlen=1000)
+        # 🪙 USAGE METER: Per-thread list collecting each LLM call's tokens while metering() is active
+        self.meter = threading.local()
+
+        # 🚥 TRIAGE: Clear-cut matches are settled by rules before any LLM call
+        self.triage = Triage(triage_rules, log_path=triage_log)
+
+        # 🔬 RECALL CHECK: Re-runs the brute-force scan and records any match the index lost
+        self.recall_check = recall_check
+        self.recall_misses = []
+
+        # 📂 EVIDENCE ROOM: DB, lookup tables, index and verdict cache load on a background thread
+        self.db_file = db_file
+        # Beside the DB by default, so the app, the service and the CLI share one cache wherever they start
+        self.cache_file = cache_file or cache_path(db_file)
+        self.load_error = None
+        self.loaded = threading.Event()
+        threading.Thread(target=self.load_evidence, name="evidence-loader", daemon=True).start()
+        if not background_load:
+            self.wait_until_loaded()
+
+    def __getattr__(self, name):
+        # Only reached for attributes not set yet: tables still being built by the loader
+        loaded = self.__dict__.get("loaded")
+        if name not in LOADED_ATTRS or loaded is None:
+            raise AttributeError(name)
+        self.wait_until_loaded()
         try:
-            with open(db_file, 'r', encoding='utf-8') as f:
-                self.data = json.load(f)
-            self.entity_names = [e['name'] for e in self.data['entities']]
-            print(f"{Fore.GREEN}✅ Tribunal Ready. {len(self.entity_names)} entities loaded.")
-        except FileNotFoundError:
-            print(f"{Fore.RED}❌ Database missing. Please run evidence_manager.py")
-            self.data = {'entities': []}
-            self.entity_names = []
-
-    def verify_defense_model(self):
-        """Checks if the preferred model is reachable; falls back if not."""
-        if not self.groq_api_key:
-            return self.FALLBACK_DEFENSE
-            
+            return self.__dict__[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def load_evidence(self):
         try:
-            # A quick, 1-token dry run to see if the model exists
-            self.groq_client.chat.completions.create(
-                model=self.PREFERRED_DEFENSE,
-                messages=[{"role": "user", "content": "Ping"}],
-                max_tokens=1
+            print(f"{colors().CYAN}📂 Loading Evidence Room ({self.db_file})...")
+            try:
+                # Binary store is memory-mapped and decoded lazily; .json still loads for audit copies
+                self.data = open_database(self.db_file)
+                print(f"{colors().GREEN}✅ Tribunal Ready. {len(self.data['entities'])} entities loaded.")
+            except FileNotFoundError:
+                print(f"{colors().RED}❌ Database missing. Please run evidence_manager.py")
+                self.data = {'entities': []}
+            self.build_tables()
+
+            # 💾 VERDICT CACHE: Reuses verdicts until the list version or a model changes
+            self.verdict_cache = VerdictCache(
+                self.cache_file,
+                list_version=self.data.get('last_updated', ''),
+                models=self.model_ids(),
             )
-            print(f"{Fore.GREEN}✅ Defense Model Verified: {self.PREFERRED_DEFENSE}")
-            return self.PREFERRED_DEFENSE
         except Exception as e:
-            print(f"{Fore.YELLOW}⚠️ Preferred model ({self.PREFERRED_DEFENSE}) unavailable. Switching to fallback ({self.FALLBACK_DEFENSE}).")
-            return self.FALLBACK_DEFENSE
+            self.load_error = e
+        finally:
+            self.loaded.set()
+
+    def wait_until_loaded(self, timeout=None):
+        """Blocks until the background load is done. Re-raises its error, if any."""
+        self.loaded.wait(timeout)
+        if self.load_error is not None:
+            raise RuntimeError(f"Evidence room failed to load: {self.load_error}") from self.load_error
+        return self.loaded.is_set()
+
+    # --- LAZY CLIENTS ---
+
+    def lookup_key(self, name):
+        """Streamlit Secrets first (only when running under Streamlit), then Environment Variables."""
+        st = sys.modules.get("streamlit")
+        try:
+            return st.secrets[name]
+        except Exception:
+            # Fallback for local testing
+            return os.getenv(name)
+
+    def keys_configured(self):
+        return bool(self.lookup_key("GROQ_API_KEY") and self.lookup_key("GOOGLE_API_KEY"))
+
+    def api_key(self, name):
+        key = self.lookup_key(name)
+        if not key:
+            print(f"{colors().RED}❌ Warning: {name} missing. Set it in .streamlit/secrets.toml")
+        return key
+
+    @property
+    def groq_client(self):
+        if self._groq_client is None:
+            with self.clients_lock:
+                if self._groq_client is None:
+                    from groq import Groq
+                    self._groq_client = Groq(api_key=self.api_key("GROQ_API_KEY"))
+        return self._groq_client
+
+    @groq_client.setter
+    def groq_client(self, client):
+        self._groq_client = client
+
+    @property
+    def judge_model(self):
+        if self._judge_model is None:
+            with self.clients_lock:
+                if self._judge_model is None:
+                    import google.generativeai as genai
+                    # GEMINI_API_ENDPOINT (e.g. the local fake_llm_server) mirrors the Groq SDK's GROQ_BASE_URL
+                    endpoint = os.getenv("GEMINI_API_ENDPOINT")
+                    options = {"transport": "rest", "client_options": {"api_endpoint": endpoint}} if endpoint else {}
+                    genai.configure(api_key=self.api_key("GOOGLE_API_KEY"), **options)
+                    self._judge_model = genai.GenerativeModel(self.judge_model_id)
+        return self._judge_model
+
+    @judge_model.setter
+    def judge_model(self, model):
+        self._judge_model = model
+
+    def model_ids(self):
+        return (self.MODEL_PROSECUTOR, self.MODEL_DEFENSE, self.judge_model_id)
+
+    def fall_back(self, model, error):
+        """
+        Switches away from a model that failed as unavailable (not a transient error).
+        Returns the replacement model id, or None when the error should propagate.
+        """
+        fallback = MODEL_FALLBACKS.get(model)
+        if fallback is None or status_code(error) not in MODEL_UNAVAILABLE_STATUS:
+            return None
+        with self.clients_lock:
+            if self.MODEL_DEFENSE == model:
+                self.MODEL_DEFENSE = fallback
+            if self.judge_model_id == model:
+                self.judge_model_id = fallback
+                self._judge_model = None
+            if self.loaded.is_set() and self.load_error is None:
+                self.verdict_cache.set_models(self.model_ids())
+        print(f"{colors().YELLOW}⚠️ Model {model} unavailable ({error}). Switching to fallback ({fallback}).")
+        return fallback
+
+    def build_tables(self):
+        """Builds the row, id and name lookup tables plus the Tier 1 index. Rows line up with entity_names."""
+        self.entity_by_row = self.data['entities']
+        # A mapped store already holds the name/id columns, so records stay undecoded
+        store = getattr(self.entity_by_row, 'store', None)
+        if store:
+            self.entity_names = self.entity_by_row.names
+            entity_ids = self.entity_by_row.ids
+            self.name_table = self.entity_by_row.name_table
+            starts = self.entity_by_row.name_starts
+        else:
+            self.entity_names = [e['name'] for e in self.entity_by_row]
+            entity_ids = [e['id'] for e in self.entity_by_row]
+            self.name_table, starts = flatten_names(self.entity_by_row)
+        # Flat name table (primary names + aliases, grouped by entity) with an integer owner per name
+        self.name_starts = np.asarray(starts, dtype=np.int64)
+        self.name_owner = np.repeat(np.arange(len(self.entity_names), dtype=np.int32), np.diff(self.name_starts))
+        self.row_by_id = {entity_id: row for row, entity_id in enumerate(entity_ids)}
+        # Several designees can share a name; each keeps its own row
+        self.rows_by_name = {}
+        for row, name in enumerate(self.entity_names):
+            self.rows_by_name.setdefault(name, []).append(row)
+
+        # normalize_name() of every name-table entry: the index keys and what scan_batch scores against
+        self.norm_table = store.column('norm_names') if store else [normalize_name(n) for n in self.name_table]
+
+        # ⚡ TIER 1 INDEX: Narrows each lookup to a short candidate set of names (aliases included)
+        self.name_index = CandidateIndex(self.name_table, normalized=self.norm_table)
+
+    def get_entity_details(self, entity_id):
+        row = self.row_by_id.get(entity_id)
+        if row is None:
+            return None
+        with METRICS.timer("entity_lookup_seconds"):
+            return self.entity_by_row[row]
+
+    def entities_named(self, name):
+        """All entities listed under exactly this name (homonyms are separate designations)."""
+        return [self.entity_by_row[r] for r in self.rows_by_name.get(name, [])]
+
+    def best_match(self, query_name, exhaustive=False):
+        """
+        Returns (entity row, score) for the closest name or alias, or None.
+        Scores only index candidates unless exhaustive. The normalize_name()d query is scored
+        against the normalized name table, exactly like scan_batch, so both tabs agree.
+        """
+        rows = None if exhaustive else self.name_index.candidates(query_name)
+        query = normalize_name(query_name)
+        if rows is None:
+            # Use token_set_ratio for smart partial matching
+            match = process.extractOne(query, self.norm_table, scorer=fuzz.token_set_ratio)
+            # match is (name, score, index)
+            return (int(self.name_owner[match[2]]), match[1]) if match else None
+
+        if not rows:
+            return None
+        match = process.extractOne(query, [self.norm_table[r] for r in rows], scorer=fuzz.token_set_ratio)
+        return (int(self.name_owner[rows[match[2]]]), match[1]) if match else None
 
-    def get_entity_details(self, name):
-        for e in self.data['entities']:
-            if e['name'] == name:
-                return e
-        return None
+    def measure_recall(self, queries, threshold=0):
+        """Compares the indexed path with brute force. A miss is any query whose best score above threshold got lower."""
+        misses = []
+        checked = 0
+        for query in queries:
+            exact = self.best_match(query, exhaustive=True)
+            if not exact or exact[1] < threshold:
+                continue
+            checked += 1
+            fast = self.best_match(query)
+            if not fast or fast[1] < exact[1]:
+                misses.append({
+                    "query": query,
+                    "expected": self.entity_names[exact[0]], "expected_score": exact[1],
+                    "found": self.entity_names[fast[0]] if fast else None, "found_score": fast[1] if fast else 0,
+                })
+        return {"queries": len(queries), "checked": checked, "misses": misses, "recall": 1 - len(misses) / max(checked, 1)}
 
     def scan_database(self, query_name):
         if not self.entity_names:
             return None, 0
-            
-        # Use token_set_ratio for smart partial matching
-        match = process.extractOne(query_name, self.entity_names, scorer=fuzz.token_set_ratio)
+
+        with METRICS.timer("tier1_scan_seconds", mode="single"):
+            match = self.best_match(query_name)
+        if self.recall_check:
+            report = self.measure_recall([query_name])
+            if report["misses"]:
+                print(f"{colors().YELLOW}⚠️ Index recall miss for '{query_name}': {report['misses'][0]['expected']}")
+                self.recall_misses.extend(report["misses"])
         if match:
-            # match is (name, score, index)
-            return self.get_entity_details(match[0]), match[1]
-        return None, 0
\ No newline at end of file
+            with METRICS.timer("entity_lookup_seconds"):
+                entity = self.entity_by_row[match[0]]
+            return entity, match[1]
+        return None, 0
+
+    def scan_many(self, query_names):
+        """
+        scan_database for a micro-batch of concurrent queries. Repeated queries are scored once;
+        when the queries' index candidates overlap enough, one cdist over the union replaces the
+        per-query extractOne calls (a query then also sees its neighbours' candidates, so its score
+        is never lower than scan_database's). Returns (entity, score) per query.
+        """
+        if not self.entity_names or not query_names:
+            return [(None, 0)] * len(query_names)
+
+        with METRICS.timer("tier1_scan_seconds", mode="microbatch"):
+            unique = list(dict.fromkeys(query_names))
+            found, candidates = {}, {}
+            for query in unique:
+                rows = self.name_index.candidates(query)
+                if rows is None:
+                    found[query] = self.best_match(query, exhaustive=True)
+                elif not rows:
+                    found[query] = None
+                else:
+                    candidates[query] = rows
+
+            # Scored normalized on both sides, like best_match and scan_batch
+            norms = {query: normalize_name(query) for query in candidates}
+            union = sorted(set().union(*candidates.values())) if candidates else []
+            if len(candidates) > 1 and len(candidates) * len(union) <= 2 * sum(len(r) for r in candidates.values()):
+                queries = list(candidates)
+                block = process.cdist([norms[q] for q in queries], [self.norm_table[r] for r in union],
+                                      scorer=fuzz.token_set_ratio, dtype=np.float32, workers=-1)
+                # argmax keeps the first of equal scores, same as extractOne over sorted rows
+                best = block.argmax(axis=1)
+                for query, col, score in zip(queries, best, block[np.arange(len(queries)), best]):
+                    found[query] = (int(self.name_owner[union[col]]), float(score))
+            else:
+                for query, rows in candidates.items():
+                    match = process.extractOne(norms[query], [self.norm_table[r] for r in rows], scorer=fuzz.token_set_ratio)
+                    found[query] = (int(self.name_owner[rows[match[2]]]), match[1]) if match else None
+
+        return [(self.entity_by_row[found[q][0]], found[q][1]) if found[q] else (None, 0) for q in query_names]
+
+    def scan_batch(self, names, threshold=0, top_k=1, chunk_cells=16_000_000, workers=-1):
+        """
+        Tier 1 for a whole column at once. Scores every normalize_name()d input against the flat
+        normalized name table (aliases included), so case and punctuation never change a score,
+        with rapidfuzz cdist on all cores, in chunks of about `chunk_cells`
+        scores to bound memory, then keeps each entity's best alias score.
+        Returns columnar arrays 'rows' and 'scores' of shape (len(names), top_k) holding
+        distinct entities, best first; row -1 means nothing reached the threshold.
+        """
+        names = [normalize_name(n) if isinstance(n, str) else "" for n in names]
+        rows = np.full((len(names), top_k), -1, dtype=np.int64)
+        scores = np.zeros((len(names), top_k), dtype=np.float32)
+        if not self.entity_names or not names:
+            return {"rows": rows, "scores": scores}
+
+        start_time = time.perf_counter()
+        k = min(top_k, len(self.entity_names))
+        chunk = max(1, chunk_cells // len(self.name_table))
+        has_aliases = len(self.name_table) != len(self.entity_names)
+        for start in range(0, len(names), chunk):
+            # score_cutoff zeroes everything below the threshold inside rapidfuzz
+            block = process.cdist(
+                names[start:start + chunk], self.norm_table, scorer=fuzz.token_set_ratio,
+                score_cutoff=threshold, dtype=np.float32, workers=workers
+            )
+            if has_aliases:
+                # Names are grouped by owner, so one reduceat gives the best score per entity
+                block = np.maximum.reduceat(block, self.name_starts[:-1], axis=1)
+            if k == 1:
+                # argmax keeps the first of equal scores, same as extractOne
+                top = block.argmax(axis=1)[:, None]
+            else:
+                top = np.argpartition(-block, k - 1, axis=1)[:, :k]
+            top_scores = np.take_along_axis(block, top, axis=1)
+            order = np.lexsort((top, -top_scores))
+            top = np.take_along_axis(top, order, axis=1)
+            top_scores = np.take_along_axis(top_scores, order, axis=1)
+
+            hit = top_scores >= threshold if threshold > 0 else np.ones_like(top_scores, dtype=bool)
+            end = start + len(block)
+            rows[start:end, :k] = np.where(hit, top, -1)
+            scores[start:end, :k] = np.where(hit, top_scores, 0)
+        METRICS.observe("tier1_scan_seconds", time.perf_counter() - start_time, mode="batch")
+        METRICS.count("tier1_names", len(names))
+        return {"rows": rows, "scores": scores}
+
+    # --- TIER 2: THE TRIBUNAL ---
+
+    def prosecute(self, name, match, score, country, on_token=None):
+        # Prosecutor Prompt: Aggressive, Courtroom Style
+        pros_prompt = (
+            f"Role: Aggressive Sanctions Prosecutor. "
+            f"Address the court directly ('Your Honor...'). "
+            f"Evidence: Input '{name}' matches sanctioned entity '{match['name']}' ({int(score)}%). Country: {country}. "
+            f"Task: Argue forcefully that this is a risk. Keep it under 60 words. Be punchy."
+        )
+        return self.ask_groq("prosecutor", self.MODEL_PROSECUTOR, pros_prompt, on_token)
+
+    def defend(self, name, match, pros_arg, on_token=None):
+        # Defense Prompt: Protective, Technical
+        def_prompt = (
+            f"Role: Defense Attorney. "
+            f"Address the court directly ('Your Honor, I object...'). "
+            f"Evidence: Input '{name}' vs Match '{match['name']}'. "
+            f"Prosecution's Claim: '{pros_arg}'. "
+            f"Task: Highlight that name matches are not identity matches. Point out missing birth dates/biometrics. "
+            f"Keep it under 60 words. Be respectful but firm."
+        )
+        return self.ask_groq("defense", self.MODEL_DEFENSE, def_prompt, on_token)
+
+    def judge(self, pros_arg, def_arg, score, on_token=None):
+        """Returns the judge's verdict dict. Raises ValueError when the reply is not valid JSON."""
+        # Judge Prompt: Decisive, Percentage
+        judge_prompt = (
+            f"Act as a Judge and respond like a legal Judge. "
+            f"Prosecution Argument: {pros_arg} "
+            f"Defense Argument: {def_arg} "
+            f"Weigh the risk based on the name match ({int(score)}%) and country. "
+            f"Output strictly valid JSON: {{ \"verdict\": \"HIGH RISK\" or \"LOW RISK\", \"confidence\": <int 0-100>, \"reasoning\": \"<short judicial summary>\" }}"
+        )
+        # Streamed JSON is only parsed once the whole reply is in
+        judge_resp = self.ask_gemini("judge", judge_prompt, on_token)
+        return parse_json_reply(judge_resp)
+
+    # --- STREAMING & AGENT LATENCY ---
+
+    def record_latency(self, agent, model, start, first_token, streamed, prompt, text, usage=None):
+        """Latency sample plus metrics; token counts are the provider's when reported, else estimated."""
+        end = time.perf_counter()
+        sample = {
+            "agent": agent, "model": model, "streamed": streamed,
+            "ttft": (first_token or end) - start, "total": end - start,
+        }
+        self.agent_latency.append(sample)
+        METRICS.observe("agent_seconds", sample["total"], agent=agent, model=model)
+        METRICS.observe("agent_ttft_seconds", sample["ttft"], agent=agent, model=model)
+        prompt_tokens, completion_tokens = usage or (estimate_tokens(prompt), estimate_tokens(text or ""))
+        METRICS.count("llm_calls", model=model)
+        METRICS.count("llm_tokens", prompt_tokens, model=model, kind="prompt")
+        METRICS.count("llm_tokens", completion_tokens, model=model, kind="completion")
+        METRICS.count("llm_cost_usd", call_cost(model, prompt_tokens, completion_tokens), model=model)
+        calls = getattr(self.meter, "calls", None)
+        if calls is not None:
+            calls.append((model, prompt_tokens, completion_tokens))
+
+    @contextmanager
+    def metering(self):
+        """Collects (model, prompt_tokens, completion_tokens) for every LLM call made on this thread inside the block."""
+        usage = []
+        self.meter.calls = usage
+        try:
+            yield usage
+        finally:
+            self.meter.calls = None
+
+    @contextmanager
+    def metered(self, spent, key, budget):
+        """
+        Block whose LLM usage is added to spent[key] and settled on `budget` (if any) when it
+        ends, even when it raises. Held around every retry of a call, so its reservation lasts until the last one.
+        """
+        with self.metering() as usage:
+            try:
+                yield
+            finally:
+                spent.setdefault(key, []).extend(usage)
+                if budget is not None:
+                    budget.settle(key, usage)
+
+    def ask_groq(self, agent, model, prompt, on_token=None):
+        """
+        One Groq chat completion. With `on_token`, the reply is streamed and each text delta
+        passed on as it arrives. An unavailable model is swapped for its fallback once.
+        """
+        try:
+            return self.groq_reply(agent, model, prompt, on_token)
+        except Exception as e:
+            METRICS.count("llm_errors", model=model, status=status_code(e))
+            fallback = self.fall_back(model, e)
+            if fallback is None:
+                raise
+            return self.groq_reply(agent, fallback, prompt, on_token)
+
+    def groq_reply(self, agent, model, prompt, on_token=None):
+        start = time.perf_counter()
+        messages = [{"role": "user", "content": prompt}]
+        if on_token is None:
+            response = self.groq_client.chat.completions.create(messages=messages, model=model)
+            text = response.choices[0].message.content
+            self.record_latency(agent, model, start, None, False, prompt, text, reported_usage(response))
+            return text
+
+        parts, first_token = [], None
+        for chunk in self.groq_client.chat.completions.create(messages=messages, model=model, stream=True):
+            token = chunk.choices[0].delta.content if chunk.choices else None
+            if token:
+                first_token = first_token or time.perf_counter()
+                parts.append(token)
+                on_token(token)
+        text = "".join(parts)
+        self.record_latency(agent, model, start, first_token, True, prompt, text)
+        return text
+
+    def ask_gemini(self, agent, prompt, on_token=None):
+        """One Gemini generate_content call, streamed chunk by chunk when `on_token` is given. Falls back like ask_groq."""
+        model = self.judge_model_id
+        try:
+            return self.gemini_reply(agent, prompt, on_token)
+        except Exception as e:
+            METRICS.count("llm_errors", model=model, status=status_code(e))
+            if self.fall_back(model, e) is None:
+                raise
+            return self.gemini_reply(agent, prompt, on_token)
+
+    def gemini_reply(self, agent, prompt, on_token=None):
+        judge_model, model = self.judge_model, self.judge_model_id
+        start = time.perf_counter()
+        if on_token is None:
+            response = judge_model.generate_content(prompt)
+            self.record_latency(agent, model, start, None, False, prompt, response.text, reported_usage(response))
+            return response.text
+
+        parts, first_token = [], None
+        for chunk in judge_model.generate_content(prompt, stream=True):
+            token = chunk.text
+            if token:
+                first_token = first_token or time.perf_counter()
+                parts.append(token)
+                on_token(token)
+        text = "".join(parts)
+        self.record_latency(agent, model, start, first_token, True, prompt, text)
+        return text
+
+    def cache_stats(self):
+        return self.verdict_cache.stats()
+
+    def latency_summary(self):
+        """Median time-to-first-token and total latency per (agent, model, streamed)."""
+        groups = {}
+        for sample in list(self.agent_latency):
+            groups.setdefault((sample["agent"], sample["model"], sample["streamed"]), []).append(sample)
+        return [
+            {"agent": agent, "model": model, "streamed": streamed, "calls": len(samples),
+             "ttft_p50": round(float(np.median([x["ttft"] for x in samples])), 3),
+             "total_p50": round(float(np.median([x["total"] for x in samples])), 3)}
+            for (agent, model, streamed), samples in groups.items()
+        ]
+
+    def convene(self, name, match, score, country, on_token=None):
+        """
+        Triage first; only the ambiguous band gets the full Prosecutor -> Defense -> Judge
+        round trip, served from the verdict cache when possible. The case records the rule id.
+        `on_token(agent, text)` streams each agent's reply ("prosecutor", "defense", "judge") as it arrives.
+        """
+        stream = (lambda agent: lambda token: on_token(agent, token)) if on_token else (lambda agent: None)
+        decision = self.triage.decide(name, match, score, country)
+        self.triage.record([(name, match, score, country, decision)])
+        if decision['action'] != "TRIBUNAL":
+            note = f"Tribunal not convened: settled by triage rule {decision['rule']}."
+            return {"pros_arg": note, "def_arg": note, "verdict": decision['verdict'], "rule": decision['rule']}
+
+        cached = self.verdict_cache.get("tribunal", name, match['id'], country)
+        if cached:
+            return {**cached, "tokens": 0, "cost_usd": 0.0}
+
+        with self.metering() as usage:
+            pros_arg = self.prosecute(name, match, score, country, stream("prosecutor"))
+            def_arg = self.defend(name, match, pros_arg, stream("defense"))
+            verdict = self.judge(pros_arg, def_arg, score, stream("judge"))
+        case = {"pros_arg": pros_arg, "def_arg": def_arg, "verdict": verdict, "rule": AMBIGUOUS}
+        self.verdict_cache.put("tribunal", name, match['id'], country, case)
+        tokens, cost = usage_totals(usage)
+        return {**case, "tokens": tokens, "cost_usd": round(cost, 6)}
+
+    def match_prompt(self, name, match, score):
+        return f"""
+        Role: Sanction Judge. 
+        Input: {name}. Match: {match['name']} ({int(score)}%). 
+        Task: Is this High Risk? Output strictly JSON: {{ "verdict": "HIGH" or "LOW", "reasoning": "short reason" }}
+        """
+
+    def judge_match(self, name, match, score):
+        """Single-call Tier 2 for batch rows: the judge rules directly on the match. Raises on unparseable output."""
+        return parse_json_reply(self.ask_gemini("batch_judge", self.match_prompt(name, match, score)))
+
+    def case_line(self, case_id, name, match, score):
+        """One case of a multi-case prompt, as a JSON line."""
+        countries = listed_countries(match)
+        return json.dumps({"id": case_id, "input": name, "match": match['name'], "score": int(score),
+                           "country": ", ".join(countries) or "Unknown"}, ensure_ascii=False)
+
+    def pack_cases(self, lines, token_budget=None):
+        """
+        Splits {case_id: line} into groups whose prompt plus expected replies fit the token
+        budget (judge_token_budget unless given), so the number of cases per call adapts to how long the names are.
+        """
+        if token_budget is None:
+            token_budget = self.judge_token_budget
+        overhead = estimate_tokens(MULTI_JUDGE_PROMPT.format(cases=""))
+        groups, group, used = [], [], overhead
+        for case_id, line in lines.items():
+            cost = estimate_tokens(line) + VERDICT_TOKENS
+            if group and (used + cost > token_budget or len(group) >= self.judge_max_cases):
+                groups.append(group)
+                group, used = [], overhead
+            group.append(case_id)
+            used += cost
+        if group:
+            groups.append(group)
+        return groups
+
+    def group_tokens(self, case_ids, lines):
+        """Estimated (prompt, completion) tokens of one multi-case judge call, sized like pack_cases."""
+        prompt = estimate_tokens(MULTI_JUDGE_PROMPT.format(cases="")) + sum(estimate_tokens(lines[i]) for i in case_ids)
+        return prompt, VERDICT_TOKENS * len(case_ids)
+
+    def judge_matches(self, case_ids, lines):
+        """
+        One judge call for several cases. Returns {case_id: verdict} for the cases answered
+        exactly once with a verdict; missing, duplicated or unknown ids are left out.
+        Raises when the reply is not a JSON array.
+        """
+        prompt = MULTI_JUDGE_PROMPT.format(cases="\n        ".join(lines[i] for i in case_ids))
+        answer = parse_json_reply(self.ask_gemini("batch_judge", prompt))
+        if not isinstance(answer, list):
+            raise ValueError("Judge reply is not a JSON array")
+
+        expected = set(case_ids)
+        answered = [a for a in answer if isinstance(a, dict) and a.get('id') in expected and isinstance(a.get('verdict'), str)]
+        seen = Counter(a['id'] for a in answered)
+        return {a['id']: {k: v for k, v in a.items() if k != 'id'} for a in answered if seen[a['id']] == 1}
+
+    def judge_batch(self, cases, progress=None, batched=True, budget=None, countries=None):
+        """
+        Judges (name, match, score) cases concurrently; verdicts (or exceptions) come back
+        in input order. Cached verdicts (keyed by input name, entity and the input's country
+        in `countries`, when given) are reused and never reach the executor.
+        With `batched`, uncached cases are packed into multi-case calls under the token
+        budget and only the cases a call failed or skipped are re-judged one by one.
+        With a `budget` (budget.Tier2Budget), calls go out in input order only while they fit
+        it, and the cases it did not reach (all of them when not one case fits) come back as
+        None. Dict verdicts carry the tokens and estimated cost spent on them: a multi-case
+        call is shared evenly by its cases, a cached verdict is free.
+        """
+        countries = countries or [""] * len(cases)
+        verdicts = [self.verdict_cache.get("batch", name, match['id'], country)
+                    for (name, match, _), country in zip(cases, countries)]
+        pending = [i for i, v in enumerate(verdicts) if v is None]
+        spent, spend = {}, {}
+
+        def book(key, case_ids):
+            tokens, cost = usage_totals(spent.get(key, []))
+            for i in case_ids:
+                total = spend.setdefault(i, [0, 0.0])
+                total[0] += tokens / len(case_ids)
+                total[1] += cost / len(case_ids)
+
+        if batched and len(pending) > 1:
+            lines = {i: self.case_line(i, *cases[i]) for i in pending}
+            # A tight run budget gets smaller calls, so it is not refused whole and the workers still share it
+            headroom = budget.headroom(self.judge_model_id) if budget else None
+            per_call = None
+            if headroom is not None:
+                smallest = estimate_tokens(MULTI_JUDGE_PROMPT.format(cases="")) + VERDICT_TOKENS + \
+                    min(estimate_tokens(line) for line in lines.values())
+                per_call = max(headroom // self.tier2.max_workers, smallest)
+            groups = self.pack_cases(lines, per_call) if headroom is None or headroom >= smallest else []
+            admit = (lambda g: budget.admit(tuple(g), self.judge_model_id, *self.group_tokens(g, lines))) if budget else None
+            answers = self.tier2.map("gemini", lambda g: self.judge_matches(g, lines), groups, progress=progress, admit=admit,
+                                     model=lambda: self.judge_model_id,
+                                     around=lambda g: self.metered(spent, tuple(g), budget))
+            # Under one case of headroom nothing is sent: every case is left for review
+            unreached = set() if groups else set(pending)
+            for group, answer in zip(groups, answers):
+                book(tuple(group), group)
+                if answer is None:
+                    unreached.update(group)
+                elif isinstance(answer, dict):
+                    for i, verdict in answer.items():
+                        verdicts[i] = verdict
+                        self.verdict_cache.put("batch", cases[i][0], cases[i][1]['id'], countries[i], verdict)
+            pending = [i for i in pending if verdicts[i] is None and i not in unreached]
+            progress = None
+
+        admit = (lambda i: budget.admit(i, self.judge_model_id, estimate_tokens(self.match_prompt(*cases[i])),
+                                        VERDICT_TOKENS)) if budget else None
+        fresh = self.tier2.map("gemini", lambda i: self.judge_match(*cases[i]), pending, progress=progress, admit=admit,
+                               model=lambda: self.judge_model_id, around=lambda i: self.metered(spent, i, budget))
+        for i, verdict in zip(pending, fresh):
+            book(i, [i])
+            verdicts[i] = verdict
+            if isinstance(verdict, dict):
+                self.verdict_cache.put("batch", cases[i][0], cases[i][1]['id'], countries[i], verdict)
+        if batched:
+            # Distinct cases (input, entity, country), however many rows repeat one
+            self.rejudged += len({(cases[i][0], cases[i][1]['id'], countries[i])
+                                  for i, verdict in zip(pending, fresh) if verdict is not None})
+        return [{**v, "tokens": round(spend.get(i, [0])[0]), "cost_usd": round(spend.get(i, [0, 0.0])[1], 6)}
+                if isinstance(v, dict) else v for i, v in enumerate(verdicts)]
+
+    def settle_batch(self, cases, countries=None, progress=None, budget=None):
+        """
+        Triage for (name, match, score) cases, then judge_batch for the ambiguous ones only,
+        queued by budget.priority (highest first). Verdicts (or exceptions) come back in input
+        order; every dict verdict carries its rule id. With a `budget`, ambiguous cases it did
+        not reach get a PENDING REVIEW verdict instead of a judge call.
+        """
+        countries = countries or [None] * len(cases)
+        decisions = [self.triage.decide(name, match, score, country) for (name, match, score), country in zip(cases, countries)]
+        self.triage.record([(*case, country, d) for case, country, d in zip(cases, countries, decisions)])
+
+        verdicts = [d.get('verdict') for d in decisions]
+        ranks = {i: priority(*cases[i], countries[i]) for i, d in enumerate(decisions) if d['action'] == "TRIBUNAL"}
+        ambiguous = sorted(ranks, key=lambda i: -ranks[i])
+        judged = self.judge_batch([cases[i] for i in ambiguous], progress=progress, budget=budget,
+                                  countries=[countries[i] for i in ambiguous])
+        for i, verdict in zip(ambiguous, judged):
+            if verdict is None and budget is None:
+                verdict = RuntimeError("Judge returned no verdict")
+            elif verdict is None:
+                verdict = pending_verdict(ranks[i], budget.reason())
+                METRICS.count("tier2_pending_review")
+            verdicts[i] = {**verdict, "rule": AMBIGUOUS, "priority": round(ranks[i], 1)} if isinstance(verdict, dict) else verdict
+        return verdicts
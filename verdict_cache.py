@@ -0,0 +1,99 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from metrics import METRICS
+from name_index import normalize_name
+
+CACHE_FILE = "verdict_cache.sqlite"
+
+
+def cache_path(db_file):
+    """Default cache location: beside the sanctions DB it caches verdicts for, whatever the working directory."""
+    return os.path.join(os.path.dirname(os.path.abspath(db_file)), CACHE_FILE)
+
+
+class VerdictCache:
+    """
+    Disk-backed Tier 2 verdict cache (SQLite). Entries are keyed by normalized input,
+    matched entity id, country, sanctions list version and the model ids, so a list
+    refresh or a model swap never serves a stale verdict. Evicts least recently used
+    entries above `max_entries` and anything older than `ttl` seconds.
+    """
+
+    def __init__(self, path=None, list_version="", models=(), max_entries=100_000, ttl=30 * 86400):
+        self.list_version = list_version or ""
+        self.models = "|".join(models)
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.lock = threading.Lock()
+
+        # Without a path the cache sits next to this module rather than in the working directory
+        self.path = path or cache_path(__file__)
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS verdicts ("
+            "key TEXT PRIMARY KEY, list_version TEXT, models TEXT, payload TEXT, created REAL, accessed REAL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS verdicts_accessed ON verdicts (accessed)")
+        self.purge()
+
+    def set_models(self, models):
+        """After a model fallback: new entries (and lookups) are keyed by the models now in use."""
+        self.models = "|".join(models)
+
+    def purge(self):
+        """Drops entries from other list versions / models and those past their TTL."""
+        with self.lock, self.conn:
+            self.conn.execute(
+                "DELETE FROM verdicts WHERE list_version != ? OR models != ? OR created < ?",
+                (self.list_version, self.models, time.time() - self.ttl),
+            )
+
+    def make_key(self, mode, name, entity_id, country=""):
+        raw = json.dumps([mode, normalize_name(name), entity_id, country or "", self.list_version, self.models])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, mode, name, entity_id, country=""):
+        key = self.make_key(mode, name, entity_id, country)
+        now = time.time()
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT payload FROM verdicts WHERE key = ? AND created >= ?", (key, now - self.ttl)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                METRICS.count("verdict_cache_lookups", result="miss")
+                return None
+            self.hits += 1
+            METRICS.count("verdict_cache_lookups", result="hit")
+            with self.conn:
+                self.conn.execute("UPDATE verdicts SET accessed = ? WHERE key = ?", (now, key))
+        return json.loads(row[0])
+
+    def put(self, mode, name, entity_id, country, payload):
+        key = self.make_key(mode, name, entity_id, country)
+        now = time.time()
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO verdicts VALUES (?, ?, ?, ?, ?, ?)",
+                (key, self.list_version, self.models, json.dumps(payload), now, now),
+            )
+            self.writes += 1
+            # LRU trim, batched so most writes skip the COUNT
+            if self.writes % 256 == 0:
+                self.conn.execute(
+                    "DELETE FROM verdicts WHERE key IN "
+                    "(SELECT key FROM verdicts ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / total if total else 0.0}